@@ -0,0 +1,72 @@
+"""
+.. moduleauthor:: Li, Wang <wangziqi@foreseefund.com>
+
+Compare neutralization along Barra factors by a process pool solving each date on a ``pd.Panel`` cross section (the
+old way) against :py:func:`orca.operation.barra.factor_neut`. Data are synthetic, so MongoDB is not needed.
+
+Usage: python benchmarks/barraneut.py [ndates] [nsids] [nfactors]
+"""
+
+import sys
+import time
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+
+from orca.operation.barra import factor_neut
+
+
+def make_data(ndates, nsids, nfactors, ratio=0.9):
+    alpha = np.random.randn(ndates, nsids)
+    alpha[np.random.rand(ndates, nsids) > ratio] = np.nan
+    exposures = np.random.randn(ndates, nsids, nfactors)
+    exposures[np.random.rand(ndates, nsids) > ratio] = np.nan
+    return alpha, exposures
+
+def worker(args):
+    date, alpha, exposure = args
+
+    finite_alpha = alpha.dropna()
+    exposure = exposure.dropna(axis=0, how='all').fillna(0)
+    sids = exposure.index.intersection(finite_alpha.index)
+
+    nalpha, exposure = alpha[sids], exposure.ix[sids]
+    a, b = exposure.T.dot(exposure), exposure.T.dot(nalpha)
+    lamb = np.linalg.solve(a, b)
+    nalpha = pd.Series(nalpha.values - exposure.dot(lamb), index=sids)
+    return date, nalpha.reindex(index=alpha.index)
+
+def neut_pool(alpha, exposures):
+    ndates, nsids, nfactors = exposures.shape
+    alpha = pd.DataFrame(alpha)
+    exposures = pd.Panel(exposures.transpose(2, 0, 1))
+    pool = multiprocessing.Pool(multiprocessing.cpu_count())
+    res = pool.imap_unordered(worker, ((date, alpha.ix[date], exposures.major_xs(date)) for date in alpha.index))
+    pool.close()
+    pool.join()
+    return pd.DataFrame(dict(res)).T.values
+
+def timeit(func, repeat=3):
+    best = np.inf
+    for _ in xrange(repeat):
+        t0 = time.time()
+        func()
+        best = min(best, time.time()-t0)
+    return best
+
+
+if __name__ == '__main__':
+    ndates = int(sys.argv[1]) if len(sys.argv) > 1 else 250
+    nsids = int(sys.argv[2]) if len(sys.argv) > 2 else 3000
+    nfactors = int(sys.argv[3]) if len(sys.argv) > 3 else 43
+    alpha, exposures = make_data(ndates, nsids, nfactors)
+
+    res1, (res2, _) = neut_pool(alpha, exposures), factor_neut(alpha, exposures)
+    assert np.allclose(res1, res2, equal_nan=True)
+
+    t1 = timeit(lambda: neut_pool(alpha, exposures))
+    t2 = timeit(lambda: factor_neut(alpha, exposures))
+    print 'dates: {}, sids: {}, factors: {}'.format(ndates, nsids, nfactors)
+    print 'pool + panel:  {:.3f}s'.format(t1)
+    print 'batched solve: {:.3f}s ({:.1f}x)'.format(t2, t1/t2)
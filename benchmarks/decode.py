@@ -0,0 +1,54 @@
+"""
+.. moduleauthor:: Li, Wang <wangziqi@foreseefund.com>
+
+Compare decoding of ``dvalue`` documents by building a DataFrame from a dict of dicts (the old way)
+against :py:func:`orca.mongo.base.decode_frame`. Documents are synthetic, so MongoDB is not needed.
+
+Usage: python benchmarks/decode.py [ndates] [nsids]
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from orca.mongo.base import decode_frame
+
+
+def make_rows(ndates, nsids, ratio=0.9):
+    sids = ['%06d' % i for i in xrange(nsids)]
+    dates = ['%08d' % (20100101+i) for i in xrange(ndates)]
+    rows = []
+    for date in dates:
+        picked = np.random.rand(nsids) < ratio
+        rows.append({'date': date,
+                     'dvalue': dict(zip(np.array(sids)[picked], np.random.randn(picked.sum())))})
+    return sids, rows
+
+def decode_dict(rows, sids):
+    df = pd.DataFrame({row['date']: row['dvalue'] for row in rows}).T
+    return df.reindex(columns=sids)
+
+def timeit(func, repeat=5):
+    best = np.inf
+    for _ in xrange(repeat):
+        t0 = time.time()
+        func()
+        best = min(best, time.time()-t0)
+    return best
+
+
+if __name__ == '__main__':
+    ndates = int(sys.argv[1]) if len(sys.argv) > 1 else 250
+    nsids = int(sys.argv[2]) if len(sys.argv) > 2 else 3000
+    sids, rows = make_rows(ndates, nsids)
+
+    df1, df2 = decode_dict(rows, sids), decode_frame(rows, columns=sids, reindex=True)
+    assert np.allclose(df1.values, df2.values, equal_nan=True)
+
+    t1 = timeit(lambda: decode_dict(rows, sids))
+    t2 = timeit(lambda: decode_frame(rows, columns=sids, reindex=True))
+    print 'dates: {}, sids: {}'.format(ndates, nsids)
+    print 'dict of dicts: {:.3f}s'.format(t1)
+    print 'decode_frame:  {:.3f}s ({:.1f}x)'.format(t2, t1/t2)
@@ -0,0 +1,67 @@
+"""
+.. moduleauthor:: Li, Wang <wangziqi@foreseefund.com>
+
+Compare neutralization within dynamic groups by a process pool with ``groupby().transform`` on each date (the old
+way) against :py:class:`orca.operation.neutralize.GroupNeutOperation`. Data are synthetic, so MongoDB is not needed.
+
+Usage: python benchmarks/groupneut.py [ndates] [nsids] [ngroups]
+"""
+
+import sys
+import time
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+
+from orca.operation.neutralize import GroupNeutOperation
+
+
+def make_data(ndates, nsids, ngroups, ratio=0.9):
+    index = pd.date_range('20100101', periods=ndates, freq='B')
+    sids = ['%06d' % i for i in xrange(nsids)]
+    alpha = pd.DataFrame(np.random.randn(ndates, nsids), index=index, columns=sids)
+    alpha[np.random.rand(ndates, nsids) > ratio] = np.nan
+    group = pd.DataFrame(np.random.randint(ngroups, size=(ndates, nsids)), index=index, columns=sids)
+    group = group.applymap(lambda x: 'G%02d' % x)
+    group[np.random.rand(ndates, nsids) > ratio] = np.nan
+    return alpha, group
+
+def worker(args):
+    dt, alpha, group = args
+    sids = group.dropna().index
+    nalpha, group = alpha[sids], group[sids]
+    nalpha = nalpha.groupby(group).transform(lambda x: x-x.mean())
+    return dt, nalpha
+
+def neut_pool(alpha, group):
+    pool = multiprocessing.Pool(multiprocessing.cpu_count())
+    res = pool.imap_unordered(worker, [(dt, row, group.ix[dt]) for dt, row in alpha.iterrows()])
+    pool.close()
+    pool.join()
+    return pd.DataFrame(dict(res)).T.reindex(columns=alpha.columns)
+
+def timeit(func, repeat=3):
+    best = np.inf
+    for _ in xrange(repeat):
+        t0 = time.time()
+        func()
+        best = min(best, time.time()-t0)
+    return best
+
+
+if __name__ == '__main__':
+    ndates = int(sys.argv[1]) if len(sys.argv) > 1 else 250
+    nsids = int(sys.argv[2]) if len(sys.argv) > 2 else 3000
+    ngroups = int(sys.argv[3]) if len(sys.argv) > 3 else 30
+    alpha, group = make_data(ndates, nsids, ngroups)
+    op = GroupNeutOperation(group)
+
+    df1, df2 = neut_pool(alpha, group), op.operate(alpha)
+    assert np.allclose(df1.values, df2.values, equal_nan=True)
+
+    t1 = timeit(lambda: neut_pool(alpha, group))
+    t2 = timeit(lambda: op.operate(alpha))
+    print 'dates: {}, sids: {}, groups: {}'.format(ndates, nsids, ngroups)
+    print 'pool + groupby: {:.3f}s'.format(t1)
+    print 'bincount:       {:.3f}s ({:.1f}x)'.format(t2, t1/t2)
@@ -0,0 +1,45 @@
+"""
+.. moduleauthor:: Li, Wang <wangziqi@foreseefund.com>
+
+Compare per-call latency of :py:func:`orca.utils.dateutil.parse_date` on a plain list of dates against that on a
+:py:class:`orca.utils.dateutil.TradingCalendar`. Dates are synthetic business days, so MongoDB is not needed.
+
+Usage: python benchmarks/tradingcalendar.py [number]
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from orca.utils import dateutil
+
+
+def timeit(func, args, number):
+    t0 = time.time()
+    for arg in args:
+        func(*arg)
+    return (time.time()-t0) / number
+
+
+if __name__ == '__main__':
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    dates = dateutil.to_datestr(pd.bdate_range('20050101', '20161231'))
+    calendar = dateutil.TradingCalendar(dates)
+    calendar.resolve()
+
+    queries = [dates[i] for i in np.random.randint(0, len(dates), number)]
+    print 'dates: {}, calls: {}'.format(len(dates), number)
+    for name, func in [('parse_date', dateutil.parse_date), ('shift', None)]:
+        if func is None:
+            t1 = timeit(lambda date: dates[dates.index(date)-5], [(q,) for q in queries], number)
+            t2 = timeit(lambda date: calendar.shift(date, -5), [(q,) for q in queries], number)
+        else:
+            t1 = timeit(func, [(dates, q, -1) for q in queries], number)
+            t2 = timeit(func, [(calendar, q, -1) for q in queries], number)
+        print '{:<12} list: {:8.2f}us  calendar: {:8.2f}us ({:.1f}x)'.format(name, t1*1e6, t2*1e6, t1/t2)
+
+    t1 = timeit(lambda: [dateutil.parse_date(dates, q, -1)[0] for q in queries], [()], 1)
+    t2 = timeit(lambda: calendar.locate_many(queries, -1), [()], 1)
+    print '{:<12} loop: {:8.2f}ms  vectorized: {:8.2f}ms ({:.1f}x)'.format('locate_many', t1*1e3, t2*1e3, t1/t2)
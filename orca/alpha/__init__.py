@@ -3,3 +3,4 @@ from base import (
         BacktestingAlpha,
         ProductionAlpha)
 from expression import ExpressionAlpha
+from vectorized import VectorizedAlpha
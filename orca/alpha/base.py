@@ -4,6 +4,7 @@
 
 import os, sys
 from datetime import datetime
+import multiprocessing
 from multiprocessing import Process
 import abc
 import argparse
@@ -12,11 +13,17 @@ import numpy as np
 import pandas as pd
 import logbook
 logbook.set_datetime_format('local')
-from pymongo import MongoClient
-
-from orca import DATES
+from orca import database
+from orca.database import (
+        LazyClient,
+        LazyDatabase,
+        )
+
+from orca import (
+        DATES,
+        SIDS,
+        )
 from orca.utils import dateutil
-from orca.operation.api import format
 
 
 class AlphaBase(object):
@@ -93,6 +100,11 @@ class AlphaBase(object):
                 )
         if parts is None:
             return dates
+        return AlphaBase.split_dates(dates, parts)
+
+    @staticmethod
+    def split_dates(dates, parts):
+        """Split ``dates`` into at most ``parts`` consecutive chunks of nearly equal length."""
         chksize = len(dates)/parts
         if len(dates) > chksize * parts:
             chksize += 1
@@ -223,6 +235,143 @@ class IntervalAlphaBase(AlphaBase):
         return pd.to_datetime(date+' '+time)
 
 
+class AlphaAccumulator(object):
+    """Dict-like container of alphas, which writes each alpha(a Series indexed by sids) into a row of a
+    preallocated 2-D float array by sid position.
+
+    Only finite values are kept; others are stored as NaN. Sids not in ``columns`` are appended as new columns.
+
+    :param columns: Initial columns. Default: None, defaults to ``SIDS``
+    :param int capacity: Initial number of rows; it is doubled whenever it is exhausted. Default: 256
+    """
+
+    def __init__(self, columns=None, capacity=256):
+        self._columns = None if columns is None else pd.Index(columns)
+        self.capacity = capacity
+        self.values = None
+        self._keys = []
+        self._loc = {}
+
+    @property
+    def columns(self):
+        if self._columns is None:
+            self._columns = pd.Index(list(SIDS))
+        return self._columns
+
+    def _resize(self, rows, cols):
+        values = np.empty((rows, cols))
+        if self.values is not None:
+            n, m = len(self._keys), self.values.shape[1]
+            values[:n, :m] = self.values[:n]
+            values[:n, m:] = np.nan
+        self.values = values
+
+    def reserve(self, rows):
+        """Make sure there is room for ``rows`` more alphas without reallocation."""
+        need = len(self._keys) + rows
+        if self.values is None:
+            self._resize(max(need, self.capacity), len(self.columns))
+        elif need > len(self.values):
+            self._resize(max(need, 2 * len(self.values)), self.values.shape[1])
+
+    def _add_columns(self, labels):
+        self.reserve(0)
+        self._columns = self.columns.append(pd.Index(labels).unique())
+        self._resize(len(self.values), len(self._columns))
+
+    def _row(self, key):
+        """Return the row for ``key`` filled with NaN; a new row is allocated if ``key`` is new."""
+        if key not in self._loc:
+            self.reserve(1)
+            self._loc[key] = len(self._keys)
+            self._keys.append(key)
+        row = self.values[self._loc[key]]
+        row.fill(np.nan)
+        return row
+
+    def _indexer(self, labels):
+        indexer = self.columns.get_indexer(labels)
+        if (indexer == -1).any():
+            self._add_columns(labels[indexer == -1])
+            indexer = self.columns.get_indexer(labels)
+        return indexer
+
+    def __setitem__(self, key, value):
+        if isinstance(value, dict):
+            value = pd.Series(value)
+        if isinstance(value, pd.Series):
+            if value.index.equals(self.columns):
+                indexer, value = slice(None), value.values
+            else:
+                indexer, value = self._indexer(value.index), value.values
+        else:
+            indexer, value = slice(None), np.asarray(value)
+        row = self._row(key)
+        row[indexer] = value
+        row[~np.isfinite(row)] = np.nan
+
+    def __getitem__(self, key):
+        return pd.Series(self.values[self._loc[key]], index=self.columns).dropna()
+
+    def __delitem__(self, key):
+        i, n = self._loc.pop(key), len(self._keys)
+        self.values[i: n-1] = self.values[i+1: n]
+        del self._keys[i]
+        for j in range(i, n-1):
+            self._loc[self._keys[j]] = j
+
+    def __contains__(self, key):
+        return key in self._loc
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self):
+        return iter(list(self._keys))
+
+    def keys(self):
+        return list(self._keys)
+
+    def iteritems(self):
+        for key in self:
+            yield key, self[key]
+
+    def update(self, other):
+        """Add alphas in ``other``, either an :py:class:`AlphaAccumulator`, a DataFrame with keys as index or a
+        dict-like object of Series."""
+        if isinstance(other, pd.DataFrame):
+            keys, values = other.index, other.values.astype(np.float64)
+            values[~np.isfinite(values)] = np.nan
+        elif isinstance(other, AlphaAccumulator):
+            keys, values = other._keys, other.values
+        else:
+            for key, value in other.iteritems():
+                self[key] = value
+            return
+        if not len(keys):
+            return
+        indexer = self._indexer(other.columns)
+        self.reserve(len(keys))
+        for key, value in zip(keys, values):
+            self._row(key)[indexer] = value
+
+    def to_frame(self):
+        """Return alphas in a DataFrame with DatetimeIndex; no copy is made unless keys were not added in order."""
+        if not self._keys:
+            return pd.DataFrame()
+        df = pd.DataFrame(self.values[:len(self._keys)], index=pd.to_datetime(self._keys), columns=self.columns,
+                copy=False)
+        if not df.index.is_monotonic:
+            df = df.sort_index()
+        return df
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if self.values is not None:
+            state['values'] = self.values[:len(self._keys)]
+        return state
+
+
 class BacktestingAlpha(AlphaBase):
     """Base class for backtesting alphas.
 
@@ -233,15 +382,16 @@ class BacktestingAlpha(AlphaBase):
 
     def __init__(self, *args, **kwargs):
         super(BacktestingAlpha, self).__init__(**kwargs)
-        self.alphas = {}
+        self.alphas = AlphaAccumulator()
         self._alphas = None
 
     def get_alphas(self):
-        """Return the generated alphas in a DataFrame."""
+        """Return the generated alphas in a DataFrame with full sids as columns; it shares memory with
+        ``self.alphas``."""
         if self._alphas is not None:
             return self._alphas
 
-        df = format(pd.DataFrame(self.alphas).T, full_sids=False)
+        df = self.alphas.to_frame()
         self._alphas = df
         return df
 
@@ -255,31 +405,127 @@ class BacktestingAlpha(AlphaBase):
             value = pd.Series(value)
         if not isinstance(value, pd.Series):
             raise Exception('Alpha type not expected')
-        self.alphas[key] = value[np.isfinite(value)]
+        self.alphas[key] = value
 
     def dump(self, fpath, ftype='csv'):
-        with open(fpath, 'w') as file:
-            if ftype == 'csv':
+        if ftype == 'csv':
+            with open(fpath, 'w') as file:
                 self.get_alphas().to_csv(file)
-            elif ftype == 'pickle':
-                self.get_alphas().to_pickle(file)
-            elif ftype == 'msgpack':
-                self.get_alphas().to_msgpack(file)
+        elif ftype == 'pickle':
+            self.get_alphas().to_pickle(fpath)
+        elif ftype == 'msgpack':
+            self.get_alphas().to_msgpack(fpath)
         self.info('Saved in {}'.format(fpath))
 
-    def run(self, startdate=None, enddate=None, dates=None):
+    @staticmethod
+    def read(fpath, ftype='csv'):
+        """Read alphas saved by :py:meth:`dump` into a DataFrame with DatetimeIndex."""
+        if ftype == 'csv':
+            return pd.read_csv(fpath, index_col=0, parse_dates=True)
+        elif ftype == 'pickle':
+            return pd.read_pickle(fpath)
+        elif ftype == 'msgpack':
+            return pd.read_msgpack(fpath)
+        raise ValueError('File type {0!r} is not supported'.format(ftype))
+
+    def extend(self, fpath, enddate=None, ftype='csv', **kwargs):
+        """Extend alphas saved by :py:meth:`dump` in ``fpath`` to ``enddate``.
+
+        Saved alphas are loaded into this object, :py:meth:`run` is called only on trading days after the last
+        saved date, and the result is saved back into ``fpath``. For 'csv' files, new rows are appended to the file
+        when sids are not changed. Hence the cost scales with the number of new dates; for
+        :py:class:`orca.alpha.vectorized.VectorizedAlpha`, data are fetched only from ``backdays + delay`` days
+        before the first new date.
+
+        :param enddate: Default: None, defaults to the last trading day
+        :param kwargs: Passed to :py:meth:`run`, for example, ``parallel=True``
+        :returns: List of new dates
+        :raises: IOError if ``fpath`` does not exist
+        """
+        if not os.path.exists(fpath):
+            raise IOError('{} does not exist'.format(fpath))
+        saved = self.read(fpath, ftype)
+        if len(saved):
+            keys = saved.copy()
+            keys.index = [date.strftime('%Y%m%d') for date in saved.index]
+            self.alphas.update(keys)
+            self._alphas = None
+            di = DATES.locate(keys.index[-1], -1)[0] + 1
+        else:
+            di = 0
+        dates = DATES[di:] if enddate is None else DATES[di: DATES.locate(str(enddate), -1)[0]+1]
+        if not dates:
+            self.info('{} is up to date'.format(fpath))
+            return []
+
+        self.run(dates=dates, **kwargs)
+        self._alphas = None
+        alphas = self.get_alphas()
+        if ftype == 'csv' and len(saved) and list(alphas.columns) == list(saved.columns):
+            with open(fpath, 'a') as file:
+                alphas[alphas.index > saved.index[-1]].to_csv(file, header=False)
+            self.info('Appended {} dates to {}'.format(len(dates), fpath))
+        else:
+            self.dump(fpath, ftype=ftype)
+        return dates
+
+    def run(self, startdate=None, enddate=None, dates=None, parallel=False, workers=None):
         """Main interface to an alpha.
 
         :param dates list: One can supply this keyword argument with a list to omit ``startdate`` and ``enddate``
+        :param boolean parallel: Whether to split dates into consecutive chunks and run them in a pool of processes. Default: False
+        :param int workers: Number of processes when ``parallel`` is True. Default: None, defaults to number of CPUs
+
+        .. note::
+
+           Parallel mode relies on ``fork``: worker processes inherit this object as it is, and only the generated
+           alphas are sent back. It is only valid when :py:meth:`generate` on one date does not depend on states
+           left by :py:meth:`generate` on previous dates.
         """
         if dates is None:
             dates = self.generate_dates(startdate, enddate)
 
+        if parallel:
+            self._run_parallel(dates, workers or multiprocessing.cpu_count())
+            return
+
+        self.alphas.reserve(len(dates))
         for date in dates:
             if self.filter_date(date):
                 self.generate(date)
                 self.debug('Generated alpha for {} sids on {}'.format(self[date].count(), date))
 
+    def _run_parallel(self, dates, workers):
+        global _parallel_alpha
+        chunks = self.split_dates(list(dates), workers) if len(dates) else []
+        self.alphas.reserve(len(dates))
+        _parallel_alpha = self
+        try:
+            pool = multiprocessing.Pool(min(workers, len(chunks)) or 1, initializer=database.reset)
+            try:
+                for alphas in pool.imap(_run_chunk, chunks):
+                    for date in alphas:
+                        if date in self.alphas:
+                            self.warning('{0!r} already exists as a key'.format(date))
+                    self.alphas.update(alphas)
+            finally:
+                pool.close()
+                pool.join()
+        finally:
+            _parallel_alpha = None
+        self._alphas = None
+        self.debug('Generated alpha on {} dates in {} chunks'.format(len(dates), len(chunks)))
+
+
+_parallel_alpha = None
+
+def _run_chunk(dates):
+    """Run the alpha inherited from the parent process on ``dates`` and return only newly generated alphas."""
+    alpha = _parallel_alpha
+    alpha.alphas, alpha._alphas = AlphaAccumulator(alpha.alphas.columns, len(dates)), None
+    alpha.run(dates=dates)
+    return alpha.alphas
+
 
 class BacktestingIntervalAlpha(IntervalAlphaBase):
     """Base class for backtesting interval alphas.
@@ -291,15 +537,16 @@ class BacktestingIntervalAlpha(IntervalAlphaBase):
 
     def __init__(self, freq, *args, **kwargs):
         super(BacktestingIntervalAlpha, self).__init__(freq, **kwargs)
-        self.alphas = {}
+        self.alphas = AlphaAccumulator()
         self._alphas = None
 
     def get_alphas(self):
-        """Return the generated alphas in a DataFrame."""
+        """Return the generated alphas in a DataFrame with full sids as columns; it shares memory with
+        ``self.alphas``."""
         if self._alphas is not None:
             return self._alphas
 
-        df = format(pd.DataFrame(self.alphas).T, full_sids=False)
+        df = self.alphas.to_frame()
         self._alphas = df
         return df
 
@@ -315,7 +562,7 @@ class BacktestingIntervalAlpha(IntervalAlphaBase):
             value = pd.Series(value)
         if not isinstance(value, pd.Series):
             raise Exception('Alpha type not expected')
-        self.alphas[key] = value[np.isfinite(value)]
+        self.alphas[key] = value
 
     def push(self, key, value):
         if isinstance(key, tuple):
@@ -341,33 +588,105 @@ class BacktestingIntervalAlpha(IntervalAlphaBase):
         if dates is None:
             dates = self.generate_dates(startdate, enddate)
 
+        self.alphas.reserve(len(dates) * len(self.times))
         for date in dates:
             for time in self.times:
                 self.generate(date, time)
             self.debug('Generated alpha for {}'.format(date))
 
 
+class TradeLog(object):
+    """Columnar log of orders in growable preallocated arrays, one per field in :py:attr:`fields`.
+
+    :param int capacity: Initial number of rows; it is doubled whenever it is exhausted. Default: 1024
+    """
+
+    fields = ('order', 'pnl', 'position', 'price')
+
+    def __init__(self, capacity=1024):
+        self.size = 0
+        self.times = np.empty(capacity, dtype=object)
+        self.values = np.empty((capacity, len(self.fields)))
+
+    def reserve(self, rows):
+        """Make sure there is room for ``rows`` more orders without reallocation."""
+        need = self.size + rows
+        if need > len(self.times):
+            capacity = max(need, 2 * len(self.times))
+            times, values = np.empty(capacity, dtype=object), np.empty((capacity, len(self.fields)))
+            times[:self.size], values[:self.size] = self.times[:self.size], self.values[:self.size]
+            self.times, self.values = times, values
+
+    def append(self, dt, order, pnl, position, price):
+        self.reserve(1)
+        self.times[self.size] = dt
+        self.values[self.size] = order, pnl, position, price
+        self.size += 1
+
+    def extend(self, dts, orders, pnls, positions, prices):
+        """Append orders in arrays."""
+        n = len(dts)
+        self.reserve(n)
+        # as objects, since a DatetimeIndex would otherwise be stored as integers of nanoseconds
+        self.times[self.size: self.size+n] = pd.Index(dts).astype(object).values
+        for i, values in enumerate((orders, pnls, positions, prices)):
+            self.values[self.size: self.size+n, i] = values
+        self.size += n
+
+    def last(self, field):
+        return self.values[self.size-1, self.fields.index(field)]
+
+    def __len__(self):
+        return self.size
+
+    def to_frame(self):
+        """Return orders in a DataFrame with times as index and :py:attr:`fields` as columns."""
+        return pd.DataFrame(self.values[:self.size], index=list(self.times[:self.size]), columns=self.fields)
+
+
 class IntradayFutAlpha(AlphaBase):
     """Base class for backtesting intraday futures alphas.
 
+    Orders are kept in a :py:class:`TradeLog`, which is converted into a DataFrame only on access of
+    :py:attr:`records`(and :py:meth:`dump`).
+
+    An alpha either overrides :py:meth:`generate` to call :py:meth:`order` and :py:meth:`clear` tick by tick,
+    or overrides :py:meth:`target` to return target positions of all ticks of a day at once, and runs with
+    ``vectorized=True``.
+
     .. note::
 
        This is a base class and should not be used directly
     """
 
+    #: Column of prices in :py:attr:`data` for the vectorized mode
+    price = 'price'
+
     def __init__(self, **kwargs):
         super(IntradayFutAlpha, self).__init__(**kwargs)
-        self.records = None
+        self.trades = TradeLog()
+        self.daily_pnl = {}
         self.data = None
-        self.pnl = pd.Series()
         self._price = 0
         self._position = 0
         self._pnl = 0
 
+    @property
+    def records(self):
+        """Orders in a DataFrame; None if there is no order."""
+        if not len(self.trades):
+            return None
+        return self.trades.to_frame()
+
+    @property
+    def pnl(self):
+        """Series of PnL of each day."""
+        return pd.Series(self.daily_pnl)
+
     def clear(self, dt, price):
         if self._position:
             self.order(dt, price, -self._position)
-            self.pnl.ix[dt.date()] = self.records.iloc[-1]['pnl']
+            self.daily_pnl[dt.date()] = self.trades.last('pnl')
         self._price = 0
         self._position = 0
         self._pnl = 0
@@ -378,16 +697,7 @@ class IntradayFutAlpha(AlphaBase):
         self._pnl += self._position * (price - self._price)
         self._price = price
         self._position += position
-        record = {
-                'order': position,
-                'price': price,
-                'position': self._position,
-                'pnl': self._pnl,
-                }
-        if self.records is None:
-            self.records = pd.DataFrame({dt: record}).T
-        else:
-            self.records.ix[dt] = pd.Series(record)
+        self.trades.append(dt, position, self._pnl, self._position, price)
 
     def order(self, dt, price, position, exit=False):
         if exit and self._position * position < 0:
@@ -395,13 +705,14 @@ class IntradayFutAlpha(AlphaBase):
         self._order(dt, price, position)
 
     def dump(self, fpath, ftype='csv'):
-        with open(fpath, 'w') as file:
-            if ftype == 'csv':
-                self.records.to_csv(file)
-            elif ftype == 'pickle':
-                self.records.to_pickle(file)
-            elif ftype == 'msgpack':
-                self.records.to_msgpack(file)
+        records = self.records
+        if ftype == 'csv':
+            with open(fpath, 'w') as file:
+                records.to_csv(file)
+        elif ftype == 'pickle':
+            records.to_pickle(fpath)
+        elif ftype == 'msgpack':
+            records.to_msgpack(fpath)
         self.info('Saved in {}'.format(fpath))
 
     @abc.abstractmethod
@@ -413,16 +724,49 @@ class IntradayFutAlpha(AlphaBase):
     def generate(self, i, dt):
         raise NotImplementedError
 
-    def run(self, startdate=None, enddate=None, dates=None):
+    def target(self, data):
+        """Override to use the vectorized mode.
+
+        :param data: DataFrame of tick data of a day, i.e. :py:attr:`self.data`
+        :returns: Series(or array) of target positions on each tick; NaN means to hold the previous position
+        :raises: NotImplementedError
+        """
+        raise NotImplementedError
+
+    def trade(self, data):
+        """Turn target positions of a day into orders in one pass; the position is cleared at the last tick.
+
+        Each change of position is one order, with PnL computed the same way as :py:meth:`order`.
+        """
+        if not len(data):
+            return
+        position = pd.Series(np.asarray(self.target(data), dtype=float), index=data.index)
+        position = position.fillna(method='ffill').fillna(0).values
+        position[-1] = 0
+        orders = np.diff(np.concatenate([[0.], position]))
+        mask = orders != 0
+        if not mask.any():
+            return
+        prices, positions = data[self.price].values[mask], position[mask]
+        pnls = np.concatenate([[0.], np.cumsum(positions[:-1] * np.diff(prices))])
+        self.trades.extend(data.index[mask], orders[mask], pnls, positions, prices)
+        if mask[-1]:
+            self.daily_pnl[data.index[-1].date()] = pnls[-1]
+
+    def run(self, startdate=None, enddate=None, dates=None, vectorized=False):
         """Main interface to an alpha.
 
         :param dates list: One can supply this keyword argument with a list to omit ``startdate`` and ``enddate``
+        :param boolean vectorized: Whether to get positions of each day by :py:meth:`target` instead of calling :py:meth:`generate` on each tick. Default: False
         """
         if dates is None:
             dates = self.generate_dates(startdate, enddate)
 
         for date in dates:
             self.associate(date)
+            if vectorized:
+                self.trade(self.data)
+                continue
             for i, dt in enumerate(self.data.index):
                 self.generate(i, dt)
 
@@ -483,11 +827,11 @@ class ProductionAlpha(AlphaBase):
 
     def connect_mongo(self, host='192.168.1.183', db='stocks_dev',
             user='stocks_dev', password='stocks_dev'):
-        client = MongoClient(host)
-        db = client[db]
-        db.authenticate(user, password)
-        self.client, self.db, self.collection = client, db, db.alpha
-        self.dates = sorted(db.dates.distinct('date'))
+        """Clients are managed by :py:data:`orca.database.manager`, thus each process of :py:meth:`generate` opens its own connection."""
+        self.client = LazyClient(host=host, dbname=db, user=user, password=password)
+        self.db = LazyDatabase(host=host, dbname=db, user=user, password=password)
+        self.collection = self.db.alpha
+        self.dates = sorted(self.db.dates.distinct('date'))
 
     def parse_args(self):
         """This method makes any alpha file can be turned into a script."""
@@ -547,8 +891,5 @@ class SYWGProductionAlpha(ProductionAlpha):
 
     def connect_mongo(self, host='192.168.1.183', db='stocks_dev',
             user='stocks_dev', password='stocks_dev'):
-        client = MongoClient(host)
-        db = client[db]
-        db.authenticate(user, password)
-        self.client, self.db, self.collection = client, db, db.sywgindex_alpha
-        self.dates = sorted(db.dates.distinct('date'))
+        super(SYWGProductionAlpha, self).connect_mongo(host=host, db=db, user=user, password=password)
+        self.collection = self.db.sywgindex_alpha
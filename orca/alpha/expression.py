@@ -1,25 +1,236 @@
 """
 .. moduleauthor:: Li, Wang <wangziqi@foreseefund.com>
+
+Expressions are Python expressions on data names, numbers, strings and calls of functions in
+:py:mod:`orca.operation.api`(plus ``abs``, ``log``, ``sign`` and ``sqrt``), for example::
+
+   rank(ts_mean(close, 5) / close)
+   level1_neut(-delta(log(close), 5), standard='ZX')
+
+An expression is compiled into a :py:class:`Program`, a list of nodes in evaluation order in which identical
+subexpressions appear only once. Each node is evaluated on whole DataFrames(dates x sids), hence each input is
+fetched once and each subexpression computed once per run.
 """
 
-from orca.alpha.base import BacktestingAlpha
+import ast
+import inspect
+import operator
+
+import numpy as np
+import pandas as pd
+
+from orca.mongo.quote import QuoteFetcher
+from orca.operation import api
+from orca.alpha.vectorized import VectorizedAlpha
+
+BINOPS = {
+        ast.Add: operator.add,
+        ast.Sub: operator.sub,
+        ast.Mult: operator.mul,
+        ast.Div: operator.truediv,
+        ast.Pow: operator.pow,
+        }
+COMMUTATIVE = (ast.Add, ast.Mult)
+UNARYOPS = {
+        ast.USub: operator.neg,
+        ast.UAdd: operator.pos,
+        }
+
+FUNCTIONS = dict((name, func) for name, func in inspect.getmembers(api, inspect.isfunction)
+                 if not name.startswith('_') and name not in ('format', 'intersect', 'intersect_interval', 'quantiles'))
+FUNCTIONS.update({
+        'abs': np.abs,
+        'log': np.log,
+        'sign': np.sign,
+        'sqrt': np.sqrt,
+        })
+
+#: Number of extra rows required by time-series functions with window ``n``
+LOOKBACK = {
+        'delay': lambda n: n,
+        'delta': lambda n: n,
+        'ts_sum': lambda n: n-1,
+        'ts_mean': lambda n: n-1,
+        'ts_std': lambda n: n-1,
+        'ts_min': lambda n: n-1,
+        'ts_max': lambda n: n-1,
+        'ts_rank': lambda n: n-1,
+        'ts_corr': lambda n: n-1,
+        'decay': lambda n: n-1,
+        }
 
 
-class ExpressionAlpha(BacktestingAlpha):
+class Program(object):
+    """Compiled form of one or more expressions sharing inputs and subexpressions.
+
+    :param list expressions: Expression strings
+    :raises: ValueError for syntax not supported or unknown functions
+
+    Each node is a tuple ``(kind, ...)`` of children's node positions, so that equal tuples mean equal
+    subexpressions: ``('input', name)``, ``('const', value, type)``, ``('binop', op, left, right)``,
+    ``('unaryop', op, operand)`` and ``('call', name, args, kwargs)``.
+    """
+
+    def __init__(self, expressions):
+        self.expressions = list(expressions)
+        self.nodes, self._loc, self._lookback = [], {}, []
+        self.outputs = [self._compile(self._parse(expression)) for expression in self.expressions]
+
+        self.inputs = [node[1] for node in self.nodes if node[0] == 'input']
+        self.backdays = max([self._lookback[i] for i in self.outputs] or [0])
+
+        # position of the last node using each node, to free intermediate results as soon as possible
+        self._last_use = {}
+        for i, node in enumerate(self.nodes):
+            for child in self._children(node):
+                self._last_use[child] = i
+
+    @staticmethod
+    def _parse(expression):
+        try:
+            return ast.parse(expression.strip(), mode='eval').body
+        except SyntaxError, e:
+            raise ValueError('Invalid expression {0!r}: {1}'.format(expression, e))
+
+    @staticmethod
+    def _children(node):
+        if node[0] == 'binop':
+            return node[2:]
+        if node[0] == 'unaryop':
+            return node[2:]
+        if node[0] == 'call':
+            return node[2] + tuple(v for _, v in node[3])
+        return ()
+
+    def _add(self, node, lookback=0):
+        if node not in self._loc:
+            self._loc[node] = len(self.nodes)
+            self.nodes.append(node)
+            self._lookback.append(lookback)
+        return self._loc[node]
+
+    def _constant(self, node):
+        if isinstance(node, (ast.Num, ast.Str)):
+            return node.n if isinstance(node, ast.Num) else node.s
+        if isinstance(node, ast.Name) and node.id in ('True', 'False', 'None'):
+            return {'True': True, 'False': False, 'None': None}[node.id]
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub) and isinstance(node.operand, ast.Num):
+            return -node.operand.n
+        raise ValueError('Expect a constant, got {0!r}'.format(ast.dump(node)))
+
+    def _compile(self, node):
+        """Add ``node`` and its children into the program; return its position."""
+        if isinstance(node, (ast.Num, ast.Str)) or \
+                isinstance(node, ast.Name) and node.id in ('True', 'False', 'None'):
+            value = self._constant(node)
+            return self._add(('const', value, type(value)))
+        if isinstance(node, ast.Name):
+            return self._add(('input', node.id))
+        if isinstance(node, ast.BinOp) and type(node.op) in BINOPS:
+            left, right = self._compile(node.left), self._compile(node.right)
+            if isinstance(node.op, COMMUTATIVE) and left > right:
+                left, right = right, left
+            return self._add(('binop', type(node.op), left, right),
+                             max(self._lookback[left], self._lookback[right]))
+        if isinstance(node, ast.UnaryOp) and type(node.op) in UNARYOPS:
+            operand = self._compile(node.operand)
+            return self._add(('unaryop', type(node.op), operand), self._lookback[operand])
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+            name = node.func.id
+            if name not in FUNCTIONS:
+                raise ValueError('No such function {0!r}'.format(name))
+            if node.starargs is not None or node.kwargs is not None:
+                raise ValueError('*args and **kwargs are not supported in {0!r}'.format(name))
+            args = tuple(self._compile(arg) for arg in node.args)
+            kwargs = tuple(sorted((kw.arg, self._compile(kw.value)) for kw in node.keywords))
+            lookback = max([self._lookback[i] for i in args + tuple(v for _, v in kwargs)] or [0])
+            if name in LOOKBACK:
+                window = [self.nodes[i][1] for i in args if self.nodes[i][0] == 'const']
+                if not window:
+                    raise ValueError('Expect a constant window in {0!r}'.format(name))
+                lookback += LOOKBACK[name](window[0])
+            return self._add(('call', name, args, kwargs), lookback)
+        raise ValueError('Syntax not supported: {0!r}'.format(ast.dump(node)))
+
+    def evaluate(self, data):
+        """Evaluate expressions.
+
+        :param dict data: Mapping of each item in :py:attr:`inputs` to a DataFrame
+        :returns: list of results, one for each expression
+        """
+        values, outputs = {}, set(self.outputs)
+        for i, node in enumerate(self.nodes):
+            kind = node[0]
+            if kind == 'input':
+                values[i] = data[node[1]]
+            elif kind == 'const':
+                values[i] = node[1]
+            elif kind == 'binop':
+                values[i] = BINOPS[node[1]](values[node[2]], values[node[3]])
+            elif kind == 'unaryop':
+                values[i] = UNARYOPS[node[1]](values[node[2]])
+            else:
+                args = [values[j] for j in node[2]]
+                kwargs = dict((k, values[j]) for k, j in node[3])
+                values[i] = FUNCTIONS[node[1]](*args, **kwargs)
+            for child in set(self._children(node)):
+                if self._last_use[child] == i and child not in outputs:
+                    del values[child]
+        return [values[i] for i in self.outputs]
+
+    def __len__(self):
+        return len(self.nodes)
+
+
+class ExpressionAlpha(VectorizedAlpha):
     """Base class for alphas constructed from expressions.
 
     :param str expression: alpha expression
+    :param dict fields: Mapping of data names in the expression to ``(fetcher, dname[, kwargs])``, as in
+       :py:attr:`orca.alpha.vectorized.VectorizedAlpha.inputs`; other names are fetched by
+       :py:class:`orca.mongo.quote.QuoteFetcher`. Default: None
 
-    .. note::
-
-       This is a base class and should not be used directly.
+    Required history(``backdays``) is inferred from windows of time-series functions in the expression.
     """
 
-    def __init__(self, expression, *args, **kwargs):
+    fields = {}
+
+    def __init__(self, expression, fields=None, *args, **kwargs):
         self.expression = self.parse_expression(expression)
-        BacktestingAlpha.__init__(self, *args, **kwargs)
+        if fields is not None:
+            self.fields = dict(self.fields, **fields)
+        super(ExpressionAlpha, self).__init__(*args, **kwargs)
+        self.inputs = dict((name, self.fields.get(name, (QuoteFetcher, name))) for name in self.expression.inputs)
+        self.backdays = max(self.backdays, self.expression.backdays)
 
     @staticmethod
-    def parse_expression(self, expression):
-        """Parse the expression string into Python expressions."""
-        raise NotImplementedError
+    def parse_expression(expression):
+        """Parse the expression string(or a list of them) into a :py:class:`Program`."""
+        if isinstance(expression, basestring):
+            expression = [expression]
+        return Program(expression)
+
+    def compute(self, **data):
+        return self.expression.evaluate(data)[0]
+
+    @classmethod
+    def batch(cls, expressions, startdate=None, enddate=None, dates=None, **kwargs):
+        """Compute many expressions at once, sharing inputs and subexpressions among them.
+
+        :param list expressions: Expression strings
+        :param kwargs: Passed to the constructor, for example, ``delay`` and ``fields``
+        :returns: list of DataFrames with DatetimeIndex, one for each expression
+        """
+        alpha = cls(list(expressions), **kwargs)
+        if dates is None:
+            dates = alpha.generate_dates(startdate, enddate)
+        dates = [date for date in dates if alpha.filter_date(date)]
+        window = alpha.get_window(dates)
+        res = []
+        for df in alpha.expression.evaluate(alpha.load(window)):
+            df = df.reindex(index=dates)
+            df.index = pd.to_datetime(df.index)
+            res.append(df)
+        alpha.debug('Computed {} expressions with {} nodes on {} dates'.format(
+            len(alpha.expression.expressions), len(alpha.expression), len(dates)))
+        return res
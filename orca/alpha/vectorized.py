@@ -0,0 +1,105 @@
+"""
+.. moduleauthor:: Li, Wang <wangziqi@foreseefund.com>
+"""
+
+import abc
+
+from orca import DATES
+from orca.mongo.base import fetch_concurrently
+from orca.utils import shared
+from orca.alpha.base import BacktestingAlpha
+
+
+class VectorizedAlpha(BacktestingAlpha):
+    """Base class for alphas computed on the whole (dates, sids) panel in one call.
+
+    Subclasses declare :py:attr:`inputs` and override :py:meth:`compute`. On each run, every input is fetched once
+    for a window which starts ``backdays + delay`` trading days before the first date, and is shifted by ``delay``
+    rows, so that alpha on a date only sees data up to ``delay`` days before.
+
+    :param int delay: Number of trading days between data and alpha. Default: 1
+    :param int backdays: Number of extra trading days of (delayed) history required by :py:meth:`compute`. Default: 0
+
+    .. note::
+
+       This is a base class and should not be used directly
+    """
+
+    #: ``dict`` of name -> ``(fetcher, dname[, kwargs])``; ``fetcher`` is either an object or a class to be
+    #: instantiated without arguments, for example ``{'close': (QuoteFetcher, 'close')}``
+    inputs = {}
+    delay = 1
+    backdays = 0
+
+    def __init__(self, *args, **kwargs):
+        super(VectorizedAlpha, self).__init__(*args, **kwargs)
+        self._fetchers = {}
+
+    @abc.abstractmethod
+    def compute(self, **data):
+        """Override (**mandatory**) to compute alphas on the whole window.
+
+        :param data: DataFrames of :py:attr:`inputs` with dates of the window(shifted by ``delay``) as index
+        :returns: DataFrame with the same index as ``data``
+        :raises: NotImplementedError
+        """
+        raise NotImplementedError
+
+    def get_window(self, dates):
+        """Return the consecutive trading dates from ``backdays + delay`` days before ``dates[0]`` to ``dates[-1]``."""
+        start, end = DATES.index(dates[0]), DATES.index(dates[-1])
+        return DATES[max(start-self.backdays-self.delay, 0): end+1]
+
+    def get_fetcher(self, fetcher):
+        if isinstance(fetcher, type):
+            if fetcher not in self._fetchers:
+                self._fetchers[fetcher] = fetcher()
+            return self._fetchers[fetcher]
+        return fetcher
+
+    def load(self, window):
+        """Fetch :py:attr:`inputs` on ``window`` concurrently and shift them by ``delay``. An input shared under the
+        same name by :py:mod:`orca.utils.shared` is used instead of fetching when it covers ``window``.
+
+        :returns: ``dict`` of name -> DataFrame
+        """
+        data, names, calls = {}, [], []
+        for name, spec in self.inputs.iteritems():
+            df = shared.get(name)
+            if df is not None and window[0] in df.index and window[-1] in df.index:
+                data[name] = df.reindex(index=window).shift(self.delay)
+                continue
+            fetcher, dname = spec[:2]
+            kwargs = dict(spec[2]) if len(spec) > 2 else {}
+            kwargs['datetime_index'] = False
+            names.append(name)
+            calls.append((self.get_fetcher(fetcher).fetch_window, (dname, window), kwargs))
+        for name, df in zip(names, fetch_concurrently(calls)):
+            data[name] = df.reindex(index=window).shift(self.delay)
+        return data
+
+    def compute_window(self, dates):
+        """Return alphas on ``dates`` in a DataFrame."""
+        window = self.get_window(dates)
+        df = self.compute(**self.load(window))
+        return df.reindex(index=dates)
+
+    def generate(self, date):
+        self.alphas.update(self.compute_window([date]))
+
+    def run(self, startdate=None, enddate=None, dates=None, parallel=False, workers=None):
+        """Same as :py:meth:`orca.alpha.base.BacktestingAlpha.run`, but :py:meth:`compute` is called only once
+        (once per chunk when ``parallel`` is True)."""
+        if dates is None:
+            dates = self.generate_dates(startdate, enddate)
+
+        if parallel:
+            super(VectorizedAlpha, self).run(dates=dates, parallel=True, workers=workers)
+            return
+
+        dates = [date for date in dates if self.filter_date(date)]
+        if not dates:
+            return
+        self.alphas.update(self.compute_window(dates))
+        self._alphas = None
+        self.debug('Generated alpha on {} dates from {} to {}'.format(len(dates), dates[0], dates[-1]))
@@ -52,7 +52,7 @@ class BarraOptimizerBase(object):
         pass
 
     def initialize(self, date):
-        prev_date = DATES[DATES.index(date)-1]
+        prev_date = DATES.shift(date, -1)
         self.workspace = barraopt.CWorkSpace.CreateInstance()
         self.regular_bids = set()
         self.bid_sid = barra_fetcher.fetch_idmaps(date=prev_date)
@@ -185,7 +185,7 @@ class BarraOptimizerBase(object):
 
     def define_risk_model(self, date):
         config = self.config.xpath('RiskModel')[0]
-        prev_date = DATES[DATES.index(date)-1]
+        prev_date = DATES.shift(date, -1)
         path = util.generate_path(config.attrib['path'], prev_date)
         self.risk_model_name = config.attrib['name']
         self.risk_model = self.workspace.CreateRiskModel(self.risk_model_name)
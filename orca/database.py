@@ -1,12 +1,333 @@
 """
 .. moduleauthor:: Li, Wang <wangziqi@foreseefund.com>
+
+Nothing in this module touches MongoDB at import time: the client, the database, the trading dates(as a
+:py:class:`orca.utils.dateutil.TradingCalendar`), the sids and the data names of fetchers are all resolved on
+first use. Resolved lists are always loaded from MongoDB and saved in a local snapshot file, which is used in
+place of MongoDB only when MongoDB is not reachable.
+
+Clients are owned by :py:data:`manager`, a :py:class:`ConnectionManager` with configurable pool size, timeouts and
+read preference. Clients are never shared across processes: a forked process(for example, a ``multiprocessing``
+worker) opens its own on first use.
 """
 
+import os
+import json
+import tempfile
+import threading
+
+import numpy as np
+import logbook
+logbook.set_datetime_format('local')
 from pymongo import MongoClient
+from pymongo.database import Database
+from pymongo.errors import PyMongoError
+
+from orca.utils.dateutil import TradingCalendar
+
+HOST = '192.168.1.183'
+DBNAME = 'stocks_dev'
+USER = 'stocks_dev'
+PASSWORD = 'stocks_dev'
+
+POOL_SIZE = int(os.environ.get('ORCA_MONGO_POOL_SIZE', 16))
+SOCKET_TIMEOUT = int(os.environ.get('ORCA_MONGO_SOCKET_TIMEOUT', 0)) or None
+CONNECT_TIMEOUT = int(os.environ.get('ORCA_MONGO_CONNECT_TIMEOUT', 20))
+READ_PREFERENCE = os.environ.get('ORCA_MONGO_READ_PREFERENCE', 'primaryPreferred')
+
+SNAPSHOT = os.environ.get('ORCA_SNAPSHOT',
+                          os.path.join(os.path.expanduser('~'), '.orca', 'snapshot.json'))
+
+logger = logbook.Logger('database')
+
+
+
+class ConnectionManager(object):
+    """Class to own MongoDB clients of the current process, one per (host, database, user).
+
+    :param int pool_size: Maximum number of connections in the pool of each client. Default: ``POOL_SIZE``
+    :param int socket_timeout: Number of seconds before a send or receive on a socket times out; None for no timeout. Default: ``SOCKET_TIMEOUT``
+    :param int connect_timeout: Number of seconds before a connection attempt times out. Default: ``CONNECT_TIMEOUT``
+    :param str read_preference: One of ('primary', 'primaryPreferred', 'secondary', 'secondaryPreferred', 'nearest'). Default: ``READ_PREFERENCE``
+
+    Defaults can also be set by environment variables ``ORCA_MONGO_POOL_SIZE``, ``ORCA_MONGO_SOCKET_TIMEOUT``,
+    ``ORCA_MONGO_CONNECT_TIMEOUT`` and ``ORCA_MONGO_READ_PREFERENCE``.
+    """
+
+    read_preferences = ('primary', 'primaryPreferred', 'secondary', 'secondaryPreferred', 'nearest')
+
+    def __init__(self, pool_size=POOL_SIZE, socket_timeout=SOCKET_TIMEOUT, connect_timeout=CONNECT_TIMEOUT,
+            read_preference=READ_PREFERENCE):
+        self._connections = {}
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self.options = {}
+        self.configure(pool_size=pool_size, socket_timeout=socket_timeout, connect_timeout=connect_timeout,
+                read_preference=read_preference)
+
+    def configure(self, **kwargs):
+        """Change options(see parameters of this class); clients already opened by this manager are closed."""
+        read_preference = kwargs.get('read_preference')
+        if read_preference is not None and read_preference not in ConnectionManager.read_preferences:
+            raise ValueError('No such read preference {0!r}'.format(read_preference))
+        self.options.update(kwargs)
+        self.close()
+
+    def client_options(self):
+        """Return keyword arguments for ``MongoClient``."""
+        options = {
+                'maxPoolSize': self.options['pool_size'],
+                'connectTimeoutMS': self.options['connect_timeout'] * 1000,
+                'readPreference': self.options['read_preference'],
+                }
+        if self.options['socket_timeout']:
+            options['socketTimeoutMS'] = self.options['socket_timeout'] * 1000
+        return options
+
+    def _check_pid(self):
+        """Forget clients inherited from the parent process; they share sockets with the parent and must not be used."""
+        pid = os.getpid()
+        if pid != self._pid:
+            self._connections, self._pid = {}, pid
+            self._lock = threading.Lock()
+
+    def connect(self, host=None, dbname=None, user=None, password=None):
+        """Connect to MongoDB if not yet connected in the current process.
+
+        :returns: tuple (client, database)
+        """
+        self._check_pid()
+        key = (host or HOST, dbname or DBNAME, user or USER, password or PASSWORD)
+        if key not in self._connections:
+            with self._lock:
+                if key not in self._connections:
+                    client = MongoClient(key[0], **self.client_options())
+                    db = client[key[1]]
+                    if key[2]:
+                        db.authenticate(key[2], key[3])
+                    self._connections[key] = client, db
+                    logger.debug('Connected to {}/{} in process {}', key[0], key[1], self._pid)
+        return self._connections[key]
+
+    def close(self, host=None, dbname=None, user=None, password=None):
+        """Close clients opened in the current process; when all parameters are None, close all of them."""
+        self._check_pid()
+        if host is dbname is user is password is None:
+            keys = self._connections.keys()
+        else:
+            keys = [(host or HOST, dbname or DBNAME, user or USER, password or PASSWORD)]
+        for key in keys:
+            if key in self._connections:
+                self._connections.pop(key)[0].close()
+
+    def reset(self):
+        """Forget all clients without closing them. Use it as initializer of ``multiprocessing.Pool``."""
+        self._connections, self._pid = {}, os.getpid()
+        self._lock = threading.Lock()
+
+
+manager = ConnectionManager()
+
+def connect(**kwargs):
+    """Shortcut of :py:meth:`ConnectionManager.connect` on :py:data:`manager`."""
+    return manager.connect(**kwargs)
+
+def reset():
+    """Shortcut of :py:meth:`ConnectionManager.reset` on :py:data:`manager`."""
+    manager.reset()
+
+_snapshot = None
+
+def read_snapshot():
+    """Return content of the snapshot file as a ``dict``; empty if it does not exist."""
+    global _snapshot
+    if _snapshot is None:
+        _snapshot = {}
+        if os.path.exists(SNAPSHOT):
+            try:
+                with open(SNAPSHOT) as file:
+                    _snapshot = json.load(file)
+            except ValueError:
+                logger.warning('Snapshot {} is corrupted and ignored', SNAPSHOT)
+    return _snapshot
+
+def write_snapshot(key, values):
+    """Save ``values`` under ``key`` in the snapshot file."""
+    snapshot = read_snapshot()
+    snapshot[key] = values
+    try:
+        dirname = os.path.dirname(SNAPSHOT)
+        if not os.path.exists(dirname):
+            os.makedirs(dirname)
+        fd, tmp = tempfile.mkstemp(dir=dirname, suffix='.tmp')
+        with os.fdopen(fd, 'w') as file:
+            json.dump(snapshot, file)
+        os.rename(tmp, SNAPSHOT)
+    except (IOError, OSError), e:
+        logger.warning('Failed to write snapshot {}: {}', SNAPSHOT, e)
+
+def resolve(key, loader):
+    """Resolve a list by calling ``loader``; the snapshot file is read only when ``loader`` raises ``PyMongoError``.
+
+    :param str key: Key in the snapshot file; when it is None, the snapshot file is not used
+    :param function loader: Function to load the list from MongoDB
+    """
+    if key is None:
+        return list(loader())
+    try:
+        values = list(loader())
+    except PyMongoError, e:
+        snapshot = read_snapshot()
+        if key not in snapshot:
+            raise
+        logger.warning('Failed to load {!r} from MongoDB({}), fall back to snapshot {}', key, e, SNAPSHOT)
+        return snapshot[key]
+    write_snapshot(key, values)
+    return values
+
+
+class LazySequence(object):
+    """Read-only list-like object that is resolved on first use.
+
+    :param function loader: Function to load the list
+    :param str key: Key in the snapshot file. Default: None
+    """
+
+    def __init__(self, loader, key=None):
+        self._loader = loader
+        self._key = key
+        self._values = None
+
+    def resolve(self):
+        """Return the underlying list."""
+        if self._values is None:
+            self._values = resolve(self._key, self._loader)
+        return self._values
+
+    def refresh(self):
+        """Discard the resolved list, so that it will be reloaded on next use."""
+        self._values = None
+
+    def __len__(self):
+        return len(self.resolve())
+
+    def __getitem__(self, key):
+        return self.resolve()[key]
+
+    def __getslice__(self, i, j):
+        return self.resolve()[i:j]
+
+    def __iter__(self):
+        return iter(self.resolve())
+
+    def __reversed__(self):
+        return reversed(self.resolve())
+
+    def __contains__(self, item):
+        return item in self.resolve()
+
+    def __add__(self, other):
+        return LazySequence(lambda: self.resolve() + list(other))
+
+    def __radd__(self, other):
+        return list(other) + self.resolve()
+
+    def __eq__(self, other):
+        return self.resolve() == list(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __array__(self, dtype=None):
+        return np.array(self.resolve(), dtype=dtype)
+
+    def __reduce__(self):
+        return (list, (self.resolve(),))
+
+    def __repr__(self):
+        return repr(self.resolve())
+
+    def index(self, item):
+        return self.resolve().index(item)
+
+    def count(self, item):
+        return self.resolve().count(item)
+
+
+class LazyClient(object):
+    """Proxy of ``MongoClient`` that connects on first use in each process.
+
+    Parameters are passed to :py:meth:`ConnectionManager.connect`.
+    """
+
+    def __init__(self, host=None, dbname=None, user=None, password=None):
+        self._key = dict(host=host, dbname=dbname, user=user, password=password)
+
+    def __getattr__(self, attr):
+        if attr.startswith('__') or attr == '_key':
+            raise AttributeError(attr)
+        return getattr(manager.connect(**self._key)[0], attr)
+
+    def __getitem__(self, key):
+        return manager.connect(**self._key)[0][key]
+
+    def close(self):
+        manager.close(**self._key)
+
+
+class LazyCollection(object):
+    """Proxy of a MongoDB collection that connects on first use in each process."""
+
+    def __init__(self, name, database=None):
+        self.name = name
+        self._key = {} if database is None else database._key
+        self.dbname = self._key.get('dbname') or DBNAME
+
+    def __getattr__(self, attr):
+        if attr.startswith('__') or attr in ('_key', 'dbname'):
+            raise AttributeError(attr)
+        return getattr(manager.connect(**self._key)[1][self.name], attr)
+
+    def __repr__(self):
+        return 'LazyCollection({!r})'.format(self.name)
+
+
+class LazyDatabase(object):
+    """Proxy of a MongoDB database that connects on first use in each process; collections are resolved into
+    :py:class:`LazyCollection`.
+
+    Parameters are passed to :py:meth:`ConnectionManager.connect`.
+    """
+
+    def __init__(self, host=None, dbname=None, user=None, password=None):
+        self._key = dict(host=host, dbname=dbname, user=user, password=password)
+        self.name = dbname or DBNAME
+
+    def __getattr__(self, attr):
+        if attr.startswith('__') or attr == '_key':
+            raise AttributeError(attr)
+        if attr.startswith('_') or hasattr(Database, attr):
+            return getattr(manager.connect(**self._key)[1], attr)
+        return LazyCollection(attr, self)
+
+    def __getitem__(self, key):
+        return LazyCollection(key, self)
+
+
+def lazy_distinct(collection, key):
+    """Lazy version of ``collection.distinct(key)``, with the result kept in the snapshot file under
+    ``'<database>.<collection>.<key>'``.
+
+    :param collection: A :py:class:`LazyCollection` or a ``pymongo`` collection; it is resolved in its own database
+    """
+    dbname = collection.dbname if isinstance(collection, LazyCollection) else collection.database.name
+    return LazySequence(lambda: collection.distinct(key), key='{}.{}.{}'.format(dbname, collection.name, key))
+
 
-mongo = MongoClient('192.168.1.183')
-db = mongo.stocks_dev
-db.authenticate('stocks_dev', 'stocks_dev')
+mongo = LazyClient()
+db = LazyDatabase()
 
-dates = db.dates.distinct('date')
-sids = db.sids.distinct('sid')
+dates = TradingCalendar(lazy_distinct(db.dates, 'date'))
+sids = lazy_distinct(db.sids, 'sid')
@@ -157,12 +157,12 @@ class IndicatorBase(object):
     @staticmethod
     def adjust_date(date, direction=-1):
         if date is not None:
-            return direction == -1 and dateutil.find_le(DATES, date)[1] or dateutil.find_ge(DATES, date)[1]
+            return DATES.locate(date, direction)[1]
         return date
 
     @staticmethod
     def fetch_history(df, date, n):
-        pdate = DATES[DATES.index(date)-n+1]
+        pdate = DATES.shift(date, -n+1)
         return df.query('date >= {!r} & date <= {!r}'.format(pdate, date))
 
     def upsert(self, date, value, market=None):
@@ -10,9 +10,14 @@ from orca import (
         DATES,
         SIDS,
         )
+from orca.database import lazy_distinct
 from orca.utils import dateutil
+from orca.utils.cube import Cube
 
-from base import KDayFetcher
+from base import (
+        KDayFetcher,
+        decode_frame,
+        )
 
 class BarraFetcher(KDayFetcher):
     """Base class for Barra model data fetchers.
@@ -104,7 +109,7 @@ class BarraSpecificsFetcher(BarraFetcher):
         'daily': DB.barra_D_specifics,
         'short': DB.barra_S_specifics,
         }
-    dnames = DB.barra_D_specifics.distinct('dname')
+    dnames = lazy_distinct(DB.barra_D_specifics, 'dname')
 
     def __init__(self, model, **kwargs):
         super(BarraSpecificsFetcher, self).__init__(model, **kwargs)
@@ -163,18 +168,61 @@ class BarraExposureFetcher(BarraFetcher):
         query = {'date': date}
         proj = {'_id': 0, 'dname': 1, 'dvalue': 1}
         cursor = self.collection.find(query, proj)
-        df = pd.DataFrame({row['dname']: row['dvalue'] for row in cursor})
+        df = decode_frame(cursor, key='dname', reindex=reindex).T
         del cursor
 
-        if reindex:
-            df = df.reindex(index=SIDS)
-
         if factor == 'industry':
             return df[BarraFetcher.industry_factors[self.model]]
         elif factor == 'style':
             return df[BarraFetcher.style_factors[self.model]]
         return df
 
+    def fetch_window_many(self, dnames, window, **kwargs):
+        """Same as :py:meth:`orca.mongo.base.KDayFetcher.fetch_window_many` except that ``dnames`` can also be
+        one of (None, 'industry', 'style') to fetch exposures to all/industry/style factors.
+        """
+        if dnames is None:
+            dnames = self.factors
+        elif dnames == 'industry':
+            dnames = BarraFetcher.industry_factors[self.model]
+        elif dnames == 'style':
+            dnames = BarraFetcher.style_factors[self.model]
+        return super(BarraExposureFetcher, self).fetch_window_many(dnames, window, **kwargs)
+
+    def fetch_dates(self, dname, dates, rshift=0, lshift=0, **kwargs):
+        """Same as :py:meth:`orca.mongo.base.KDayFetcher.fetch_dates` except that ``dname`` can also be one of
+        (None, 'industry', 'style') to fetch exposures to all/industry/style factors.
+
+        :returns: When ``dname`` is one of (None, 'industry', 'style'), a :py:class:`orca.utils.cube.Cube` with sids as
+           items, factors as major axis and items in ``dates`` as minor axis(when ``rshift+lshift == 0``), or a ``dict``
+           of Cubes with factors as items, trading dates as major axis and sids as minor axis
+        """
+        if dname is not None and dname not in ('industry', 'style'):
+            return super(BarraExposureFetcher, self).fetch_dates(dname, dates, rshift=rshift, lshift=lshift, **kwargs)
+
+        if dname is None:
+            factors = self.factors
+        elif dname == 'industry':
+            factors = BarraFetcher.industry_factors[self.model]
+        else:
+            factors = BarraFetcher.style_factors[self.model]
+        datetime_index = kwargs.get('datetime_index', self.datetime_index)
+        dates, offsets, window = self.locate_dates(dates, rshift, lshift)
+        kwargs['datetime_index'] = False
+        kwargs['reindex'] = True
+        if not dates:
+            return Cube(np.empty((len(SIDS), len(factors), 0)), SIDS, factors, []) if rshift+lshift == 0 else {}
+        sids = SIDS
+        if kwargs.get('sids') is not None:
+            sids = kwargs['sids'] = self.get_sids(kwargs['sids'], window)
+        values = self.fetch_window_many(factors, window, as_array=True, **kwargs)
+        if rshift+lshift == 0:
+            return Cube(values[:, offsets, :].transpose(2, 0, 1), sids, factors, dates)
+        if datetime_index:
+            window = pd.to_datetime(window)
+        return {dt: Cube(values[:, offset: offset+rshift+lshift+1, :], factors, window[offset: offset+rshift+lshift+1], sids)
+                for dt, offset in zip(dates, offsets)}
+
 
 class BarraFactorFetcher(BarraFetcher):
     """Class to fetch factor returns/covariance data."""
@@ -3,9 +3,14 @@
 """
 
 import abc
+from itertools import (
+        imap,
+        repeat,
+        )
+from multiprocessing.pool import ThreadPool
 
+import numpy as np
 import pandas as pd
-from pandas.tseries.index import DatetimeIndex
 
 import logbook
 logbook.set_datetime_format('local')
@@ -15,6 +20,148 @@ from orca import (
         SIDS,
         )
 from orca.utils import dateutil
+from orca.utils.cube import Cube
+
+from cache import get_cache
+
+FETCH_THREADS = 8
+
+def _call(args):
+    func, args, kwargs = (args + ({},))[:3]
+    return func(*args, **kwargs)
+
+def fetch_concurrently(calls, threads=FETCH_THREADS):
+    """Run independent fetches(which are I/O-bound) concurrently on a bounded thread pool.
+
+    :param list calls: Each item is a tuple ``(function, args[, kwargs])``, for example, ``(fetcher.fetch_window, (dname, window))``
+    :param int threads: Maximum number of concurrent requests; they share the connection pool of :py:data:`orca.database.manager`. Default: ``FETCH_THREADS``
+    :returns: list of results in the same order as ``calls``
+    """
+    calls = list(calls)
+    threads = min(threads, len(calls))
+    if threads <= 1:
+        return map(_call, calls)
+    pool = ThreadPool(threads)
+    try:
+        return pool.map(_call, calls)
+    finally:
+        pool.close()
+        pool.join()
+
+_sid_index = {}
+
+def get_sid_index(columns=None):
+    """Return a ``dict`` mapping each item in ``columns`` to its position.
+
+    :param list columns: Default: None, defaults to ``SIDS`` and the mapping is built only once
+    """
+    global _sid_index
+    if columns is not None:
+        return {sid: i for i, sid in enumerate(columns)}
+    if len(_sid_index) != len(SIDS):
+        _sid_index = {sid: i for i, sid in enumerate(SIDS)}
+    return _sid_index
+
+def decode_frame(rows, key='date', columns=None, reindex=False):
+    """Decode MongoDB documents with a ``dvalue`` dict into a DataFrame.
+
+    Each document becomes a row of a preallocated matrix, with ``dvalue`` keys mapped to fixed column positions;
+    thus there is no intermediate dict per document and no transposing. Rows are sorted by ``key``.
+
+    :param rows: Iterable of documents, for example, a MongoDB cursor
+    :param key: Field name, or a function of the document, to make the index of the returned DataFrame. Default: 'date'
+    :param list columns: Expected keys in ``dvalue``. Default: None, defaults to ``SIDS``
+    :param boolean reindex: Whether to keep all items in ``columns`` even if they never appear in ``dvalue``. Default: False
+    :returns: DataFrame of float64 type, or of object type when some values are not numeric
+    """
+    getkey = key if callable(key) else (lambda row: row[key])
+    rows = sorted(rows, key=getkey)
+    index = [getkey(row) for row in rows]
+    sid_index = get_sid_index(columns)
+    columns = list(SIDS if columns is None else columns)
+    ncols = len(columns)
+
+    values = np.empty((len(rows), ncols))
+    values.fill(np.nan)
+    present = np.zeros(ncols, dtype=bool)
+    extra = {}
+    last_keys, cols, mask = None, None, None
+    for i, row in enumerate(rows):
+        dvalue = row['dvalue']
+        keys = dvalue.keys()
+        if keys != last_keys:
+            cols = np.fromiter(imap(sid_index.get, keys, repeat(-1)), dtype=np.intp, count=len(keys))
+            mask = cols >= 0
+            present[cols[mask]] = True
+            last_keys = keys
+        try:
+            vals = np.array(dvalue.values(), dtype=values.dtype)
+        except (TypeError, ValueError):
+            values = values.astype(object)
+            vals = np.array(dvalue.values(), dtype=object)
+        if mask.all():
+            values[i, cols] = vals
+        else:
+            values[i, cols[mask]] = vals[mask]
+            for sid, val in zip(np.array(keys, dtype=object)[~mask], vals[~mask]):
+                extra.setdefault(sid, {})[index[i]] = val
+
+    df = pd.DataFrame(values, index=index, columns=columns, copy=False)
+    if not reindex and not present.all():
+        df = pd.DataFrame(values[:, present], index=index, columns=np.array(columns, dtype=object)[present])
+    if extra:
+        df = df.join(pd.DataFrame(extra))
+    return df
+
+def decode_cube(rows, dates, times, columns=None, reindex=False, dtype=np.float64):
+    """Decode MongoDB documents with ``date``, ``time`` and a ``dvalue`` dict into a dense 3-D array.
+
+    Like :py:func:`decode_frame`, each document is written into a preallocated array with ``dvalue`` keys mapped to
+    fixed positions. Documents with dates or times not in ``dates`` and ``times``, and keys not in ``columns`` are ignored.
+
+    :param list dates: Dates of the first axis
+    :param list times: Time stamps of the second axis
+    :param list columns: Expected keys in ``dvalue``. Default: None, defaults to ``SIDS``
+    :param boolean reindex: Whether to keep all items in ``columns`` even if they never appear in ``dvalue``. Default: False
+    :param dtype: Type of the values, for example, ``np.float32`` to save memory. Default: ``np.float64``
+    :returns: tuple (ndarray of shape ``(len(dates), len(times), len(columns))``, columns)
+    """
+    date_index = {date: i for i, date in enumerate(dates)}
+    time_index = {time: i for i, time in enumerate(times)}
+    sid_index = get_sid_index(columns)
+    columns = list(SIDS if columns is None else columns)
+    ncols = len(columns)
+
+    values = np.empty((len(dates), len(times), ncols), dtype=dtype)
+    values.fill(np.nan)
+    present = np.zeros(ncols, dtype=bool)
+    last_keys, cols, mask = None, None, None
+    for row in rows:
+        di, ti = date_index.get(row['date']), time_index.get(row['time'])
+        if di is None or ti is None:
+            continue
+        dvalue = row['dvalue']
+        keys = dvalue.keys()
+        if keys != last_keys:
+            cols = np.fromiter(imap(sid_index.get, keys, repeat(-1)), dtype=np.intp, count=len(keys))
+            mask = cols >= 0
+            present[cols[mask]] = True
+            last_keys = keys
+        try:
+            vals = np.array(dvalue.values(), dtype=values.dtype)
+        except (TypeError, ValueError):
+            values = values.astype(object)
+            vals = np.array(dvalue.values(), dtype=object)
+        if mask.all():
+            values[di, ti, cols] = vals
+        else:
+            values[di, ti, cols[mask]] = vals[mask]
+
+    if not reindex and not present.all():
+        values = values[:, :, present]
+        columns = [sid for sid, p in zip(columns, present) if p]
+    return values, columns
+
 
 class FetcherBase(object):
     """Base class for mongo fetchers.
@@ -68,6 +215,60 @@ class FetcherBase(object):
             return df.reindex(columns=SIDS, copy=False)
         return df
 
+    @staticmethod
+    def get_sids(sids, window):
+        """Resolve the ``sids`` argument of fetchers into a list of sids.
+
+        :param sids: List of sids, or an index name(for example, 'HS300') for all sids that are components of the index on some day in ``window``
+        :param list window: List of trading dates
+        """
+        if isinstance(sids, basestring):
+            from components import ComponentsFetcher
+            return ComponentsFetcher().fetch_members(sids, window)
+        return list(sids)
+
+    @staticmethod
+    def locate_dates(dates, rshift=0, lshift=0, compact=False):
+        """Locate windows ``[di-lshift, di+rshift]`` around each date in ``dates``, where ``di`` is the index of
+        the closest trading day on or before the date. Dates without a complete window are dropped.
+
+        :param boolean compact: When it is True, ``window`` only has trading days in some window; otherwise, it is
+           the consecutive span from the first window to the last. Default: False
+        :returns: tuple (dates, offsets, window); ``window`` covers all windows and ``offsets`` is an ndarray of
+           positions of their left endpoints in ``window``
+        """
+        dis = DATES.locate_many(dates, -1)
+        valid = (dis >= 0) & (dis-lshift >= 0) & (dis+rshift+1 <= len(DATES))
+        dates = [dt for dt, v in zip(dates, valid) if v]
+        if not dates:
+            return dates, np.array([], dtype=int), []
+        starts = dis[valid] - lshift
+        if compact:
+            positions = np.unique((starts[:, np.newaxis] + np.arange(rshift+lshift+1)).ravel())
+            return dates, np.searchsorted(positions, starts), [DATES[i] for i in positions]
+        first, last = starts.min(), starts.max() + lshift+rshift+1
+        return dates, starts-first, DATES[first: last]
+
+    @staticmethod
+    def make_date_query(window):
+        """Return query on ``date`` for trading dates in ``window``: a range if they are consecutive, otherwise ``$in``."""
+        if DATES.index(window[-1]) - DATES.index(window[0]) + 1 == len(window):
+            return {'$gte': window[0], '$lte': window[-1]}
+        return {'$in': list(window)}
+
+    @staticmethod
+    def make_projection(sids, *fields):
+        """Return projection for documents with ``dvalue``; when ``sids`` is not None, only these sids in ``dvalue`` will be projected."""
+        proj = {'_id': 0}
+        for field in fields:
+            proj[field] = 1
+        if sids is None:
+            proj['dvalue'] = 1
+        else:
+            for sid in sids:
+                proj['dvalue.'+sid] = 1
+        return proj
+
     @abc.abstractmethod
     def fetch(self, dname, startdate, enddate=None, backdays=0, **kwargs):
         """Override(**mandatory**) to fetch data within two endpoints.
@@ -186,34 +387,38 @@ class RecordFetcher(FetcherBase):
         return self.fetch_history(date, 1, delay=offset, **kwargs)
 
     def fetch_dates(self, dates, rshift=0, lshift=0, **kwargs):
-        """Use :py:meth:`fetch_window` behind the scene."""
-        dates_str = dateutil.to_datestr(dates)
-        res, is_df = {}, False
-        for dt, date in zip(dates, dates_str):
-            di, date = dateutil.parse_date(DATES, date, -1)
-            if di-lshift < 0 or di+rshift+1 > len(DATES):
-                continue
-            if rshift+lshift == 0:
-                res[dt] = self.fetch_daily(DATES[di-lshift], **kwargs)
-                if isinstance(res[dt], pd.DataFrame):
-                    is_df = True
-            else:
-                res[dt] = self.fetch_window(DATES[di-lshift: di+rshift+1], **kwargs)
-        if rshift+lshift == 0:
-            res = pd.Panel(res).transpose(1, 2, 0) if is_df else pd.DataFrame(res).T
-        return res
+        """Use :py:meth:`fetch_window` behind the scene, with only one query for the union of all windows.
+
+        :returns: ``dict`` of DataFrames(records within the window around each date) keyed by items in ``dates``
+        """
+        dates, offsets, window = self.locate_dates(dates, rshift, lshift)
+        if not dates:
+            return {}
+        df = self.fetch_window(window, **kwargs)
+        if not len(df):
+            return {dt: df for dt in dates}
+        pos = np.searchsorted(window, df['date'].values)
+        order = np.argsort(pos, kind='mergesort')
+        pos = pos[order]
+        df = df.iloc[order]
+        lefts = np.searchsorted(pos, offsets, side='left')
+        rights = np.searchsorted(pos, offsets+lshift+rshift+1, side='left')
+        return {dt: df.iloc[l:r] for dt, l, r in zip(dates, lefts, rights)}
 
 
 class KDayFetcher(FetcherBase):
     """Base class to fetch daily data that can be formatted as DataFrame.
 
+    :param cache: A :py:class:`orca.mongo.cache.KDayCache` object to serve :py:meth:`fetch_window` from local disk, or True to use the default one. Default: None
+
     .. note::
 
        This is a base class and should not be used directly.
     """
 
-    def __init__(self, **kwargs):
+    def __init__(self, cache=None, **kwargs):
         super(KDayFetcher, self).__init__(**kwargs)
+        self.cache = get_cache() if cache is True else cache
 
     def fetch(self, dname, startdate, enddate=None, backdays=0, **kwargs):
         """Use :py:meth:`fetch_window` behind the scene."""
@@ -226,19 +431,52 @@ class KDayFetcher(FetcherBase):
                 backdays=backdays)
         return self.fetch_window(dname, window, **kwargs)
 
+    def make_query(self, dname, window, **kwargs):
+        """Override to add extra conditions in the query issued by :py:meth:`fetch_window`."""
+        return {'dname': dname, 'date': {'$gte': window[0], '$lte': window[-1]}}
+
+    def fetch_frame(self, query, reindex=False, sids=None):
+        """Fetch a DataFrame with dates as index and sids as columns for ``query``.
+
+        :param boolean reindex: Whether to use full sids(or ``sids`` if it is not None) as columns. Default: False
+        :param list sids: Only fetch these sids. Default: None
+        """
+        proj = self.make_projection(sids, 'date')
+        cursor = self.collection.find(query, proj)
+        df = decode_frame(cursor, columns=sids, reindex=reindex)
+        del cursor
+        return df
+
     def fetch_window(self, dname, window, **kwargs):
         """Fetch data from a certain collection in MongoDB. For most cases, this is the **only** method that needs
         to be overridden.
+
+        One can provide a keyword argument ``cache`` to override :py:attr:`self.cache`; False to bypass the cache.
+
+        One can also provide a keyword argument ``sids``, a list of sids or an index name like 'HS300', to only fetch
+        these sids(only they are transferred from MongoDB); ``reindex`` then means to use all of ``sids`` as columns.
+
+        .. seealso:: :py:meth:`orca.mongo.base.FetcherBase.get_sids`
         """
         datetime_index = kwargs.get('datetime_index', self.datetime_index)
         reindex = kwargs.get('reindex', self.reindex)
-
-        query = {'dname': dname, 'date': {'$gte': window[0], '$lte': window[-1]}}
-        proj = {'_id': 0, 'dvalue': 1, 'date': 1}
-        cursor = self.collection.find(query, proj)
-        df = pd.DataFrame({row['date']: row['dvalue'] for row in cursor}).T
-        del cursor
-        return self.format(df, datetime_index, reindex)
+        cache = kwargs.get('cache', self.cache)
+        if cache is True:
+            cache = get_cache()
+        sids = kwargs.get('sids', None)
+        if sids is not None:
+            sids = self.get_sids(sids, window)
+
+        query = self.make_query(dname, window, **kwargs)
+        if cache:
+            df = cache.fetch(self, query, window)
+            if sids is not None:
+                df = df.reindex(columns=sids)
+            if not reindex:
+                df = df.dropna(axis=1, how='all')
+        else:
+            df = self.fetch_frame(query, reindex=reindex, sids=sids)
+        return self.format(df, datetime_index, reindex and sids is None)
 
     def fetch_history(self, dname, date, backdays, **kwargs):
         """Use :py:meth:`fetch_window` behind the scene."""
@@ -255,35 +493,120 @@ class KDayFetcher(FetcherBase):
         """Use :py:meth:`fetch_window` behind the scene."""
         return self.fetch_history(dname, date, 1, delay=offset, **kwargs).iloc[0]
 
-    def fetch_dates(self, dname, dates, rshift=0, lshift=0, **kwargs):
-        """Use :py:meth:`fetch_window` behind the scene."""
-        dates_str = dateutil.to_datestr(dates)
-        res, is_df = {}, False
-        for dt, date in zip(dates, dates_str):
-            di, date = dateutil.parse_date(DATES, date, -1)
-            if di-lshift < 0 or di+rshift+1 > len(DATES):
-                continue
-            if rshift+lshift == 0:
-                res[dt] = self.fetch_daily(dname, DATES[di-lshift], **kwargs)
-                if isinstance(res[dt], pd.DataFrame):
-                    is_df = True
+    def fetch_window_many(self, dnames, window, as_array=False, **kwargs):
+        """Fetch several data for the same consecutive trading days with a single query.
+
+        With a cache(see :py:meth:`fetch_window`), each data is served by the cache instead.
+
+        :param list dnames: Names of the data
+        :param list window: List of consecutive trading dates
+        :param boolean as_array: Whether to return a 3-D ndarray of shape ``(len(dnames), len(window), len(sids))``. Default: False
+        :returns: ``dict`` of DataFrames keyed by data names, or ndarray
+
+        Keyword argument ``sids`` is supported as in :py:meth:`fetch_window`.
+        """
+        datetime_index = kwargs.get('datetime_index', self.datetime_index)
+        reindex = kwargs.get('reindex', self.reindex)
+        cache = kwargs.get('cache', self.cache)
+        sids = kwargs.get('sids', None)
+        if sids is not None:
+            sids = kwargs['sids'] = self.get_sids(sids, window)
+
+        if cache:
+            res = {dname: self.fetch_window(dname, window, **kwargs) for dname in dnames}
+        else:
+            names = [self.make_query(dname, window, **kwargs)['dname'] for dname in dnames]
+            query = self.make_query(dnames[0], window, **kwargs)
+            query['dname'] = {'$in': names}
+            proj = self.make_projection(sids, 'date', 'dname')
+            rows = {}
+            for row in self.collection.find(query, proj):
+                rows.setdefault(row['dname'], []).append(row)
+            res = {}
+            for dname, name in zip(dnames, names):
+                df = decode_frame(rows.get(name, []), columns=sids, reindex=reindex or as_array)
+                res[dname] = self.format(df, datetime_index, reindex and sids is None)
+
+        if not as_array:
+            return res
+        columns = SIDS if sids is None else sids
+        values = np.empty((len(dnames), len(window), len(columns)))
+        for i, dname in enumerate(dnames):
+            df = res[dname]
+            if datetime_index:
+                df = df.reindex(index=pd.to_datetime(window), columns=columns)
             else:
-                res[dt] = self.fetch_window(dname, DATES[di-lshift: di+rshift+1], **kwargs)
+                df = df.reindex(index=window, columns=columns)
+            values[i] = df.values
+        return values
+
+    def fetch_many(self, dnames, startdate, enddate=None, backdays=0, **kwargs):
+        """Use :py:meth:`fetch_window_many` behind the scene."""
+        date_check = kwargs.get('date_check', self.date_check)
+
+        window = dateutil.cut_window(
+                DATES,
+                dateutil.compliment_datestring(str(startdate), -1, date_check),
+                dateutil.compliment_datestring(str(enddate), 1, date_check) if enddate is not None else None,
+                backdays=backdays)
+        return self.fetch_window_many(dnames, window, **kwargs)
+
+    def fetch_history_many(self, dnames, date, backdays, **kwargs):
+        """Use :py:meth:`fetch_window_many` behind the scene."""
+        date_check = kwargs.get('date_check', self.date_check)
+        delay = kwargs.get('delay', self.delay)
+
+        date = dateutil.compliment_datestring(str(date), -1, date_check)
+        di, date = dateutil.parse_date(DATES, date, -1)
+        di -= delay
+        window = DATES[di-backdays+1: di+1]
+        return self.fetch_window_many(dnames, window, **kwargs)
+
+    def fetch_dates(self, dname, dates, rshift=0, lshift=0, **kwargs):
+        """Use :py:meth:`fetch_window` behind the scene, with only one query for the union of all windows.
+
+        :returns: DataFrame with items in ``dates`` as index(when ``rshift+lshift == 0``), or ``dict`` of
+           DataFrames(data within the window around each date) keyed by items in ``dates``
+        """
+        datetime_index = kwargs.get('datetime_index', self.datetime_index)
+        dates, offsets, window = self.locate_dates(dates, rshift, lshift)
+        kwargs['datetime_index'] = False
+        df = self.fetch_window(dname, window, **kwargs) if dates else pd.DataFrame()
+        return self.slice_dates(df.reindex(index=window), dates, offsets, rshift, lshift, datetime_index=datetime_index)
+
+    @staticmethod
+    def slice_dates(df, dates, offsets, rshift, lshift, datetime_index=False):
+        """Slice windows starting at ``offsets`` out of ``df``, which has trading dates(strings) as index.
+
+        :param boolean datetime_index: Whether to convert index of each window into DatetimeIndex. Default: False
+        """
         if rshift+lshift == 0:
-            res = pd.Panel(res).transpose(1, 2, 0) if is_df else pd.DataFrame(res).T
+            return pd.DataFrame(df.values[offsets], index=dates, columns=df.columns)
+        n = rshift+lshift+1
+        res = {}
+        for dt, offset in zip(dates, offsets):
+            index = df.index[offset: offset+n]
+            res[dt] = pd.DataFrame(df.values[offset: offset+n], columns=df.columns,
+                                   index=pd.to_datetime(index) if datetime_index else index)
         return res
 
 
 class KMinFetcher(FetcherBase):
     """Base class to fetch minute-bar interval data.
 
+    Data are decoded into a dense ``(dates, times, sids)`` array, and returned as :py:class:`orca.utils.cube.Cube`
+    (with ``times`` as the item-axis) backed by it; slices by time or by date are views of the array.
+
+    :param dtype: Type of the values, for example, ``np.float32`` to save memory. Default: ``np.float64``
+
     .. note::
 
        This is a base class and should not be used directly.
     """
 
-    def __init__(self, **kwargs):
+    def __init__(self, dtype=np.float64, **kwargs):
         super(KMinFetcher, self).__init__(**kwargs)
+        self.dtype = dtype
 
     def fetch(self, dname, times, startdate, enddate=None, backdays=0, **kwargs):
         """Use :py:meth:`fetch_window` behind the scene."""
@@ -302,33 +625,34 @@ class KMinFetcher(FetcherBase):
         :param times: Time stamps to indicate which minute-bars should be fetched. This will affect the returned data type; when it is ``[]``, it defaults to fetch all times
         :type times: str, list
         :param boolean as_frame: Only use this when ``times`` is a list. Default: False
-        :returns: DataFrame(if ``type(times)`` is ``str``) or Panel(with ``times`` as the item-axis)
+        :returns: DataFrame(if ``type(times)`` is ``str``) or :py:class:`orca.utils.cube.Cube`(with ``times`` as the item-axis)
+
+        Keyword argument ``sids`` is supported as in :py:meth:`orca.mongo.base.KDayFetcher.fetch_window`; ``dtype``
+        overrides :py:attr:`self.dtype`.
         """
         datetime_index = kwargs.get('datetime_index', self.datetime_index)
         reindex = kwargs.get('reindex', self.reindex)
+        dtype = kwargs.get('dtype', self.dtype)
+        sids = kwargs.get('sids', None)
+        if sids is not None:
+            sids = self.get_sids(sids, window)
 
         query = {'dname': dname,
-                 'date': {'$gte': window[0], '$lte': window[-1]},
+                 'date': self.make_date_query(window),
                  }
         if not times:
             times = self.intervals
-        query.update({'time': {'$in': [times] if isinstance(times, str) else times}})
-        proj = {'_id': 0, 'dvalue': 1, 'date': 1, 'time': 1}
+        _times = [times] if isinstance(times, str) else list(times)
+        query.update({'time': {'$in': _times}})
+        proj = self.make_projection(sids, 'date', 'time')
         cursor = self.collection.find(query, proj)
-        dfs = pd.DataFrame({(row['date'], row['time']): row['dvalue'] for row in cursor}).T
+        values, columns = decode_cube(cursor, window, _times, columns=sids, reindex=reindex, dtype=dtype)
         del cursor
-        dfs.index.names = ['date', 'time']
-        panel = dfs.to_panel().transpose(2, 1, 0)
-        if datetime_index:
-            panel.major_axis = pd.to_datetime(panel.major_axis)
-            if reindex:
-                panel = panel.reindex(minor_axis=SIDS, copy=False)
-        elif reindex:
-            panel = panel.reindex(minor_axis=SIDS)
+        cube = Cube(values.transpose(1, 0, 2), _times, pd.to_datetime(window) if datetime_index else window, columns)
 
         if isinstance(times, str):
-            return panel[times]
-        return self.to_frame(panel) if as_frame else panel
+            return cube[times]
+        return self.to_frame(cube) if as_frame else cube
 
     def fetch_history(self, dname, times, date, backdays, **kwargs):
         """Use :py:meth:`fetch_window` behind the scene."""
@@ -352,14 +676,14 @@ class KMinFetcher(FetcherBase):
         return res if as_frame else res.major_xs(res.major_axis[0]).T
 
     @staticmethod
-    def to_frame(panel):
-        """Transform a time-itemized, date-major_axised Panel into DataFrame with DatetimeIndex."""
-        if isinstance(panel.major_axis, DatetimeIndex):
-            panel.major_axis = dateutil.to_datestr(panel.major_axis)
-        df = panel.transpose(2, 1, 0).to_frame(filter_observations=False)
-        df.index = pd.to_datetime(pd.Series(df.index.get_level_values(0)) + ' ' + \
-                                  pd.Series(df.index.get_level_values(1)))
-        return df
+    def to_frame(cube):
+        """Transform a time-itemized, date-major_axised Cube(or Panel) into DataFrame with DatetimeIndex.
+
+        When the cube is returned by :py:meth:`fetch_window`, values of the DataFrame are a view of the cube.
+        """
+        values = cube.values.transpose(1, 0, 2)
+        index = dateutil.combine_datetime(cube.major_axis, cube.items, outer=True)
+        return pd.DataFrame(values.reshape(-1, values.shape[2]), index=index, columns=cube.minor_axis, copy=False)
 
     def generate_dateintervals(self, date, time, num, offset=0):
         """Generate an ordered list of (date, time) tuple."""
@@ -398,42 +722,54 @@ class KMinFetcher(FetcherBase):
         """
         date_check = kwargs.get('date_check', self.date_check)
         reindex = kwargs.get('reindex', self.reindex)
+        dtype = kwargs.get('dtype', self.dtype)
 
         date = dateutil.compliment_datestring(str(date), -1, date_check)
         date = dateutil.parse_date(DATES, date, -1)[1]
 
         dateintervals = self.generate_dateintervals(date, time, num=1 if num is None else num, offset=offset)
-        dateindex = pd.to_datetime([dis[0]+' '+dis[1] for dis in dateintervals])
-        window = [dis[0] for dis in dateintervals]
+        dates, times = zip(*dateintervals)
+        window = DATES[DATES.index(dates[0]): DATES.index(dates[-1])+1]
 
         query = {'dname': dname,
                  'date': {'$gte': window[0], '$lte': window[-1]},
                  }
-        proj = {'_id': 0, 'dvalue': 1, 'date': 1, 'time': 1}
+        proj = self.make_projection(None, 'date', 'time')
         cursor = self.collection.find(query, proj)
-        df = pd.DataFrame({row['date']+' '+row['time']: row['dvalue'] for row in cursor}).T
+        values, columns = decode_cube(cursor, window, self.intervals, reindex=reindex, dtype=dtype)
         del cursor
-        df.index = pd.to_datetime(df.index)
-        df = df.ix[dateindex]
-        if reindex:
-            df = df.reindex(columns=SIDS)
+        date_index = {d: i for i, d in enumerate(window)}
+        time_index = {t: i for i, t in enumerate(self.intervals)}
+        pos = [date_index[d]*len(self.intervals)+time_index[t] for d, t in dateintervals]
+        df = pd.DataFrame(values.reshape(-1, len(columns))[pos],
+                          index=dateutil.combine_datetime(dates, times), columns=columns)
         return df.iloc[0] if num is None else df
 
     def fetch_dates(self, dname, times, dates, rshift=0, lshift=0, **kwargs):
-        """Use :py:meth:`fetch_window` behind the scene."""
-        dates_str = dateutil.to_datestr(dates)
-        res, is_df = {}, False
-        for dt, date in zip(dates, dates_str):
-            di, date = dateutil.parse_date(DATES, date, -1)
-            if di-lshift < 0 or di+rshift+1 > len(DATES):
-                continue
-            if rshift+lshift == 0:
-                res[dt] = self.fetch_daily(dname, times, DATES[di-lshift], **kwargs)
-                if isinstance(res[dt], pd.DataFrame):
-                    is_df = True
-            else:
-                res[dt] = self.fetch_window(dname, times, DATES[di-lshift: di+rshift+1], **kwargs)
+        """Use :py:meth:`fetch_window` behind the scene, with only one query for trading days in all windows.
 
+        :returns: When ``times`` is a string, the same as :py:meth:`orca.mongo.base.KDayFetcher.fetch_dates`; otherwise
+           a :py:class:`orca.utils.cube.Cube` with ``times`` as items, sids as major axis and items in ``dates`` as
+           minor axis(when ``rshift+lshift == 0``), or a ``dict`` of Cubes like what :py:meth:`fetch_window` returns
+           keyed by items in ``dates``
+        """
+        datetime_index = kwargs.get('datetime_index', self.datetime_index)
+        dates, offsets, window = self.locate_dates(dates, rshift, lshift, compact=True)
+        kwargs['datetime_index'] = False
+        if isinstance(times, str):
+            df = self.fetch_window(dname, times, window, **kwargs) if dates else pd.DataFrame()
+            return KDayFetcher.slice_dates(df.reindex(index=window), dates, offsets, rshift, lshift,
+                                           datetime_index=datetime_index)
+
+        if not times:
+            times = self.intervals
+        if not dates:
+            return Cube(np.empty((len(times), 0, 0)), times, [], []) if rshift+lshift == 0 else {}
+        cube = self.fetch_window(dname, times, window, **kwargs).reindex(items=times, major_axis=window)
+        values, sids = cube.values, cube.minor_axis
         if rshift+lshift == 0:
-            res = pd.Panel(res).transpose(1, 2, 0) if is_df else pd.DataFrame(res).T
-        return res
+            return Cube(values[:, offsets, :].transpose(0, 2, 1), times, sids, dates)
+        if datetime_index:
+            window = pd.to_datetime(window)
+        return {dt: Cube(values[:, offset: offset+rshift+lshift+1, :], times, window[offset: offset+rshift+lshift+1], sids)
+                for dt, offset in zip(dates, offsets)}
@@ -0,0 +1,288 @@
+"""
+.. moduleauthor:: Li, Wang <wangziqi@foreseefund.com>
+"""
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+import logbook
+logbook.set_datetime_format('local')
+
+from orca import SIDS
+
+DEFAULT_ROOT = os.environ.get('ORCA_CACHE_DIR',
+                              os.path.join(os.path.expanduser('~'), '.orca', 'cache'))
+
+
+class KDayCache(object):
+    """Class to cache daily data on local disk for :py:class:`orca.mongo.base.KDayFetcher`.
+
+    Data are organized into namespaces, one per (collection, query) pair, for example
+    ``quote/dname=close`` or ``industry/dname=level1/standard=SW2014``. Within a namespace, days of each year are
+    stored as rows of one ``<year>.npy`` block, with dates of the rows in ``<year>.index.npy``. Columns of blocks
+    are sids in ``sids.npy``, which only grows: a sid new to ``SIDS`` is appended to it, and a block written
+    before that has only the leading columns. Blocks are mapped onto current ``SIDS`` when they are read or
+    rewritten, with ``NaN`` for sids they do not have. Blocks are opened as memory-mapped arrays, so that a window of consecutive days within
+    a year is served as a view of the block; windows across years are concatenated. Missing days are fetched from
+    MongoDB in a single query and appended to the blocks.
+
+    :param str root: Root directory of the cache. Default: environment variable ``ORCA_CACHE_DIR`` or ``~/.orca/cache``
+
+    .. note::
+
+       A trading day without data in MongoDB is remembered as an empty day only if some later day in
+       the same query has data; otherwise it is refetched next time, since the data may simply be not
+       updated yet.
+    """
+
+    LOGGER_NAME = 'cache'
+    #: Type of rows in ``<year>.index.npy``
+    INDEX_DTYPE = np.dtype([('date', 'S8'), ('row', np.int64), ('empty', bool)])
+
+    def __init__(self, root=None):
+        self.root = root or DEFAULT_ROOT
+        self.logger = logbook.Logger(KDayCache.LOGGER_NAME)
+        self._sids = {}
+
+    @staticmethod
+    def get_namespace(collection, query):
+        """Return the relative directory of the namespace for ``query`` on ``collection``."""
+        if not isinstance(collection, basestring):
+            collection = collection.name
+        parts = [collection]
+        for k, v in sorted(query.iteritems()):
+            if k == 'date':
+                continue
+            parts.append('{}={}'.format(k, str(v).replace(os.sep, '_')))
+        return os.path.join(*parts)
+
+    def get_path(self, collection, query):
+        return os.path.join(self.root, self.get_namespace(collection, query))
+
+    @staticmethod
+    def _block(path, year):
+        return os.path.join(path, year+'.npy')
+
+    @staticmethod
+    def _index(path, year):
+        return os.path.join(path, year+'.index.npy')
+
+    @staticmethod
+    def _save(fpath, arr):
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(fpath), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as file:
+            np.save(file, arr)
+        os.rename(tmp, fpath)
+
+    @staticmethod
+    def _by_year(dates):
+        years = {}
+        for date in dates:
+            years.setdefault(date[:4], []).append(date)
+        return sorted(years.iteritems())
+
+    def read_index(self, path, year):
+        """Return a ``dict`` of date -> (row, empty) of days of ``year`` stored in ``path``."""
+        fpath = self._index(path, year)
+        if not os.path.exists(fpath):
+            return {}
+        return {str(date): (int(row), bool(empty)) for date, row, empty in np.load(fpath)}
+
+    def _save_index(self, path, year, index):
+        entries = sorted((row, date, empty) for date, (row, empty) in index.iteritems())
+        self._save(self._index(path, year),
+                   np.array([(date, row, empty) for row, date, empty in entries], dtype=KDayCache.INDEX_DTYPE))
+
+    def missing_dates(self, path, window):
+        """Return dates in ``window`` that are not stored in ``path``."""
+        missing = []
+        for year, dates in self._by_year(window):
+            index = self.read_index(path, year)
+            missing.extend(date for date in dates if date not in index)
+        return sorted(missing)
+
+    def _check_sids(self, path):
+        """Return columns of blocks under ``path``, with sids in ``SIDS`` but not yet in ``sids.npy`` appended."""
+        if path in self._sids:
+            return self._sids[path]
+        if not os.path.exists(path):
+            os.makedirs(path)
+        fpath = os.path.join(path, 'sids.npy')
+        sids = [str(sid) for sid in np.load(fpath)] if os.path.exists(fpath) else []
+        saved = set(sids)
+        new = [sid for sid in SIDS if sid not in saved]
+        if new:
+            # blocks written before keep their columns, as the leading ones of the extended list
+            sids.extend(new)
+            self._save(fpath, np.array(sids))
+            if saved:
+                self.logger.info('Added {} sids to {}', len(new), path)
+        self._sids[path] = sids
+        return sids
+
+    @staticmethod
+    def _fill(dtype):
+        return u'' if dtype.kind == 'U' else np.nan
+
+    @classmethod
+    def _align(cls, block, columns, sids):
+        """Map ``block`` with ``columns`` onto ``sids``; sids not in ``columns`` become ``NaN``(or ``u''``)."""
+        if len(columns) == len(sids) and columns == sids:
+            return block
+        indexer = pd.Index(columns).get_indexer(sids)
+        res = block[:, indexer]
+        res[:, indexer == -1] = cls._fill(block.dtype)
+        return res
+
+    @staticmethod
+    def _merge_types(block, values):
+        """Convert ``block`` and ``values`` into one type; strings win over numbers, with ``NaN`` as ``u''``."""
+        def to_unicode(arr):
+            if arr.dtype.kind == 'U':
+                return arr
+            return np.where(np.isnan(arr), u'', arr.astype(unicode))
+        if block.dtype.kind == 'U' or values.dtype.kind == 'U':
+            block, values = to_unicode(block), to_unicode(values)
+            dtype = max([block.dtype, values.dtype], key=lambda dtype: dtype.itemsize)
+            return block.astype(dtype), values.astype(dtype)
+        return block, values
+
+    def store(self, path, df, dates):
+        """Store rows of ``df`` on ``dates`` into blocks in ``path``."""
+        sids = self._check_sids(path)
+        df = df.reindex(columns=sids)
+        values = df.values
+        if values.dtype.kind in 'biuf':
+            values = values.astype(np.float64)
+        else:
+            mask = pd.isnull(values)
+            if all(isinstance(v, (int, long, float)) for v in values[~mask]):
+                values = values.astype(np.float64)
+            else:
+                values = np.where(mask, u'', values).astype(unicode)
+        loc = {date: i for i, date in enumerate(df.index)}
+        last = df.index[-1] if len(df) else None
+
+        for year, ydates in self._by_year(dates):
+            stored = [date for date in ydates if date in loc or last is not None and date < last]
+            if not stored:
+                continue
+            index = self.read_index(path, year)
+            if index:
+                nrows = max(row for row, _ in index.itervalues()) + 1
+                block = np.load(self._block(path, year))[:nrows]
+                if block.shape[1] < len(sids):
+                    block = self._align(block, sids[:block.shape[1]], sids)
+            else:
+                nrows, block = 0, np.empty((0, len(sids)), dtype=values.dtype)
+            block, yvalues = self._merge_types(block, values)
+
+            new = []
+            for date in stored:
+                row = yvalues[loc[date]] if date in loc else self._fill(yvalues.dtype)
+                if date in index:
+                    block[index[date][0]] = row
+                else:
+                    index[date] = (nrows+len(new), False)
+                    new.append(row)
+                index[date] = (index[date][0], date not in loc)
+            if new:
+                rows = np.empty((len(new), len(sids)), dtype=block.dtype)
+                for i, row in enumerate(new):
+                    rows[i] = row
+                block = np.vstack([block, rows])
+            # values first, then the index; a stale index only refers to rows that are unchanged
+            self._save(self._block(path, year), block)
+            self._save_index(path, year, index)
+
+    def load(self, path, window):
+        """Load days in ``window`` stored in ``path`` into a DataFrame with full sids as columns.
+
+        Days of one year are sliced out of the memory-mapped block, without copy when they are consecutive rows
+        and columns of the block are exactly current ``SIDS``.
+        """
+        sids, columns = list(SIDS), self._check_sids(path)
+        dates, parts = [], []
+        for year, ydates in self._by_year(window):
+            index = self.read_index(path, year)
+            ydates = [date for date in ydates if date in index and not index[date][1]]
+            if not ydates:
+                continue
+            block = np.load(self._block(path, year), mmap_mode='r')
+            rows = np.array([index[date][0] for date in ydates])
+            if (np.diff(rows) == 1).all():
+                part = block[rows[0]: rows[-1]+1]
+            else:
+                part = block[rows]
+            parts.append(self._align(part, columns[:block.shape[1]], sids))
+            dates.extend(ydates)
+        if not parts:
+            return pd.DataFrame(columns=sids)
+        kinds = set(part.dtype.kind for part in parts)
+        if len(kinds) > 1:
+            parts = [part if part.dtype.kind == 'U' else np.where(np.isnan(part), u'', part.astype(unicode))
+                     for part in parts]
+        values = parts[0] if len(parts) == 1 else np.vstack(parts)
+        if values.dtype.kind in 'SU':
+            values = values.astype(object)
+            values[values == u''] = np.nan
+        return pd.DataFrame(values, index=dates, columns=sids, copy=False)
+
+    def fetch(self, fetcher, query, window):
+        """Fetch data for ``query`` on ``window``, with only missing dates fetched from MongoDB.
+
+        :param fetcher: A :py:class:`orca.mongo.base.KDayFetcher` object
+        :param dict query: MongoDB query returned by ``fetcher.make_query``
+        """
+        path = self.get_path(fetcher.collection, query)
+        self._check_sids(path)
+
+        missing = self.missing_dates(path, window)
+        if missing:
+            query = dict(query)
+            query['date'] = {'$gte': missing[0], '$lte': missing[-1]}
+            self.store(path, fetcher.fetch_frame(query, reindex=True), missing)
+            self.logger.debug('Cached {} dates in {}', len(missing), path)
+        return self.load(path, window)
+
+    def invalidate(self, collection=None, dname=None, dates=None, **query):
+        """Remove cached data.
+
+        :param collection: Collection name or object; when it is None, the whole cache is cleared. Default: None
+        :param str dname: When it is None, all data in ``collection`` are cleared. Default: None
+        :param list dates: When it is None, the whole namespace is cleared. Default: None
+        :param query: Other fields in the query to locate the namespace, for example, ``standard='SW2014'``
+        """
+        if dname is not None:
+            query['dname'] = dname
+        path = self.root if collection is None else self.get_path(collection, query)
+        if not os.path.exists(path):
+            return
+        if dates is None:
+            shutil.rmtree(path)
+            self._sids = {p: sids for p, sids in self._sids.iteritems() if not p.startswith(path)}
+        else:
+            for year, ydates in self._by_year(dates):
+                index = self.read_index(path, year)
+                for date in ydates:
+                    index.pop(date, None)
+                if index:
+                    self._save_index(path, year, index)
+                else:
+                    for fpath in (self._index(path, year), self._block(path, year)):
+                        if os.path.exists(fpath):
+                            os.remove(fpath)
+        self.logger.info('Invalidated {}', path)
+
+
+_cache = None
+
+def get_cache():
+    """Return the default :py:class:`KDayCache` object."""
+    global _cache
+    if _cache is None:
+        _cache = KDayCache()
+    return _cache
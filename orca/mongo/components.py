@@ -3,6 +3,7 @@
 """
 
 from orca import DB
+from orca.database import lazy_distinct
 from base import KDayFetcher
 
 
@@ -22,7 +23,7 @@ class ComponentsFetcher(KDayFetcher):
             'JCA': 'SZ399317',
             }
 
-    dnames = DB.index_components.distinct('dname')
+    dnames = lazy_distinct(DB.index_components, 'dname')
 
     def __init__(self, as_bool=True, **kwargs):
         self.collection = DB.index_components
@@ -38,3 +39,11 @@ class ComponentsFetcher(KDayFetcher):
         if as_bool:
             return df.notnull()
         return df
+
+    def fetch_members(self, dname, window):
+        """Fetch sids that are components of the index on some day in ``window``.
+
+        :returns: list
+        """
+        df = self.fetch_window(dname, window, as_bool=True, reindex=False)
+        return list(df.columns[df.any()])
@@ -5,6 +5,7 @@
 import pandas as pd
 
 from orca import DB
+from orca.database import lazy_distinct
 from orca.utils import dateutil
 
 from base import KDayFetcher
@@ -24,7 +25,7 @@ class IFIntervalFetcher(KDayFetcher):
             '5min': dateutil.generate_intervals(5*60, begin='091500', end='151500'),
             '1min': dateutil.generate_intervals(1*60, begin='091500', end='151500'),
             }
-    dnames = DB.IF_5min.distinct('dname')
+    dnames = lazy_distinct(DB.IF_5min, 'dname')
     freqs = ('30min', '5min', '1min')
 
     def __init__(self, freq, **kwargs):
@@ -2,6 +2,7 @@
 .. moduleauthor:: Li, Wang <wangziqi@foreseefund.com>
 """
 
+import numpy as np
 import pandas as pd
 
 from orca import (
@@ -10,7 +11,11 @@ from orca import (
         )
 from orca.utils import dateutil
 
-from base import KDayFetcher
+from base import (
+        KDayFetcher,
+        decode_frame,
+        )
+from interval import IntervalReturnsFetcher
 
 
 class IndexQuoteFetcher(KDayFetcher):
@@ -60,6 +65,21 @@ class IndexQuoteFetcher(KDayFetcher):
             df.index = pd.to_datetime(df.index)
         return df[dname]
 
+    def fetch_window_many(self, dnames, window, as_array=False, index=None, **kwargs):
+        """Fetch several quote items with a single query; quote items are fields of the same document.
+
+        :param list dnames: Data names; None to fetch all daily quote items
+        :param str index: Index name
+        :param boolean as_array: Whether to return a 2-D ndarray of shape ``(len(dnames), len(dates))``. Default: False
+        :returns: ``dict`` of Series keyed by data names, or ndarray
+        """
+        if dnames is None:
+            dnames = IndexQuoteFetcher.dnames
+        df = self.fetch_window(list(dnames), window, index=index, **kwargs)
+        if as_array:
+            return df.values.T.astype(float)
+        return {dname: df[dname] for dname in dnames}
+
 
 class IndexIntervalFetcher(KDayFetcher):
     """Class to fetch TinySoft index minute-bar data.
@@ -127,10 +147,13 @@ class IndexIntervalFetcher(KDayFetcher):
         for d in _dname:
             proj.update({d: 1})
         cursor = self.collection.find(query, proj)
-        df = pd.DataFrame(list(cursor))
+        rows = sorted(cursor, key=lambda row: (row['date'], row['time']))
         del cursor
-        df.index = pd.to_datetime(df.date + ' ' + df.time)
-        df = df[_dname]
+        index = dateutil.combine_datetime([row['date'] for row in rows], [row['time'] for row in rows])
+        values = np.empty((len(rows), len(_dname)))
+        for i, d in enumerate(_dname):
+            values[:, i] = np.array([row.get(d) for row in rows], dtype=float)
+        df = pd.DataFrame(values, index=index, columns=_dname)
         return df[dname] if isinstance(dname, str) else df
 
     def fetch_daily(self, dname, date, offset=0, **kwargs):
@@ -213,11 +236,10 @@ class IndexIntervalReturnsFetcher(KDayFetcher):
         query = {'index': index, 'dname': dname, 'date': {'$gte': window[0], '$lte': window[-1]}}
         proj = {'_id': 0, 'date': 1, 'dvalue': 1}
         cursor = self.collection.find(query, proj)
-        df = pd.DataFrame({row['date']: row['dvalue'] for row in cursor})
+        times = IntervalReturnsFetcher.intervals[dname[7:]+'min']
+        df = decode_frame(cursor, columns=times)
         del cursor
-        s = df.unstack()
-        s.index = pd.to_datetime(pd.Series(s.index.get_level_values(0)) + ' ' + \
-                                 pd.Series(s.index.get_level_values(1)))
+        s = pd.Series(df.values.ravel(), index=dateutil.combine_datetime(df.index, df.columns, outer=True))
         return s.sort_index()
 
     def fetch_history(self, *args, **kwargs):
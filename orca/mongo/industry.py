@@ -2,8 +2,6 @@
 .. moduleauthor:: Li, Wang <wangziqi@foreseefund.com>
 """
 
-import pandas as pd
-
 from orca import (
         DB,
         DATES,
@@ -31,19 +29,12 @@ class IndustryFetcher(KDayFetcher):
         self.info = DB.industry_info
         super(IndustryFetcher, self).__init__(**kwargs)
 
-    def fetch_window(self, dname, window, **kwargs):
+    def make_query(self, dname, window, **kwargs):
         """By supplying ``standard`` as a keyword argument, one can override the default setting."""
         dname = self.name_dname.get(dname, dname)
-        standard = kwargs.get('standard', self.standard)
-        datetime_index = kwargs.get('datetime_index', self.datetime_index)
-        reindex = kwargs.get('reindex', self.reindex)
-
-        query = {'standard': standard, 'dname': dname, 'date': {'$gte': window[0], '$lte': window[-1]}}
-        proj = {'_id': 0, 'dvalue': 1, 'date': 1}
-        cursor = self.collection.find(query, proj)
-        df = pd.DataFrame({row['date']: row['dvalue'] for row in cursor}).T
-        del cursor
-        return self.format(df, datetime_index, reindex)
+        query = super(IndustryFetcher, self).make_query(dname, window, **kwargs)
+        query['standard'] = kwargs.get('standard', self.standard)
+        return query
 
     def fetch_daily(self, dname, date=None, **kwargs):
         if date is None:
@@ -3,6 +3,7 @@
 """
 
 from orca import DB
+from orca.database import lazy_distinct
 from orca.utils import dateutil
 
 from base import KMinFetcher
@@ -24,7 +25,7 @@ class IntervalFetcher(KMinFetcher):
             '5min': dateutil.generate_intervals(300),
             '1min': dateutil.generate_intervals(60),
             }
-    dnames = DB.ts_30min.distinct('dname')
+    dnames = lazy_distinct(DB.ts_30min, 'dname')
     freqs = ('30min', '5min', '1min')
 
     def __init__(self, freq, **kwargs):
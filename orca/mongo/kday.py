@@ -6,6 +6,7 @@ from orca import (
         DB,
         DATES,
         )
+from orca.database import lazy_distinct
 
 from base import KDayFetcher
 
@@ -13,7 +14,7 @@ from base import KDayFetcher
 class SharesFetcher(KDayFetcher):
     """Class to fetch shares structure data."""
 
-    dnames = DB.shares.distinct('dname')
+    dnames = lazy_distinct(DB.shares, 'dname')
 
     def __init__(self, **kwargs):
         self.collection = DB.shares
@@ -23,7 +24,7 @@ class SharesFetcher(KDayFetcher):
 class ZYYXConsensusFetcher(KDayFetcher):
     """Class to fetch ZYYX analyst consensus data."""
 
-    dnames = DB.zyconsensus.distinct('dname')
+    dnames = lazy_distinct(DB.zyconsensus, 'dname')
 
     def __init__(self, **kwargs):
         self.collection = DB.zyconsensus
@@ -33,7 +34,7 @@ class ZYYXConsensusFetcher(KDayFetcher):
 class EODValueFetcher(KDayFetcher):
     """Class to fetch data from collection 'eod_value'."""
 
-    dnames = DB.eod_value.distinct('dname')
+    dnames = lazy_distinct(DB.eod_value, 'dname')
 
     def __init__(self, **kwargs):
         self.collection = DB.eod_value
@@ -43,7 +44,7 @@ class EODValueFetcher(KDayFetcher):
 class MiscFetcher(KDayFetcher):
     """Class to fetch tradable and other miscellaneous data."""
 
-    dnames = DB.misc.distinct('dname')
+    dnames = lazy_distinct(DB.misc, 'dname')
 
     def __init__(self, **kwargs):
         self.collection = DB.misc
@@ -62,7 +63,7 @@ class MiscFetcher(KDayFetcher):
 class UnivFetcher(KDayFetcher):
     """Class to fetch some common universes."""
 
-    dnames = DB.universe.distinct('dname')
+    dnames = lazy_distinct(DB.universe, 'dname')
 
     def __init__(self, as_list=False, **kwargs):
         self.collection = DB.universe
@@ -87,7 +88,7 @@ class UnivFetcher(KDayFetcher):
 class AlphaFetcher(KDayFetcher):
     """Class to fetch raw alpha data."""
 
-    dnames = DB.alpha.distinct('dname')
+    dnames = lazy_distinct(DB.alpha, 'dname')
 
     def __init__(self, **kwargs):
         self.collection = DB.alpha
@@ -107,7 +108,7 @@ class AlphaFetcher(KDayFetcher):
 class CalendarFetcher(KDayFetcher):
     """Class to fetch financial calendar dates."""
 
-    dnames = DB.calendar.distinct('dname')
+    dnames = lazy_distinct(DB.calendar, 'dname')
 
     def __init__(self, **kwargs):
         self.collection = DB.calendar
@@ -117,7 +118,7 @@ class CalendarFetcher(KDayFetcher):
 class MoneyflowFetcher(KDayFetcher):
     """Class to fetch moneyflow data."""
 
-    dnames = DB.moneyflow.distinct('dname')
+    dnames = lazy_distinct(DB.moneyflow, 'dname')
 
     def __init__(self, **kwargs):
         self.collection = DB.moneyflow
@@ -127,7 +128,7 @@ class MoneyflowFetcher(KDayFetcher):
 class L2IndicatorFetcher(KDayFetcher):
     """Class to fetch level2 indicator data."""
 
-    dnames = DB.l2indicator.distinct('dname')
+    dnames = lazy_distinct(DB.l2indicator, 'dname')
 
     def __init__(self, **kwargs):
         self.collection = DB.l2indicator
@@ -137,7 +138,7 @@ class L2IndicatorFetcher(KDayFetcher):
 class MarginFetcher(KDayFetcher):
     """Class to fetch margin trading data."""
 
-    dnames = DB.margin.distinct('dname')
+    dnames = lazy_distinct(DB.margin, 'dname')
 
     def __init__(self, **kwargs):
         self.collection = DB.margin
@@ -147,7 +148,7 @@ class MarginFetcher(KDayFetcher):
 class IntervalDerivativeFetcher(KDayFetcher):
     """Class to fetch interval derivative data."""
 
-    dnames = DB.interval_derivative.distinct('dname')
+    dnames = lazy_distinct(DB.interval_derivative, 'dname')
 
     def __init__(self, **kwargs):
         self.collection = DB.interval_derivative
@@ -157,7 +158,7 @@ class IntervalDerivativeFetcher(KDayFetcher):
 class AuctionFetcher(KDayFetcher):
     """Class to fetch auction data."""
 
-    dnames = DB.auction.distinct('dname')
+    dnames = lazy_distinct(DB.auction, 'dname')
 
     def __init__(self, **kwargs):
         self.collection = DB.auction
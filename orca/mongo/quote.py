@@ -9,6 +9,7 @@ from orca import (
         DB,
         DATES,
         )
+from orca.database import lazy_distinct
 
 from base import KDayFetcher
 
@@ -16,7 +17,7 @@ from base import KDayFetcher
 class QuoteFetcher(KDayFetcher):
     """Class to fetch daily market quote data."""
 
-    dnames = DB.quote.distinct('dname') + ['returnsN']
+    dnames = lazy_distinct(DB.quote, 'dname') + ['returnsN']
 
     def __init__(self, **kwargs):
         self.collection = DB.quote
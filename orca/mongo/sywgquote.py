@@ -5,6 +5,7 @@
 import pandas as pd
 
 from orca import DB
+from orca.database import lazy_distinct
 
 from base import KDayFetcher
 from industry import IndustryFetcher
@@ -17,7 +18,7 @@ class SYWGQuoteFetcher(KDayFetcher):
     :param boolean use_industry: Returned DataFrame use industry code as columns? Default: True
     """
 
-    dnames = DB.sywgindex_quote.distinct('dname')
+    dnames = lazy_distinct(DB.sywgindex_quote, 'dname')
 
     def __init__(self, level=1, use_industry=True, **kwargs):
         self.collection = DB.sywgindex_quote
@@ -180,6 +180,42 @@ def quantile_cut(df, lower=0, upper=1, reverse=False):
         df[~(l|u)] = np.nan
     return df
 
+def delay(df, n):
+    """Value ``n`` rows before."""
+    return df.shift(n)
+
+def delta(df, n):
+    """Change over ``n`` rows."""
+    return df - df.shift(n)
+
+def ts_sum(df, n):
+    """Rolling sum over ``n`` rows."""
+    return pd.rolling_sum(df, n)
+
+def ts_mean(df, n):
+    """Rolling mean over ``n`` rows."""
+    return pd.rolling_mean(df, n)
+
+def ts_std(df, n):
+    """Rolling standard deviation over ``n`` rows."""
+    return pd.rolling_std(df, n)
+
+def ts_min(df, n):
+    """Rolling minimum over ``n`` rows."""
+    return pd.rolling_min(df, n)
+
+def ts_max(df, n):
+    """Rolling maximum over ``n`` rows."""
+    return pd.rolling_max(df, n)
+
+def ts_rank(df, n):
+    """Rank of the last value within ``n`` rows, scaled into [0, 1]."""
+    return pd.rolling_apply(df, n, lambda x: (x < x[-1]).sum() / (n - 1.))
+
+def ts_corr(df1, df2, n):
+    """Rolling correlation of two DataFrames over ``n`` rows, column by column."""
+    return pd.rolling_corr(df1, df2, n)
+
 """
 Helper APIs from operation classes
 """
@@ -209,9 +245,9 @@ def group_by(df, group, standard='SW2014', date=None, use_name=False):
         return group_by_board(df)
     return group_by_industry(df, group, standard=standard, date=date, use_name=use_name)
 
-def decay(df, n, dense=False, exp=1, minimum=0):
+def decay(df, n, dense=False, exp=1, minimum=0, halflife=None):
     """Wrapper for :py:class:`orca.operation.decay.DecayOperation`."""
-    return DecayOperation(n, dense=dense).operate(df, exp=exp, minimum=minimum)
+    return DecayOperation(n, dense=dense).operate(df, exp=exp, minimum=minimum, halflife=halflife)
 
 def barra_neut(df, model, factors):
     """Wrapper for :py:class:`orca.operation.barra.BarraFactorNeutOperation`."""
@@ -251,32 +287,33 @@ def level3_neut(df, standard='SW2014', simple=False, date=None):
     """Wrapper for :py:func:`orca.operation.api.industry_neut` with ``group='level3'``."""
     return industry_neut(df, 'level3', standard=standard, simple=simple, date=date)
 
-def group_rank(df, group=None, date=None):
+def group_rank(df, group=None, date=None, method='average'):
     """Wrapper for :py:class:`orca.operation.rank.GroupRankOperation`."""
-    return GroupRankOperation(group).operate(df, date=date)
+    return GroupRankOperation(group).operate(df, date=date, method=method)
 
-def board_rank(df):
+def board_rank(df, method='average'):
     """Wrapper for :py:class:`orca.operation.rank.BoardRankOperation`."""
-    return BoardRankOperation().operate(df)
+    return BoardRankOperation().operate(df, method=method)
 
-def industry_rank(df, group, standard='SW2014', simple=False, date=None):
+def industry_rank(df, group, standard='SW2014', simple=False, date=None, method='average'):
     """Wrapper for :py:class:`orca.operation.rank.IndustryRankOperation`.
 
     :param str group: 'level1', 'level2', 'level3', 'board'
     :param str standard: Industry classification standard, currently only supports: ('SW2014', 'ZX')
+    :param str method: How to rank ties, 'average' or 'dense'
     """
     if group == 'board':
-        return board_rank(df)
-    return IndustryRankOperation(standard).operate(df, group, simple=simple, date=date)
+        return board_rank(df, method=method)
+    return IndustryRankOperation(standard).operate(df, group, simple=simple, date=date, method=method)
 
-def level1_rank(df, standard='SW2014', simple=False, date=None):
+def level1_rank(df, standard='SW2014', simple=False, date=None, method='average'):
     """Wrapper for :py:func:`orca.operation.api.industry_rank` with ``group='level1'``."""
-    return industry_rank(df, 'level1', standard=standard, simple=simple, date=date)
+    return industry_rank(df, 'level1', standard=standard, simple=simple, date=date, method=method)
 
-def level2_rank(df, standard='SW2014', simple=False, date=None):
+def level2_rank(df, standard='SW2014', simple=False, date=None, method='average'):
     """Wrapper for :py:func:`orca.operation.api.industry_rank` with ``group='level2'``."""
-    return industry_rank(df, 'level2', standard=standard, simple=simple, date=date)
+    return industry_rank(df, 'level2', standard=standard, simple=simple, date=date, method=method)
 
-def level3_rank(df, standard='SW2014', simple=False, date=None):
+def level3_rank(df, standard='SW2014', simple=False, date=None, method='average'):
     """Wrapper for :py:func:`orca.operation.api.industry_rank` with ``group='level3'``."""
-    return industry_rank(df, 'level3', standard=standard, simple=simple, date=date)
+    return industry_rank(df, 'level3', standard=standard, simple=simple, date=date, method=method)
@@ -9,6 +9,7 @@ import pandas as pd
 
 from orca import DATES
 
+from orca.mongo.base import fetch_concurrently
 from orca.mongo.barra import (
         BarraSpecificsFetcher,
         BarraExposureFetcher,
@@ -106,25 +107,54 @@ class BarraOperation(OperationBase):
         return list(_factors)
 
 
-def worker1(args):
-    date, alpha, exposure = args
+def solve(a, b):
+    """Solve a stack of linear systems ``a[i] x[i] = b[i]``.
 
-    finite_alpha = alpha.dropna()
-    exposure = exposure.dropna(axis=0, how='all').fillna(0)
-    sids = exposure.index.intersection(finite_alpha.index)
-
-    nalpha, exposure = alpha[sids], exposure.ix[sids]
-    a, b = exposure.T.dot(exposure), exposure.T.dot(nalpha)
+    :returns: tuple (x, success); systems that are singular have ``success[i]`` False and ``x[i]`` NaN
+    """
     try:
-        lamb = np.linalg.solve(a, b)
+        return np.linalg.solve(a, b[..., None])[..., 0], np.ones(len(a), dtype=bool)
     except np.linalg.linalg.LinAlgError:
-        return date, alpha, False
-    nalpha = pd.Series(nalpha.values - exposure.dot(lamb), index=sids)
-    return date, nalpha.reindex(index=alpha.index), True
+        x, success = np.empty(b.shape), np.ones(len(a), dtype=bool)
+        for i in xrange(len(a)):
+            try:
+                x[i] = np.linalg.solve(a[i], b[i])
+            except np.linalg.linalg.LinAlgError:
+                x[i], success[i] = np.nan, False
+        return x, success
+
+def factor_neut(values, exposures):
+    """Neutralize rows of alpha along factors by least squares, for all dates at once.
+
+    On each date, only sids with finite alpha and at least one finite exposure are used; missing exposures are
+    taken as 0.
+
+    :param values: ndarray of shape ``(dates, sids)``
+    :param exposures: ndarray of shape ``(dates, sids, factors)``
+    :returns: tuple (residuals, success); rows that failed are left as in ``values``
+    """
+    values = np.where(np.isfinite(values), values, np.nan)
+    valid = np.isfinite(values) & np.isfinite(exposures).any(axis=2)
+    x = np.where(valid[..., None], exposures, 0)
+    x[~np.isfinite(x)] = 0
+    y = np.where(valid, values, 0)
+
+    a, b = np.einsum('tnk,tnl->tkl', x, x), np.einsum('tnk,tn->tk', x, y)
+    lamb, success = solve(a, b)
+    lamb[~success] = 0
+    res = np.where(valid, y - np.einsum('tnk,tk->tn', x, lamb), np.nan)
+    res[~success] = values[~success]
+    return res, success
 
 
 class BarraFactorNeutOperation(BarraOperation):
-    """Class to neutralize alpha along some Barra factors."""
+    """Class to neutralize alpha along some Barra factors.
+
+    Exposures are held in a (dates, sids, factors) array and normal equations of all dates are solved at once with
+    :py:func:`factor_neut`.
+
+    :param int threads: Not used; kept for compatibility
+    """
 
     def __init__(self, model, threads=multiprocessing.cpu_count(), **kwargs):
         super(BarraFactorNeutOperation, self).__init__(model, **kwargs)
@@ -144,59 +174,68 @@ class BarraFactorNeutOperation(BarraOperation):
             datetime_index = False
             last_date = alpha.index[-1]
 
-        exposures = {}
-        for factor in factors:
-            exposure = self.exposure.fetch_history(
-                    factor,
-                    last_date,
-                    len(alpha),
-                    delay=1,
-                    datetime_index=datetime_index)
-            exposure.index = alpha.index
-            exposures[factor] = exposure
-        exposures = pd.Panel(exposures)
-        alpha = alpha[np.isfinite(alpha)]
-
-        pool = multiprocessing.Pool(self.threads)
-        res = pool.imap_unordered(
-                worker1,
-                ((date, alpha.ix[date], exposures.major_xs(date)) for date in alpha.index)
-                )
-        pool.close()
-        pool.join()
-
-        df = {}
-        for date, alpha, sucess in res:
-            if not sucess:
-                self.warning('Failed to neutralize on {}'.format(alpha.name))
-            df[date] = alpha
-        df = pd.DataFrame(df).T
-        return df
-
-
-def worker2(args):
-    factors, date, alpha, exposure, fcov, spec = args
-
-    finite_alpha = alpha.dropna()
-    exposure = exposure.dropna(axis=0, how='all').fillna(0)
-    spec = spec.dropna()
-    sids = exposure.index.intersection(finite_alpha.index).intersection(spec.index)
-
-    nalpha, exposure, spec = alpha[sids], exposure.ix[sids], spec.ix[sids]
-    covariance = exposure.dot(fcov).dot(exposure.T) + pd.DataFrame(np.diag(spec ** 2), index=sids, columns=sids).fillna(0)
-
-    exposure = exposure[factors]
-    a, b = exposure.T.dot(covariance).dot(exposure), exposure.T.dot(covariance).dot(nalpha)
-    try:
-        lamb = np.linalg.solve(a, b)
-    except np.linalg.linalg.LinAlgError:
-        return date, alpha, False
-    nalpha = pd.Series(nalpha.values - exposure.dot(lamb), index=sids)
-    return date, nalpha.reindex(index=alpha.index), True
+        exposures = fetch_concurrently(
+                (self.exposure.fetch_history, (factor, last_date, len(alpha)), {'delay': 1, 'datetime_index': datetime_index})
+                for factor in factors)
+        values = np.empty((len(alpha), len(alpha.columns), len(factors)))
+        for i, exposure in enumerate(exposures):
+            values[:, :, i] = exposure.reindex(columns=alpha.columns).values
+
+        res, success = factor_neut(alpha.values, values)
+        for date in alpha.index[~success]:
+            self.warning('Failed to neutralize on {}'.format(date))
+        return pd.DataFrame(res, index=alpha.index, columns=alpha.columns)
+
+
+def factor_corr_neut(values, exposures, covariances, specifics, factors):
+    """Neutralize rows of alpha along factors by generalized least squares under the Barra covariance
+    ``X F X^T + D``, for all dates at once.
+
+    The ``sids x sids`` covariance is never formed: with ``E`` the exposures to neutralized factors, ``E^T C E`` and
+    ``E^T C y`` are computed in factor space as ``(E^T X) F (X^T E) + E^T D E`` and ``(E^T X) F (X^T y) + E^T D y``,
+    so that cost and memory are linear in the number of sids.
+
+    On each date, only sids with finite alpha, finite specific risk and at least one finite exposure are used;
+    missing exposures are taken as 0.
+
+    :param values: ndarray of shape ``(dates, sids)``
+    :param exposures: ndarray of shape ``(dates, sids, factors)`` on all factors of the model
+    :param covariances: ndarray of shape ``(dates, factors, factors)``
+    :param specifics: ndarray of specific risks of shape ``(dates, sids)``
+    :param list factors: Positions of factors to be neutralized along the last axis of ``exposures``
+    :returns: tuple (residuals, success); rows that failed are left as in ``values``
+    """
+    values = np.where(np.isfinite(values), values, np.nan)
+    valid = np.isfinite(values) & np.isfinite(exposures).any(axis=2) & np.isfinite(specifics)
+    x = np.where(valid[..., None], exposures, 0)
+    x[~np.isfinite(x)] = 0
+    y = np.where(valid, values, 0)
+    d = np.where(valid, specifics, 0) ** 2
+    e = x[:, :, factors]
+    ed = e * d[..., None]
+
+    g = np.einsum('tnk,tnl->tkl', e, x)
+    gf = np.einsum('tkj,tjl->tkl', g, covariances)
+    a = np.einsum('tkl,tml->tkm', gf, g) + np.einsum('tnk,tnl->tkl', ed, e)
+    b = np.einsum('tkl,tl->tk', gf, np.einsum('tnk,tn->tk', x, y)) + np.einsum('tnk,tn->tk', ed, y)
+    finite = np.isfinite(a).all(axis=(1, 2)) & np.isfinite(b).all(axis=1)
+    a[~finite], b[~finite] = np.eye(len(factors)), 0
+    lamb, success = solve(a, b)
+    success &= finite
+    lamb[~success] = 0
+    res = np.where(valid, y - np.einsum('tnk,tk->tn', e, lamb), np.nan)
+    res[~success] = values[~success]
+    return res, success
 
 
 class BarraFactorCorrNeutOperation(BarraOperation):
-    """Class to neutralize alpha along some Barra factors."""
+    """Class to neutralize alpha along some Barra factors under the covariance of the Barra model.
+
+    Exposures are held in a (dates, sids, factors) array and all dates are solved at once with
+    :py:func:`factor_corr_neut`, without forming the ``sids x sids`` covariance.
+
+    :param int threads: Not used; kept for compatibility
+    """
 
     def __init__(self, model, threads=multiprocessing.cpu_count(), **kwargs):
         super(BarraFactorCorrNeutOperation, self).__init__(model, **kwargs)
@@ -216,44 +255,24 @@ class BarraFactorCorrNeutOperation(BarraOperation):
             datetime_index = False
             last_date = alpha.index[-1]
 
-        exposures = {}
-        for factor in self.all_factors:
-            exposure = self.exposure.fetch_history(
-                    factor,
-                    last_date,
-                    len(alpha),
-                    delay=1,
-                    datetime_index=datetime_index)
-            exposure.index = alpha.index
-            exposures[factor] = exposure
-        exposures = pd.Panel(exposures)
-
-        startdate, enddate = DATES[DATES.index(last_date)-len(alpha)], DATES[DATES.index(last_date)-1]
-        covariances = self.factor.fetch_covariance(
-                startdate=startdate,
-                enddate=enddate,
-                datetime_index=datetime_index)
+        startdate, enddate = DATES.shift(last_date, -len(alpha)), DATES.shift(last_date, -1)
+        calls = [(self.exposure.fetch_history, (factor, last_date, len(alpha)), {'delay': 1, 'datetime_index': datetime_index})
+                 for factor in self.all_factors]
+        calls.append((self.factor.fetch_covariance, (),
+                      {'startdate': startdate, 'enddate': enddate, 'datetime_index': datetime_index}))
+        calls.append((self.specifics.fetch_history, ('specific_risk', last_date, len(alpha)),
+                      {'delay': 1, 'datetime_index': datetime_index}))
+        res = fetch_concurrently(calls)
+        exposures, covariances, specifics = res[:-2], res[-2], res[-1]
+        values = np.empty((len(alpha), len(alpha.columns), len(self.all_factors)))
+        for i, exposure in enumerate(exposures):
+            values[:, :, i] = exposure.reindex(columns=alpha.columns).values
         covariances.items = alpha.index
-        df = covariances[last_date]
-
-        specifics = self.specifics.fetch_history(
-                'specific_risk', last_date, len(alpha), delay=1, datetime_index=datetime_index)
-        specifics.index = alpha.index
-
-        alpha = alpha[np.isfinite(alpha)]
-
-        pool = multiprocessing.Pool(self.threads)
-        res = pool.imap_unordered(
-                worker2,
-                ((factors, date, alpha.ix[date], exposures.major_xs(date), covariances[date], specifics.ix[date]) for date in alpha.index)
-                )
-        pool.close()
-        pool.join()
-
-        df = {}
-        for date, alpha, sucess in res:
-            if not sucess:
-                self.warning('Failed to neutralize on {}'.format(alpha.name))
-            df[date] = alpha
-        df = pd.DataFrame(df).T
-        return df
+        covariances = covariances.reindex(major_axis=self.all_factors, minor_axis=self.all_factors)
+        specifics = specifics.reindex(columns=alpha.columns)
+
+        res, success = factor_corr_neut(alpha.values, values, covariances.values, specifics.values,
+                                        [self.all_factors.index(factor) for factor in factors])
+        for date in alpha.index[~success]:
+            self.warning('Failed to neutralize on {}'.format(date))
+        return pd.DataFrame(res, index=alpha.index, columns=alpha.columns)
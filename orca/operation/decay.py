@@ -3,10 +3,67 @@
 """
 
 import numpy as np
+import pandas as pd
 
 from base import OperationBase
 
 
+def decay_weights(days, exp=1, minimum=0, halflife=None):
+    """Weights of alphas ``0, 1, ..., days-1`` days ago.
+
+    :returns: ``(days-i*(1-minimum)) ** exp`` for the i-th day, or ``0.5 ** (i/halflife)`` when ``halflife`` is not None
+    """
+    lags = np.arange(days, dtype=float)
+    if halflife is not None:
+        return 0.5 ** (lags / halflife)
+    return (days - lags * (1 - minimum)) ** exp
+
+def decay(values, days, exp=1, minimum=0, halflife=None, dense=False):
+    """Weighted sum of each row of a 2-D array and its previous ``days-1`` rows, divided by sum of weights.
+
+    Rows are visited once. Linear(``exp=1``) and exponential(``halflife``) decays are updated by recurrences in
+    O(sids) per row; other powers take a weighted sum over the window. Besides the result, only a few rows are
+    allocated.
+
+    :param values: ndarray of shape ``(dates, sids)``
+    :param boolean dense: Whether to treat ``NaN`` as 0 in current row. Default: False
+    :returns: ndarray of the same shape; ``NaN`` where there is no data in the window
+
+    Non-finite values(``NaN`` and ``inf``) are taken as missing.
+    """
+    values = np.asarray(values, dtype=float)
+    weights = decay_weights(days, exp=exp, minimum=minimum, halflife=halflife)
+    res = np.empty(values.shape)
+    current, window, count = np.zeros((3, values.shape[1]))
+    ratio = 0.5 ** (1. / halflife) if halflife is not None else None
+    step = 1. - minimum
+
+    for t in xrange(len(values)):
+        valid = np.isfinite(values[t])
+        new = np.where(valid, values[t], 0)
+        count += valid
+        if t >= days:
+            old_valid = np.isfinite(values[t-days])
+            old = np.where(old_valid, values[t-days], 0)
+            count -= old_valid
+        else:
+            old = 0
+        if ratio is not None:
+            current = new + ratio * current - weights[-1] * ratio * old
+        elif exp == 1:
+            current += days * new - step * (window - old) - weights[-1] * old
+            window += new - old
+        else:
+            start = max(t-days+1, 0)
+            rows = values[start:t+1]
+            current = np.dot(weights[t-start::-1], np.where(np.isfinite(rows), rows, 0))
+        res[t] = current
+        res[t, count == 0] = np.nan
+        if not dense:
+            res[t, ~valid] = np.nan
+    return res / weights.sum()
+
+
 class DecayOperation(OperationBase):
     """Class to linearly combine current alpha with decayed alphas, usually to reduce turnover.
 
@@ -19,11 +76,14 @@ class DecayOperation(OperationBase):
         self.days = days
         self.dense = dense
 
-    def operate(self, alpha, exp=1, minimum=0):
-        div = self.days ** exp
-        current = (alpha.fillna(0) if self.dense else alpha) * self.days ** exp
-        for i in range(1, self.days):
-            current += alpha.shift(i).fillna(0) * (self.days-i*(1-minimum)) ** exp
-            div += (self.days-i*(1-minimum)) ** exp
-        current[alpha.fillna(method='ffill', limit=self.days-1).isnull()] = np.nan
-        return current / div
+    def operate(self, alpha, exp=1, minimum=0, halflife=None):
+        """
+        :param exp: Power of linearly decreasing weights. Default: 1
+        :param minimum: Weight of the earliest alpha relative to the current one is ``1/days`` when it is 0 and 1 when it is 1. Default: 0
+        :param halflife: When it is not None, weights decrease exponentially by half every ``halflife`` days, and ``exp``, ``minimum`` are ignored. Default: None
+        """
+        res = decay(alpha.values.reshape(len(alpha), -1), self.days,
+                    exp=exp, minimum=minimum, halflife=halflife, dense=self.dense)
+        if isinstance(alpha, pd.Series):
+            return pd.Series(res[:, 0], index=alpha.index, name=alpha.name)
+        return pd.DataFrame(res, index=alpha.index, columns=alpha.columns)
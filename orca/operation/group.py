@@ -2,10 +2,11 @@
 .. moduleauthor:: Li, Wang <wangziqi@foreseefund.com>
 """
 
+import numpy as np
 import pandas as pd
 
-from orca import SIDS
 from orca.mongo.industry import IndustryFetcher
+from orca.utils import dateutil
 FETCHER = IndustryFetcher()
 
 def get_board(sid):
@@ -17,13 +18,11 @@ def get_board(sid):
         return 'ZXB'
     return 'SZ'
 
-BOARD = pd.Series({sid: get_board(sid) for sid in SIDS})
-
 def group_by_board(df):
     if isinstance(df, pd.Series):
-        group = BOARD.ix[df.index]
+        group = pd.Series([get_board(sid) for sid in df.index], index=df.index)
         return df.groupby(group)
-    group = BOARD.ix[df.columns]
+    group = pd.Series([get_board(sid) for sid in df.columns], index=df.columns)
     return df.groupby(group, axis=1)
 
 def group_by_industry(df, industry='sector', standard='SW2014', date=None, use_name=False):
@@ -36,3 +35,82 @@ def group_by_industry(df, industry='sector', standard='SW2014', date=None, use_n
         return df.ix[sids].groupby(industry.ix[sids])
     sids = industry.index.intersection(df.columns)
     return df[sids].groupby(industry.ix[sids], axis=1)
+
+def encode_groups(group, index, columns):
+    """Encode group labels into integer codes aligned with a (``index``, ``columns``) array.
+
+    :param group: Either a Series(static grouping) indexed by sids or a DataFrame(dynamic grouping) of dates x sids
+    :returns: tuple (codes, ngroups); ``codes`` is a 2-D integer array with -1 for missing groups
+    """
+    if isinstance(group, pd.Series):
+        codes, uniques = pd.factorize(group.reindex(index=columns).values)
+        return np.repeat(codes[None, :], len(index), axis=0), len(uniques)
+    if isinstance(group.index, pd.DatetimeIndex):
+        index = pd.to_datetime(index)
+    else:
+        index = dateutil.to_datestr(index)
+    values = group.reindex(index=index, columns=columns).values
+    codes, uniques = pd.factorize(values.ravel())
+    return codes.reshape(values.shape), len(uniques)
+
+def group_reduce(values, codes, ngroups):
+    """Sum and count finite values of each (row, group) with ``np.bincount``.
+
+    :returns: tuple (valid, flat, sums, counts); ``flat`` are positions of valid entries in ``sums`` and ``counts``
+    """
+    valid = (codes >= 0) & np.isfinite(values)
+    flat = (np.arange(len(values))[:, None] * ngroups + codes)[valid]
+    size = len(values) * ngroups
+    sums = np.bincount(flat, weights=values[valid], minlength=size)
+    counts = np.bincount(flat, minlength=size)
+    return valid, flat, sums, counts
+
+def group_demean(values, codes, ngroups):
+    """Subtract from each entry of a 2-D array the mean of its (row, group); entries without group are NaN."""
+    values = np.asarray(values, dtype=float)
+    valid, flat, sums, counts = group_reduce(values, codes, ngroups)
+    res = np.empty(values.shape)
+    res.fill(np.nan)
+    res[valid] = values[valid] - (sums / np.maximum(counts, 1))[flat]
+    return res
+
+def group_rank(values, codes, ngroups, method='average'):
+    """Rank entries of a 2-D array within each (row, group) and scale ranks into [0, 1] as
+    :py:func:`orca.operation.rank.rank` does; entries without group are NaN.
+
+    Entries are sorted by (row, group, value) once; ranks are computed from positions of groups and runs of ties in
+    the sorted array.
+
+    :param str method: How to rank ties, 'average' or 'dense'. Default: 'average'
+    """
+    if method not in ('average', 'dense'):
+        raise ValueError('No such rank method {0!r}'.format(method))
+    values = np.asarray(values, dtype=float)
+    res = np.empty(values.shape)
+    res.fill(np.nan)
+    valid = (codes >= 0) & np.isfinite(values)
+    rows, cols = np.nonzero(valid)
+    if not len(rows):
+        return res
+    keys, vals = rows * ngroups + codes[valid], values[valid]
+    order = np.lexsort((vals, keys))
+    keys, vals, rows, cols = keys[order], vals[order], rows[order], cols[order]
+
+    n = len(keys)
+    newgroup = np.r_[True, keys[1:] != keys[:-1]]
+    newrun = newgroup | np.r_[True, vals[1:] != vals[:-1]]
+    gstarts = np.flatnonzero(newgroup)
+    gends = np.r_[gstarts[1:], n] - 1
+    gid = np.cumsum(newgroup) - 1
+    rid = np.cumsum(newrun) - 1
+    if method == 'average':
+        rstarts = np.flatnonzero(newrun)
+        rends = np.r_[rstarts[1:], n] - 1
+        ranks = (rstarts + rends)[rid] / 2. - gstarts[gid] + 1
+    else:
+        ranks = (rid - rid[gstarts][gid] + 1).astype(float)
+
+    low, high = ranks[gstarts][gid], ranks[gends][gid]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        res[rows, cols] = (ranks - low) / (high - low)
+    return res
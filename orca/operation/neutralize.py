@@ -11,19 +11,20 @@ from orca.mongo.industry import IndustryFetcher
 from orca.utils import dateutil
 
 from base import OperationBase
+from group import (
+        encode_groups,
+        group_demean,
+        )
 
 
-def worker(args):
-    dt, alpha, group = args
-    sids = group.dropna().index
-    nalpha, group = alpha[sids], group[sids]
-    nalpha = nalpha.groupby(group).transform(lambda x: x-x.mean())
-    return dt, nalpha
-
 class GroupNeutOperation(OperationBase):
     """Class to neutralize alpha within a group.
 
+    Groups are encoded into integer codes, and means of all (date, group) pairs are computed at once over the whole
+    array with :py:func:`orca.operation.group.group_demean`.
+
     :param group: Groupings, either a Series(static grouping) or a DataFrame(dynamic grouping); in latter case, you are **advised** to make the index of type DatatimeIndex. Default: None
+    :param int threads: Not used; kept for compatibility
     """
 
     def __init__(self, group=None, threads=multiprocessing.cpu_count(), **kwargs):
@@ -40,30 +41,14 @@ class GroupNeutOperation(OperationBase):
                 group = self.group.ix[date]
             else:
                 group = self.group
-            sids = group.dropna().index
-            nalpha = alpha.ix[sids]
-            nalpha = nalpha.groupby(group).transform(lambda x: x-x.mean())
-            return nalpha.reindex(index=alpha.index)
+            codes, ngroups = encode_groups(group, [None], alpha.index)
+            return pd.Series(group_demean(alpha.values[None, :], codes, ngroups)[0], index=alpha.index)
 
         if self.group is None:
             return alpha.subtract(alpha.mean(axis=1), axis=0)
 
-        if isinstance(self.group, pd.Series):
-            sids = self.group.dropna().index
-            nalpha = alpha.T.ix[sids]
-            nalpha = nalpha.groupby(self.group.dropna()).transform(lambda x: x-x.mean()).T
-            return nalpha.reindex(columns=alpha.columns)
-
-        dates = dateutil.to_datestr(alpha.index)
-        pool = multiprocessing.Pool(self.threads)
-        res = pool.imap_unordered(worker, [(dt1, row, self.group.ix[dt2]) for (dt1, row), dt2 in zip(alpha.iterrows(), dates)])
-        pool.close()
-        pool.join()
-
-        df = {}
-        for dt, row in res:
-            df[dt] = row
-        return pd.DataFrame(df).T.reindex(columns=alpha.columns)
+        codes, ngroups = encode_groups(self.group, alpha.index, alpha.columns)
+        return pd.DataFrame(group_demean(alpha.values, codes, ngroups), index=alpha.index, columns=alpha.columns)
 
 
 class IndustryNeutOperation(GroupNeutOperation):
@@ -79,12 +64,9 @@ class IndustryNeutOperation(GroupNeutOperation):
         self.group = None
 
     def operate(self, alpha, group='sector', simple=False, date=None):
-        alpha = alpha[np.isfinite(alpha)]
         if isinstance(alpha, pd.Series):
-            group = self.industry.fetch_daily(group, date).dropna()
-            nalpha = alpha.ix[group.index]
-            nalpha = nalpha.groupby(group).transform(lambda x: x-x.mean())
-            return nalpha.reindex(index=alpha.index)
+            self.group = self.industry.fetch_daily(group, date)
+            return super(IndustryNeutOperation, self).operate(alpha)
 
         window = np.unique(dateutil.to_datestr(alpha.index))
         if simple:
@@ -97,7 +79,7 @@ class IndustryNeutOperation(GroupNeutOperation):
 class BoardNeutOperation(GroupNeutOperation):
 
     def __init__(self, **kwargs):
-        super(GroupNeutOperation, self).__init__(**kwargs)
+        super(BoardNeutOperation, self).__init__(**kwargs)
 
     @staticmethod
     def get_board(sid):
@@ -110,10 +92,6 @@ class BoardNeutOperation(GroupNeutOperation):
         return 'SZ'
 
     def operate(self, alpha):
-        alpha = alpha[np.isfinite(alpha)]
-        if isinstance(alpha, pd.Series):
-            group = pd.Series({sid: self.get_board(sid) for sid in alpha.index})
-            return alpha.groupby(group).transform(lambda x: x-x.mean())
-        else:
-            group = pd.Series({sid: self.get_board(sid) for sid in alpha.columns})
-            return alpha.T.groupby(group).transform(lambda x: x.sub(x.mean(), axis=1)).T
+        sids = alpha.index if isinstance(alpha, pd.Series) else alpha.columns
+        self.group = pd.Series([self.get_board(sid) for sid in sids], index=sids)
+        return super(BoardNeutOperation, self).operate(alpha)
@@ -11,27 +11,28 @@ from orca.mongo.industry import IndustryFetcher
 from orca.utils import dateutil
 
 from base import OperationBase
+from group import (
+        encode_groups,
+        group_rank,
+        )
 
 
-def rank(pdobj):
+def rank(pdobj, method='average'):
     if isinstance(pdobj, pd.DataFrame):
-        robj = pdobj.rank(axis=1)
+        robj = pdobj.rank(axis=1, method=method)
         robj = robj.sub(robj.min(axis=1), axis=0)
         return robj.div(robj.max(axis=1), axis=0)
-    robj = pdobj.rank()
+    robj = pdobj.rank(method=method)
     return (robj - robj.min()) / (robj.max() - robj.min())
 
-def worker(args):
-    dt, alpha, group = args
-    sids = group.dropna().index
-    nalpha, group = alpha[sids], group[sids]
-    nalpha = nalpha.groupby(group).transform(lambda x: rank(x))
-    return dt, nalpha
-
 class GroupRankOperation(OperationBase):
     """Class to rank alpha within a group.
 
+    Groups are encoded into integer codes, and entries of all (date, group) pairs are ranked at once over the whole
+    array with :py:func:`orca.operation.group.group_rank`.
+
     :param group: Groupings, either a Series(static grouping) or a DataFrame(dynamic grouping); in latter case, you are **advised** to make the index of type DatatimeIndex. Default: None
+    :param int threads: Not used; kept for compatibility
     """
 
     def __init__(self, group=None, threads=multiprocessing.cpu_count(), **kwargs):
@@ -39,38 +40,26 @@ class GroupRankOperation(OperationBase):
         self.group = group
         self.threads = threads
 
-    def operate(self, alpha, date=None):
+    def operate(self, alpha, date=None, method='average'):
+        """
+        :param str method: How to rank ties, 'average' or 'dense'; see :py:func:`orca.operation.group.group_rank`. Default: 'average'
+        """
         alpha = alpha[np.isfinite(alpha)]
         if isinstance(alpha, pd.Series):
             if self.group is None:
-                return rank(alpha)
+                return rank(alpha, method=method)
             if isinstance(self.group, pd.DataFrame):
                 group = self.group.ix[date]
             else:
                 group = self.group
-            sids = group.dropna().index
-            nalpha = alpha.ix[sids]
-            nalpha = nalpha.groupby(group).transform(lambda x: rank(x))
-            return nalpha.reindex(index=alpha.index)
+            codes, ngroups = encode_groups(group, [None], alpha.index)
+            return pd.Series(group_rank(alpha.values[None, :], codes, ngroups, method=method)[0], index=alpha.index)
 
         if self.group is None:
-            return rank(alpha)
-        if isinstance(self.group, pd.Series):
-            sids = self.group.dropna().index
-            nalpha = alpha.T.ix[sids]
-            nalpha = nalpha.groupby(self.group.dropna()).transform(lambda x: rank(x)).T
-            return nalpha.reindex(columns=alpha.columns)
+            return rank(alpha, method=method)
 
-        dates = dateutil.to_datestr(alpha.index)
-        pool = multiprocessing.Pool(self.threads)
-        res = pool.imap_unordered(worker, [(dt1, row, self.group.ix[dt2]) for (dt1, row), dt2 in zip(alpha.iterrows(), dates)])
-        pool.close()
-        pool.join()
-
-        df = {}
-        for dt, row in res:
-            df[dt] = row
-        return pd.DataFrame(df).T.reindex(columns=alpha.columns)
+        codes, ngroups = encode_groups(self.group, alpha.index, alpha.columns)
+        return pd.DataFrame(group_rank(alpha.values, codes, ngroups, method=method), index=alpha.index, columns=alpha.columns)
 
 
 class IndustryRankOperation(GroupRankOperation):
@@ -85,24 +74,21 @@ class IndustryRankOperation(GroupRankOperation):
         self.industry = IndustryFetcher(datetime_index=True)
         self.group = None
 
-    def operate(self, alpha, group='sector', simple=False, date=None):
-        alpha = alpha[np.isfinite(alpha)]
+    def operate(self, alpha, group='sector', simple=False, date=None, method='average'):
         if isinstance(alpha, pd.Series):
-            group = self.industry.fetch_daily(group, date).dropna()
-            nalpha = alpha.ix[group.index]
-            nalpha = nalpha.groupby(group).transform(lambda x: rank(x))
-            return nalpha.reindex(index=alpha.index)
+            self.group = self.industry.fetch_daily(group, date)
+            return super(IndustryRankOperation, self).operate(alpha, method=method)
 
         window = np.unique(dateutil.to_datestr(alpha.index))
         group = self.industry.fetch_window(group, window)
         self.group = group.iloc[-1] if simple else group
-        return super(IndustryRankOperation, self).operate(alpha)
+        return super(IndustryRankOperation, self).operate(alpha, method=method)
 
 
 class BoardRankOperation(GroupRankOperation):
 
     def __init__(self, **kwargs):
-        super(GroupRankOperation, self).__init__(**kwargs)
+        super(BoardRankOperation, self).__init__(**kwargs)
 
     @staticmethod
     def get_board(sid):
@@ -114,11 +100,7 @@ class BoardRankOperation(GroupRankOperation):
             return 'ZXB'
         return 'SZ'
 
-    def operate(self, alpha):
-        alpha = alpha[np.isfinite(alpha)]
-        if isinstance(alpha, pd.Series):
-            group = pd.Series({sid: self.get_board(sid) for sid in alpha.index})
-            return alpha.groupby(group).transform(lambda x: rank(x))
-        else:
-            group = pd.Series({sid: self.get_board(sid) for sid in alpha.columns})
-            return alpha.T.groupby(group).transform(lambda x: rank(x)).T
+    def operate(self, alpha, method='average'):
+        sids = alpha.index if isinstance(alpha, pd.Series) else alpha.columns
+        self.group = pd.Series([self.get_board(sid) for sid in sids], index=sids)
+        return super(BoardRankOperation, self).operate(alpha, method=method)
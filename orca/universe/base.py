@@ -13,6 +13,7 @@ from orca import (
         DATES,
         SIDS,
         )
+from orca.mongo.base import fetch_concurrently
 from orca.utils import dateutil
 
 
@@ -155,11 +156,9 @@ class DataFilter(FilterBase):
         si, ei = map(DATES.index, [univ_window[0], univ_window[-1]])
         data_window = DATES[si-self.delay-(self.window-1): ei-self.delay+1]
 
-        dfs = []
-        for fetcher, dname in self.datas:
-            df = fetcher.fetch_window(dname, data_window)
+        dfs = fetch_concurrently((fetcher.fetch_window, (dname, data_window)) for fetcher, dname in self.datas)
+        for df in dfs:
             df.index = DATES[si-(self.window-1): ei+1]
-            dfs.append(df)
         df = self.synth(*dfs)
 
         parent = self.comply(df, parent)
@@ -0,0 +1,129 @@
+"""
+.. moduleauthor:: Li, Wang <wangziqi@foreseefund.com>
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class Cube(object):
+    """Light-weight 3-D container backed by a single ndarray, with a subset of the ``pd.Panel`` interface.
+
+    Cross sections(:py:meth:`__getitem__`, :py:meth:`major_xs`, :py:meth:`minor_xs`) are DataFrames built on
+    views of :py:attr:`values`, hence no copy is made.
+
+    :param values: ndarray of shape ``(len(items), len(major_axis), len(minor_axis))``
+    :param items: Labels of the first axis
+    :param major_axis: Labels of the second axis
+    :param minor_axis: Labels of the third axis
+    """
+
+    _axes = ('items', 'major_axis', 'minor_axis')
+
+    def __init__(self, values, items, major_axis, minor_axis):
+        values = np.asarray(values)
+        if values.ndim != 3:
+            raise ValueError('Cube must be 3-dimensional')
+        self.values = values
+        self._labels = [None, None, None]
+        self.items, self.major_axis, self.minor_axis = items, major_axis, minor_axis
+
+    def _get_axis(self, i):
+        return self._labels[i]
+
+    def _set_axis(self, i, labels):
+        labels = pd.Index(labels)
+        if len(labels) != self.values.shape[i]:
+            raise ValueError('Length mismatch on {}: expected {}, got {}'.format(
+                self._axes[i], self.values.shape[i], len(labels)))
+        self._labels[i] = labels
+
+    items = property(lambda self: self._get_axis(0), lambda self, labels: self._set_axis(0, labels))
+    major_axis = property(lambda self: self._get_axis(1), lambda self, labels: self._set_axis(1, labels))
+    minor_axis = property(lambda self: self._get_axis(2), lambda self, labels: self._set_axis(2, labels))
+
+    @property
+    def axes(self):
+        return list(self._labels)
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    @property
+    def ndim(self):
+        return 3
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __contains__(self, item):
+        return item in self.items
+
+    def keys(self):
+        return self.items
+
+    def iteritems(self):
+        for i, item in enumerate(self.items):
+            yield item, self._frame(self.values[i], self.major_axis, self.minor_axis)
+
+    @staticmethod
+    def _frame(values, index, columns):
+        return pd.DataFrame(values, index=index, columns=columns, copy=False)
+
+    def __getitem__(self, item):
+        """Return DataFrame with ``major_axis`` as index and ``minor_axis`` as columns."""
+        return self._frame(self.values[self.items.get_loc(item)], self.major_axis, self.minor_axis)
+
+    def major_xs(self, key):
+        """Return DataFrame with ``minor_axis`` as index and ``items`` as columns."""
+        return self._frame(self.values[:, self.major_axis.get_loc(key), :].T, self.minor_axis, self.items)
+
+    def minor_xs(self, key):
+        """Return DataFrame with ``major_axis`` as index and ``items`` as columns."""
+        return self._frame(self.values[:, :, self.minor_axis.get_loc(key)].T, self.major_axis, self.items)
+
+    def _axis_number(self, axis):
+        return self._axes.index(axis) if isinstance(axis, basestring) else axis
+
+    def transpose(self, *axes):
+        """Same as ``pd.Panel.transpose``; ``axes`` are numbers or names of axes. No copy is made."""
+        axes = [self._axis_number(axis) for axis in axes]
+        return Cube(self.values.transpose(axes), *[self._labels[i] for i in axes])
+
+    def reindex(self, items=None, major_axis=None, minor_axis=None):
+        """Conform the cube to new labels; missing labels are filled with NaN."""
+        values, labels = self.values, list(self._labels)
+        for i, new in enumerate((items, major_axis, minor_axis)):
+            if new is None:
+                continue
+            new = pd.Index(new)
+            if new.equals(labels[i]):
+                continue
+            indexer = labels[i].get_indexer(new)
+            if values.dtype.kind not in 'fc' and (indexer == -1).any():
+                values = values.astype(float)
+            values = values.take(indexer, axis=i)
+            if (indexer == -1).any():
+                slices = [slice(None)] * 3
+                slices[i] = indexer == -1
+                values[tuple(slices)] = np.nan
+            labels[i] = new
+        return Cube(values, *labels)
+
+    def to_panel(self):
+        """Convert into a ``pd.Panel``."""
+        return pd.Panel(self.values, items=self.items, major_axis=self.major_axis, minor_axis=self.minor_axis)
+
+    def __repr__(self):
+        lines = ['<{}>'.format(self.__class__.__name__),
+                 'Dimensions: {} (items) x {} (major_axis) x {} (minor_axis)'.format(*self.shape)]
+        for name, labels in zip(self._axes, self._labels):
+            if len(labels):
+                lines.append('{} axis: {} to {}'.format(name.replace('_axis', '').capitalize(), labels[0], labels[-1]))
+            else:
+                lines.append('{} axis: None'.format(name.replace('_axis', '').capitalize()))
+        return '\n'.join(lines)
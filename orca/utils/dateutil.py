@@ -6,6 +6,7 @@ import bisect
 from datetime import datetime, timedelta, time
 from calendar import monthrange
 
+import numpy as np
 import pandas as pd
 
 def to_pddatetime(dates):
@@ -31,6 +32,25 @@ def to_dateint(dates):
     except:
         return [int(date) for date in dates]
 
+def to_timedelta(times):
+    """Change a sequence of 'hhmmss' time strings into ndarray of type ``timedelta64[s]``."""
+    return np.array([int(t[:2])*3600+int(t[2:4])*60+int(t[4:6]) for t in times]).astype('timedelta64[s]')
+
+def combine_datetime(dates, times, outer=False):
+    """Combine dates and 'hhmmss' time strings into DatetimeIndex without formatting and parsing strings.
+
+    :param boolean outer: Whether to combine each item in ``dates`` with each item in ``times``(with dates as the
+       slower-changing level); otherwise items in ``dates`` and ``times`` are paired. Default: False
+    """
+    if outer:
+        days = pd.to_datetime(to_datestr(dates), format='%Y%m%d').values
+        deltas = to_timedelta(times)
+        return pd.DatetimeIndex((days[:, np.newaxis] + deltas[np.newaxis, :]).ravel())
+    udates, dinv = np.unique(to_datestr(dates), return_inverse=True)
+    utimes, tinv = np.unique(list(times), return_inverse=True)
+    days = pd.to_datetime(list(udates), format='%Y%m%d').values
+    return pd.DatetimeIndex(days[dinv] + to_timedelta(utimes)[tinv])
+
 def is_sorted(l, ascending=True):
     """Check if a list is sorted."""
     if ascending:
@@ -59,6 +79,8 @@ def parse_date(dates, date, direction=1):
     :param int direction: 1(default): the desired item >= ``date``;-1: the desired item <= ``date``
     :returns: (i, dates[i]), ``i`` is the index of the desired item in ``dates``
     """
+    if isinstance(dates, TradingCalendar):
+        return dates.locate(date, direction)
     if date in dates:
         return dates.index(date), date
 
@@ -67,6 +89,137 @@ def parse_date(dates, date, direction=1):
     else:
         return find_ge(dates, date)
 
+
+class TradingCalendar(object):
+    """Read-only list of trading dates(sorted in ascending order) with a hash index.
+
+    Lookup of a date is O(1) instead of a linear scan by ``list.index``, and dates not in the calendar are
+    located by binary search. It can be used wherever a list of dates is expected.
+
+    :param dates: Sequence of dates; it may be lazy(for example, :py:class:`orca.database.LazySequence`), as it is only read on first use
+    """
+
+    def __init__(self, dates):
+        self._source = dates
+        self._dates, self._index, self._array = None, None, None
+
+    def resolve(self):
+        """Return the underlying list."""
+        if self._dates is None:
+            dates = list(self._source)
+            self._index = {date: i for i, date in enumerate(dates)}
+            self._array = np.array(dates)
+            self._array.flags.writeable = False
+            self._dates = dates
+        return self._dates
+
+    def refresh(self):
+        """Discard the resolved list, so that it will be reloaded from the source on next use."""
+        if hasattr(self._source, 'refresh'):
+            self._source.refresh()
+        self._dates, self._index, self._array = None, None, None
+
+    @property
+    def array(self):
+        """Dates as a read-only ndarray."""
+        self.resolve()
+        return self._array
+
+    def index(self, date):
+        """Same as ``list.index``, but O(1)."""
+        self.resolve()
+        try:
+            return self._index[date]
+        except (KeyError, TypeError):
+            raise ValueError('{0!r} is not in the calendar'.format(date))
+
+    def locate(self, date, direction=1):
+        """Same as :py:func:`parse_date` on this calendar.
+
+        :returns: (i, self[i])
+        """
+        self.resolve()
+        i = self._index.get(date)
+        if i is not None:
+            return i, date
+        if direction == -1:
+            return find_le(self._dates, date)
+        return find_ge(self._dates, date)
+
+    def locate_many(self, dates, direction=1):
+        """Vectorized version of :py:meth:`locate` that returns only the indices.
+
+        :param dates: Sequence of dates in any format accepted by :py:func:`to_datestr`
+        :returns: ndarray of int; it is -1(when ``direction`` is -1) or ``len(self)``(otherwise) for dates that cannot be located
+        """
+        dates = to_datestr(dates)
+        if direction == -1:
+            return np.searchsorted(self.array, dates, side='right') - 1
+        return np.searchsorted(self.array, dates, side='left')
+
+    def shift(self, date, n, direction=-1):
+        """Shift ``date``(first located by ``direction``) by ``n`` trading days; backward if ``n`` is negative.
+
+        :raises: ValueError when the result is out of the calendar
+        """
+        i = self.locate(date, direction)[0] + n
+        if i < 0 or i >= len(self._dates):
+            raise ValueError('Cannot shift {0!r} by {1} in the calendar'.format(date, n))
+        return self._dates[i]
+
+    def offset(self, startdate, enddate):
+        """Number of trading days from ``startdate`` to ``enddate``; both must be trading days."""
+        return self.index(enddate) - self.index(startdate)
+
+    def __len__(self):
+        return len(self.resolve())
+
+    def __getitem__(self, key):
+        return self.resolve()[key]
+
+    def __getslice__(self, i, j):
+        return self.resolve()[i:j]
+
+    def __iter__(self):
+        return iter(self.resolve())
+
+    def __reversed__(self):
+        return reversed(self.resolve())
+
+    def __contains__(self, date):
+        self.resolve()
+        try:
+            return date in self._index
+        except TypeError:
+            return False
+
+    def __add__(self, other):
+        return self.resolve() + list(other)
+
+    def __radd__(self, other):
+        return list(other) + self.resolve()
+
+    def __eq__(self, other):
+        return self.resolve() == list(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __array__(self, dtype=None):
+        return self.array if dtype is None else self.array.astype(dtype)
+
+    def __reduce__(self):
+        return (TradingCalendar, (self.resolve(),))
+
+    def __repr__(self):
+        return repr(self.resolve())
+
+    def count(self, date):
+        return int(date in self)
+
+
 def compliment_datestring(datestr, direction=-1, date_check=False):
     """Compliment a 4- or 6-length date string into 8-length in format ``yyyymmdd``.
 
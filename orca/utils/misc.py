@@ -17,40 +17,40 @@ def name2industry(pdobj):
     pdobj.index = [name_ind[name] for name in pdobj.index]
     return pdobj
 
+import numpy as np
 import pandas as pd
 
-from orca import DATES
 from orca.mongo.quote import QuoteFetcher
+from orca.mongo.base import KDayFetcher
 quote_fetcher = QuoteFetcher(datetime_index=True)
 
 import dateutil
+from cube import Cube
 
 def fetch_returns(dt_index, rshift, lshift=-1):
-    res = {}
-    for dt, date in zip(dt_index, dateutil.to_datestr(dt_index)):
-        di, date = dateutil.parse_date(DATES, date, -1)
-        if di-lshift < 0 or di+rshift+1 > len(DATES):
-            continue
-        r = quote_fetcher.fetch_window('returns', DATES[di-lshift: di+rshift+1])
-        res[dt] = (1+r).cumprod().iloc[-1]-1.
-    res = pd.DataFrame(res).T
-    return res
+    """Compounded returns over the window ``[di-lshift, di+rshift]`` around each date, with only one query."""
+    dates, offsets, window = KDayFetcher.locate_dates(dt_index, rshift, lshift)
+    if not dates:
+        return pd.DataFrame()
+    ret = quote_fetcher.fetch_window('returns', window, datetime_index=False).reindex(index=window)
+    logs = np.log1p(ret.fillna(0).values)
+    cums = np.vstack([np.zeros((1, logs.shape[1])), logs.cumsum(axis=0)])
+    ends = offsets + rshift+lshift+1
+    res = np.expm1(cums[ends] - cums[offsets])
+    res[ret.isnull().values[ends-1]] = np.nan
+    return pd.DataFrame(res, index=dates, columns=ret.columns)
 
 def fetch_dates(df, dt_index, rshift=0, lshift=0):
-    df_dates = dateutil.to_datestr(dt_index)
-    res = {}
-    for dt, date in zip(dt_index, dateutil.to_datestr(dt_index)):
-        try:
-            di, date = dateutil.parse_date(df_dates, date, -1)
-            assert di-lshift >= 0 and di+rshift+1 <= len(df_dates)
-            if rshift+lshift == 0:
-                res[dt] = df.iloc[di-lshift]
-            else:
-                res[dt] = df.iloc[di-lshift:di+rshift+1]
-        except ValueError:
-            pass
-        except Exception, e:
-            raise e
+    """Slice windows ``[di-lshift, di+rshift]`` out of ``df``, where ``di`` is the position of the last row on or before each date.
+
+    :returns: DataFrame(when ``rshift+lshift == 0``) or :py:class:`orca.utils.cube.Cube` with items in ``dt_index`` as items
+    """
+    df_dates = np.asarray(dateutil.to_datestr(df.index))
+    dis = np.searchsorted(df_dates, dateutil.to_datestr(dt_index), side='right') - 1
+    valid = (dis >= 0) & (dis-lshift >= 0) & (dis+rshift+1 <= len(df_dates))
+    dates = [dt for dt, v in zip(dt_index, valid) if v]
+    starts = dis[valid] - lshift
     if rshift+lshift == 0:
-        res = pd.DataFrame(res).T
-    return res
+        return pd.DataFrame(df.values[starts], index=dates, columns=df.columns)
+    idx = starts[:, np.newaxis] + np.arange(rshift+lshift+1)
+    return Cube(df.values[idx], dates, range(-lshift, rshift+1), df.columns)
@@ -7,33 +7,109 @@ logbook.set_datetime_format('local')
 
 logger = logbook.Logger('parallel')
 
+import threading
 import multiprocessing
 
+from orca import database
+from orca.utils import shared
+
+_predicate = None
+_score = None
+
+def init_worker(root=None, predicate=None, score=None):
+    """Initializer of worker processes: forget MongoDB clients of the parent, attach to shared panels in ``root``
+    and keep ``predicate`` for :py:func:`accept` and ``score`` for :py:func:`worker_score`."""
+    global _predicate, _score
+    database.reset()
+    if root is not None:
+        shared.attach(root)
+    _predicate, _score = predicate, score
+
+def make_pool(threads, inputs=None, predicate=None, score=None):
+    """Create a pool of processes; ``inputs``(a ``dict`` of name -> DataFrame) are saved once and opened by workers
+    as read-only memory-mapped DataFrames through :py:func:`orca.utils.shared.get`.
+
+    :param function predicate: Evaluated in workers by :py:func:`accept`; it is passed at fork time, thus needs not be picklable. Default: None
+    :param function score: Evaluated in workers by :py:func:`worker_score`; passed as ``predicate``. Default: None
+    :returns: tuple (pool, panels); ``panels`` is None if ``inputs`` is empty
+    """
+    panels = shared.share(inputs) if inputs else None
+    pool = multiprocessing.Pool(threads, initializer=init_worker, initargs=(panels and panels.root, predicate, score))
+    return pool, panels
+
+def close_pool(pool, panels, terminate=False):
+    if terminate:
+        pool.terminate()
+    else:
+        pool.close()
+    pool.join()
+    if panels is not None:
+        panels.close()
+        shared.detach()
+
+def stream(pool, panels, func, iterable, size, close=True):
+    """Yield results of ``func`` on items of ``iterable`` in **unordered** manner as soon as they arrive.
+
+    Tasks are submitted only while less than ``size`` results are pending(being computed or waiting to be
+    consumed), so memory is bounded by ``size`` rather than the length of ``iterable``. The pool is closed(or
+    terminated if the consumer stops early) at the end.
+
+    :param boolean close: Whether to close the pool when all results are consumed; set it to False to reuse the pool. Default: True
+    """
+    semaphore, stopped = threading.Semaphore(size), []
+
+    def tasks():
+        iterator = iter(iterable)
+        while True:
+            semaphore.acquire()
+            if stopped:
+                return
+            try:
+                task = next(iterator)
+            except StopIteration:
+                return
+            yield task
+
+    done = False
+    try:
+        for res in pool.imap_unordered(func, tasks()):
+            yield res
+            semaphore.release()
+        done = True
+    finally:
+        if not done:
+            stopped.append(True)
+            for _ in range(size):
+                semaphore.release()
+        if close or not done:
+            close_pool(pool, panels, terminate=not done)
+
 def worker(args):
     alpha, param, startdate, enddate = args
     alpha = alpha(param)
     alpha.run(startdate, enddate)
     return (param, alpha.get_alphas())
 
-def run(alpha, params, startdate, enddate, threads=multiprocessing.cpu_count()):
+def run(alpha, params, startdate, enddate, threads=multiprocessing.cpu_count(), inputs=None):
     """Execute instances of an alpha in parallel and returns DataFrame in **unordered** manner.
 
     :param alpha: :py:class:`orca.alpha.base.BacktestingAlpha`
     :param params: Set of parameters to instantiate alpha object, or an iterable object
     :param threads: Number of threads to use in parallel execution
-    :returns: An iterator to get tuple (param, DataFrames). **The returned result may in the same order as ``params``**
+    :param dict inputs: DataFrames shared by all workers; see :py:func:`make_pool`. Default: None
+    :returns: An iterator to get tuple (param, DataFrames) as soon as each is ready. **The returned result may not be in the same order as ``params``**
     """
     iterobj = ((alpha, param, startdate, enddate) for param in params)
-    pool = multiprocessing.Pool(threads)
-    res = pool.imap_unordered(worker, iterobj)
-    pool.close()
-    pool.join()
-
-    return res
+    pool, panels = make_pool(threads, inputs)
+    return stream(pool, panels, worker, iterobj, 2*threads)
 
 import os
+import time
 import shutil
+from itertools import product, izip
 import json
+import hashlib
+import traceback
 import cPickle
 import msgpack
 
@@ -41,93 +117,291 @@ import pandas as pd
 import warnings
 warnings.simplefilter(action = "ignore", category = pd.io.pytables.PerformanceWarning)
 
+import numpy as np
+
 from orca.perf.performance import Performance
+from orca.alpha.base import AlphaBase
+
+def accept(alpha):
+    """Evaluate the predicate given to :py:func:`make_pool` on ``alpha``(a DataFrame) in the worker."""
+    return _predicate is None or _predicate(Performance(alpha))
+
+def param_key(alpha, param, startdate, enddate):
+    """Return a key determined by the content of a task: class of ``alpha``, ``param`` and dates."""
+    content = json.dumps([alpha.__module__, alpha.__name__, param, str(startdate), str(enddate)],
+                         sort_keys=True, default=repr)
+    return 'alpha_' + hashlib.sha1(content).hexdigest()[:16]
+
+
+class Manifest(object):
+    """Status of each task of a sweep, in an append-only file of JSON lines; the last line of a key wins.
+
+    :param str fpath: Path of the file
+    :param boolean resume: When it is False, the existing file is removed. Default: False
+    """
+
+    def __init__(self, fpath, resume=False):
+        self.fpath = fpath
+        self.entries = {}
+        if not resume:
+            if os.path.exists(fpath):
+                os.remove(fpath)
+        elif os.path.exists(fpath):
+            with open(fpath) as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.entries[entry['key']] = entry
+
+    def finished(self, key):
+        """Whether the task is done or its result rejected by predicate; failed tasks are not finished."""
+        return key in self.entries and self.entries[key]['status'] in ('done', 'rejected')
+
+    def update(self, key, param, status, error=None):
+        """Record status('done', 'rejected' or 'failed') of a task."""
+        entry = {'key': key, 'param': param, 'status': status, 'error': error,
+                 'time': time.strftime('%Y-%m-%d %H:%M:%S')}
+        self.entries[key] = entry
+        with open(self.fpath, 'a') as file:
+            file.write(json.dumps(entry, default=repr)+'\n')
+            file.flush()
+            os.fsync(file.fileno())
+
+    def params(self, status='done'):
+        """Return ``dict`` of key -> param of tasks with ``status``."""
+        return {key: entry['param'] for key, entry in self.entries.iteritems() if entry['status'] == status}
+
+
+class Progress(object):
+    """Log progress, throughput and ETA of a sweep."""
+
+    def __init__(self, total, logger):
+        self.total, self.logger = total, logger
+        self.count, self.start = 0, time.time()
+
+    def update(self):
+        self.count += 1
+        elapsed = time.time() - self.start
+        rate = self.count / elapsed if elapsed else 0.
+        eta = (self.total - self.count) / rate if rate else 0.
+        self.logger.info('Progress: {}/{} ({:.1%}), {:.2f} alphas/min, ETA {}'.format(
+            self.count, self.total, self.count / float(self.total), rate * 60,
+            time.strftime('%H:%M:%S', time.gmtime(eta))))
+
+
+def _tasks(alpha, params, startdate, enddate, manifest, logger):
+    """Return tasks of ``params`` not yet finished according to ``manifest``."""
+    tasks, skipped = [], 0
+    for param in params:
+        key = param_key(alpha, param, startdate, enddate)
+        if manifest.finished(key):
+            skipped += 1
+            continue
+        tasks.append((key, alpha, param, startdate, enddate))
+    if skipped:
+        logger.info('Skipped {} finished parameters, {} to run'.format(skipped, len(tasks)))
+    return tasks
 
 def worker_hdf(args):
-    i, alpha, param, startdate, enddate = args
-    alpha = alpha(**param)
-    alpha.run(startdate, enddate)
-    alpha = alpha.get_alphas()
-    return i, param, alpha
+    """Run a task; returns tuple (key, param, DataFrame or None if rejected, error message or None)."""
+    key, alpha, param, startdate, enddate = args
+    try:
+        alpha = alpha(**param)
+        alpha.run(startdate, enddate)
+        alpha = alpha.get_alphas()
+        if not accept(alpha):
+            return key, param, None, None
+        return key, param, alpha, None
+    except Exception:
+        return key, param, None, traceback.format_exc()
+
+worker_separate_file = worker_hdf
 
-def run_hdf(store, alpha, params, startdate, enddate, predicate=None, threads=multiprocessing.cpu_count()):
+def _record(manifest, progress, logger, key, param, alpha, error):
+    if error is not None:
+        manifest.update(key, param, 'failed', error)
+        logger.error('Failed with parameter: {!r}\n{}'.format(param, error))
+    elif alpha is None:
+        manifest.update(key, param, 'rejected')
+    else:
+        manifest.update(key, param, 'done')
+        logger.debug('Saved alpha with parameter: {!r}'.format(param))
+    progress.update()
+
+def run_hdf(store, alpha, params, startdate, enddate, predicate=None, threads=multiprocessing.cpu_count(), inputs=None,
+        resume=False):
     """Execute instances of an alpha in parallel and stores DataFrame in HDF5 file. Each item in params should be a ``dict``.
 
+    Each DataFrame is stored under the key returned by :py:func:`param_key`, and its parameter in table ``params``
+    indexed by the key; status of each parameter is kept in :py:class:`Manifest` ``store + '.manifest'``.
+
     :param store: File path of the to-be-created HDFStore
     :param function predicate: A function with :py:class:`orca.perf.performance.Performance` object as the only parameter; for example: ``lambda x: x.get_original().get_ir() > 0.1``. Default: None
+    :param dict inputs: DataFrames shared by all workers; see :py:func:`make_pool`. Default: None
+    :param boolean resume: Whether to keep the existing store and only run parameters which are missing or failed. Default: False
     """
-    if os.path.exists(store):
+    manifest = Manifest(store+'.manifest', resume=resume)
+    if not resume and os.path.exists(store):
         os.remove(store)
     logger = logbook.Logger(store)
     store = pd.HDFStore(store)
 
-    iterobj = ((i, alpha, param, startdate, enddate) for i, param in enumerate(params))
-    pool = multiprocessing.Pool(threads)
-    res = pool.imap_unordered(worker_hdf, iterobj)
-    pool.close()
-    pool.join()
-    for i, param, alpha in res:
-        if predicate is not None and not predicate(Performance(alpha)):
-            continue
-        store['alpha'+str(i)] = alpha
-        store.append('params', pd.DataFrame({i: param}).T)
-        store.flush()
-        logger.debug('Saving alpha with parameter: {!r}'.format(param))
-    store.close()
-
-def worker_separate_file(args):
-    i, alpha, param, startdate, enddate = args
-    alpha = alpha(**param)
-    alpha.run(startdate, enddate)
-    alpha = alpha.get_alphas()
-    return i, param, alpha
+    tasks = _tasks(alpha, params, startdate, enddate, manifest, logger)
+    progress = Progress(len(tasks), logger)
+    pool, panels = make_pool(threads, inputs, predicate)
+    try:
+        for key, param, alpha, error in stream(pool, panels, worker_hdf, tasks, 2*threads):
+            if alpha is not None:
+                store[key] = alpha
+                store.append('params', pd.DataFrame({key: param}).T)
+                store.flush()
+            _record(manifest, progress, logger, key, param, alpha, error)
+    finally:
+        store.close()
 
-def run_separate_file(outdir, alpha, params, startdate, enddate, predicate=None, threads=multiprocessing.cpu_count(), ftype='csv'):
+def run_separate_file(outdir, alpha, params, startdate, enddate, predicate=None, threads=multiprocessing.cpu_count(), ftype='csv', inputs=None,
+        resume=False):
     """Execute instances of an alpha in parallel and stores each DataFrame in separate file. Each item in params should be a ``dict``.
 
+    Each DataFrame is stored in the file named by :py:func:`param_key`; status of each parameter is kept in
+    :py:class:`Manifest` ``manifest`` in ``outdir``, and parameters of stored DataFrames in ``params.json``.
+
     :param outdir: Diretory to store output files
     :param function predicate: A function with :py:class:`orca.perf.performance.Performance` object as the only parameter; for example: ``lambda x: x.get_original().get_ir() > 0.1``. Default: None
     :param str ftype: File format; currently only supports ('csv', 'pickle', 'msgpack')
+    :param dict inputs: DataFrames shared by all workers; see :py:func:`make_pool`. Default: None
+    :param boolean resume: Whether to keep the existing directory and only run parameters which are missing or failed. Default: False
     """
-    if os.path.exists(outdir) and os.path.isdir(outdir):
+    if not resume and os.path.exists(outdir) and os.path.isdir(outdir):
         shutil.rmtree(outdir)
     logger = logbook.Logger(outdir)
-    os.makedirs(outdir)
+    if not os.path.exists(outdir):
+        os.makedirs(outdir)
+    manifest = Manifest(os.path.join(outdir, 'manifest'), resume=resume)
 
-    iterobj = ((i, alpha, param, startdate, enddate) for i, param in enumerate(params))
-    pool = multiprocessing.Pool(threads)
-    res = pool.imap_unordered(worker_hdf, iterobj)
-    pool.close()
-    pool.join()
-    params = {}
-    for i, param, alpha in res:
-        if predicate is not None and not predicate(Performance(alpha)):
-            continue
-        params[i] = param
-        logger.debug('Saving alpha with parameter: {!r}'.format(param))
-        if ftype == 'csv':
-            alpha.to_csv(os.path.join(outdir, 'alpha'+str(i)))
-        elif ftype == 'pickle':
-            alpha.to_pickle(os.path.join(outdir, 'alpha'+str(i)))
-        elif ftype == 'msgpack':
-            alpha.to_msgpack(os.path.join(outdir, 'alpha'+str(i)))
+    tasks = _tasks(alpha, params, startdate, enddate, manifest, logger)
+    progress = Progress(len(tasks), logger)
+    pool, panels = make_pool(threads, inputs, predicate)
+    try:
+        for key, param, alpha, error in stream(pool, panels, worker_separate_file, tasks, 2*threads):
+            if alpha is not None:
+                if ftype == 'csv':
+                    alpha.to_csv(os.path.join(outdir, key))
+                elif ftype == 'pickle':
+                    alpha.to_pickle(os.path.join(outdir, key))
+                elif ftype == 'msgpack':
+                    alpha.to_msgpack(os.path.join(outdir, key))
+            _record(manifest, progress, logger, key, param, alpha, error)
+    finally:
+        params = manifest.params()
+        with open(os.path.join(outdir, 'params.json'), 'w') as file:
+            if ftype == 'csv':
+                json.dump(params, file)
+            elif ftype == 'pickle':
+                cPickle.dump(params, file)
+            elif ftype == 'msgpack':
+                msgpack.dump(params, file)
+
+def run_csv(outdir, alpha, params, startdate, enddate, predicate=None, threads=multiprocessing.cpu_count(), inputs=None, resume=False):
+    return run_separate_file(outdir, alpha, params, startdate, enddate, predicate=None, threads=multiprocessing.cpu_count(), ftype='csv', inputs=inputs, resume=resume)
+
+def run_pickle(outdir, alpha, params, startdate, enddate, predicate=None, threads=multiprocessing.cpu_count(), inputs=None, resume=False):
+    return run_separate_file(outdir, alpha, params, startdate, enddate, predicate=None, threads=multiprocessing.cpu_count(), ftype='pickle', inputs=inputs, resume=resume)
 
-    with open(os.path.join(outdir, 'params.json'), 'w') as file:
-        if ftype == 'csv':
-            json.dump(params, file)
-        elif ftype == 'pickle':
-            cPickle.dump(params, file)
-        elif ftype == 'msgpack':
-            msgpack.dump(params, file)
+def run_msgpack(outdir, alpha, params, startdate, enddate, predicate=None, threads=multiprocessing.cpu_count(), inputs=None, resume=False):
+    return run_separate_file(outdir, alpha, params, startdate, enddate, predicate=None, threads=multiprocessing.cpu_count(), ftype='msgpack', inputs=inputs, resume=resume)
 
-def run_csv(outdir, alpha, params, startdate, enddate, predicate=None, threads=multiprocessing.cpu_count()):
-    return run_separate_file(outdir, alpha, params, startdate, enddate, predicate=None, threads=multiprocessing.cpu_count(), ftype='csv')
 
-def run_pickle(outdir, alpha, params, startdate, enddate, predicate=None, threads=multiprocessing.cpu_count()):
-    return run_separate_file(outdir, alpha, params, startdate, enddate, predicate=None, threads=multiprocessing.cpu_count(), ftype='pickle')
+def score_ir(alpha):
+    """Default score in parameter search: IR of the alpha."""
+    return Performance(alpha).get_original().get_ir()
+
+def worker_score(args):
+    """Run a task and score it; returns tuple (key, param, score or None, error message or None)."""
+    key, alpha, param, startdate, enddate = args
+    try:
+        alpha = alpha(**param)
+        alpha.run(startdate, enddate)
+        score = (_score or score_ir)(alpha.get_alphas())
+        return key, param, None if pd.isnull(score) else float(score), None
+    except Exception:
+        return key, param, None, traceback.format_exc()
+
+def sample_params(space, n, seed=None):
+    """Random search: draw at most ``n`` distinct parameters from ``space``.
+
+    :param dict space: Mapping of name to either a list of values or a function to draw a value with a ``np.random.RandomState`` object
+    :returns: List of ``dict``; the full grid if ``space`` has only lists and at most ``n`` combinations
+    """
+    names = sorted(space)
+    if not any(callable(space[name]) for name in names):
+        total = np.prod([len(space[name]) for name in names])
+        if total <= n:
+            return [dict(izip(names, values)) for values in product(*[space[name] for name in names])]
+    rng = np.random.RandomState(seed)
+    params, seen = [], set()
+    for _ in xrange(100 * n):
+        if len(params) == n:
+            break
+        param = {}
+        for name in names:
+            values = space[name]
+            param[name] = values(rng) if callable(values) else values[rng.randint(len(values))]
+        key = json.dumps(param, sort_keys=True, default=repr)
+        if key not in seen:
+            seen.add(key)
+            params.append(param)
+    return params
 
-def run_msgpack(outdir, alpha, params, startdate, enddate, predicate=None, threads=multiprocessing.cpu_count()):
-    return run_separate_file(outdir, alpha, params, startdate, enddate, predicate=None, threads=multiprocessing.cpu_count(), ftype='msgpack')
+def successive_halving(alpha, params, startdate, enddate, eta=3, min_days=60, score=None,
+        threads=multiprocessing.cpu_count(), inputs=None):
+    """Evaluate ``params`` on short periods first and promote only the best ``1/eta`` of them to periods ``eta``
+    times longer, until the full period from ``startdate`` to ``enddate``.
+
+    Periods are the most recent part of the full period, the shortest one having at least ``min_days`` trading days.
+    Thus with ``eta=3`` and 3 rungs, 81 candidates cost about as much as 81/9 + 27/3 + 9 = 27 full runs.
+
+    :param list params: List of ``dict`` to instantiate alpha objects
+    :param function score: Function of an alpha DataFrame to be maximized; evaluated in workers. Default: None, defaults to :py:func:`score_ir`
+    :returns: List of tuple (score, param) of candidates in the last rung, best first
+    """
+    dates = AlphaBase.generate_dates(startdate, enddate)
+    rungs = 1
+    while len(dates) / eta**rungs >= min_days:
+        rungs += 1
+
+    candidates = list(params)
+    pool, panels = make_pool(threads, inputs, score=score)
+    try:
+        for rung in range(rungs):
+            start = dates[-max(int(len(dates) / eta**(rungs-1-rung)), 1)]
+            tasks = [(param_key(alpha, param, start, dates[-1]), alpha, param, start, dates[-1]) for param in candidates]
+            results = []
+            for key, param, value, error in stream(pool, panels, worker_score, tasks, 2*threads, close=False):
+                if error is not None:
+                    logger.error('Failed with parameter: {!r}\n{}'.format(param, error))
+                elif value is not None:
+                    results.append((value, param))
+            results.sort(key=lambda x: x[0], reverse=True)
+            logger.info('Rung {}/{}: {} candidates from {} to {}, best score {}'.format(
+                rung+1, rungs, len(tasks), start, dates[-1], results[0][0] if results else None))
+            if rung < rungs-1:
+                candidates = [param for _, param in results[:int(np.ceil(len(results) / float(eta)))]]
+    finally:
+        close_pool(pool, panels)
+    return results
+
+def search(alpha, space, startdate, enddate, n=100, eta=3, min_days=60, seed=None, **kwargs):
+    """Random search of ``n`` parameters in ``space``(see :py:func:`sample_params`) with
+    :py:func:`successive_halving`; ``kwargs`` are passed to the latter.
+
+    :returns: List of tuple (score, param), best first
+    """
+    params = sample_params(space, n, seed=seed)
+    logger.info('Searching {} parameters'.format(len(params)))
+    return successive_halving(alpha, params, startdate, enddate, eta=eta, min_days=min_days, **kwargs)
 
 
 def worker_daily(args):
@@ -140,7 +414,7 @@ def run_daily(alpha, startdate, enddate, dates=None, threads=multiprocessing.cpu
     if dates is None:
         dates = alpha.generate_dates(startdate, enddate)
 
-    pool = multiprocessing.Pool(threads)
+    pool = multiprocessing.Pool(threads, initializer=database.reset)
     res = pool.imap_unordered(worker_daily, ((alpha, date) for date in dates))
     pool.close()
     pool.join()
@@ -160,7 +434,7 @@ def run_interval(alpha, startdate, enddate, dates=None, threads=multiprocessing.
     if dates is None:
         dates = alpha.generate_dates(startdate, enddate)
 
-    pool = multiprocessing.Pool(threads)
+    pool = multiprocessing.Pool(threads, initializer=database.reset)
     res = pool.imap_unordered(worker_interval, ((alpha, date) for date in dates))
     pool.close()
     pool.join()
@@ -175,7 +449,7 @@ def worker_chunk(args):
 
 def run_chunk(alpha, startdate, enddate, chksize, args=(), threads=multiprocessing.cpu_count()):
     if chksize > 1:
-        pool = multiprocessing.Pool(threads)
+        pool = multiprocessing.Pool(threads, initializer=database.reset)
         res = pool.imap_unordered(worker_chunk, ((alpha, (dates,) + args) for dates in alpha.generate_dates(startdate, enddate, chksize)))
         pool.close()
         pool.join()
@@ -0,0 +1,126 @@
+"""
+.. moduleauthor:: Li, Wang <wangziqi@foreseefund.com>
+
+Read-only input panels shared by worker processes.
+
+The parent process saves each DataFrame once into a directory; workers(and the parent itself) open numeric ones as
+read-only memory-mapped arrays, so that N workers share one copy of data in the page cache instead of fetching and
+holding N copies.
+
+.. code-block:: python
+
+   from orca.mongo.quote import QuoteFetcher
+   from orca.utils import parallel, shared
+
+   close = QuoteFetcher().fetch('close', '20100101')
+
+   class MyAlpha(BacktestingAlpha):
+
+       def __init__(self, n):
+           super(MyAlpha, self).__init__()
+           self.close = shared.get('close')
+           ...
+
+   parallel.run(MyAlpha, range(200), '20110101', '20141231', inputs={'close': close})
+"""
+
+import os
+import shutil
+import tempfile
+import cPickle
+
+import numpy as np
+import pandas as pd
+
+
+class SharedPanels(object):
+    """Named DataFrames stored once on disk and opened as read-only memory-mapped arrays in each process.
+
+    Numeric DataFrames are saved as ``.npy`` files and memory-mapped on access; others are pickled and loaded
+    into memory of each process.
+
+    :param str root: Directory of the files; when it is None, a temporary directory is created, which is removed by :py:meth:`close`. Default: None
+    """
+
+    def __init__(self, root=None):
+        self.owner = root is None
+        self.root = tempfile.mkdtemp(prefix='orca-shared-') if root is None else root
+        self._frames = {}
+
+    def _path(self, name, ext):
+        return os.path.join(self.root, name+ext)
+
+    def add(self, name, df):
+        """Save ``df`` under ``name``."""
+        self._frames.pop(name, None)
+        values = df.values
+        mmap = values.dtype.kind in 'biuf'
+        if mmap:
+            np.save(self._path(name, '.npy'), np.ascontiguousarray(values))
+        else:
+            df.to_pickle(self._path(name, '.pkl'))
+        with open(self._path(name, '.meta'), 'wb') as file:
+            cPickle.dump((df.index, df.columns, mmap), file, cPickle.HIGHEST_PROTOCOL)
+
+    def __contains__(self, name):
+        return name in self._frames or os.path.exists(self._path(name, '.meta'))
+
+    def __getitem__(self, name):
+        if name not in self._frames:
+            if name not in self:
+                raise KeyError(name)
+            with open(self._path(name, '.meta'), 'rb') as file:
+                index, columns, mmap = cPickle.load(file)
+            if mmap:
+                values = np.load(self._path(name, '.npy'), mmap_mode='r')
+                self._frames[name] = pd.DataFrame(values, index=index, columns=columns, copy=False)
+            else:
+                self._frames[name] = pd.read_pickle(self._path(name, '.pkl'))
+        return self._frames[name]
+
+    def names(self):
+        return sorted(fname[:-5] for fname in os.listdir(self.root) if fname.endswith('.meta'))
+
+    def close(self):
+        """Forget opened DataFrames; remove the directory if it was created by this object."""
+        self._frames = {}
+        if self.owner and os.path.exists(self.root):
+            shutil.rmtree(self.root)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+_panels = None
+
+def share(inputs):
+    """Save ``inputs``, a ``dict`` of name -> DataFrame, into a new :py:class:`SharedPanels` object and attach
+    the current process to it.
+
+    :returns: The :py:class:`SharedPanels` object; call its :py:meth:`SharedPanels.close` when workers are done
+    """
+    global _panels
+    panels = SharedPanels()
+    for name, df in inputs.iteritems():
+        panels.add(name, df)
+    _panels = panels
+    return panels
+
+def attach(root):
+    """Attach the current process to panels saved in ``root``. Use it in initializer of ``multiprocessing.Pool``."""
+    global _panels
+    _panels = SharedPanels(root)
+
+def detach():
+    global _panels
+    _panels = None
+
+def get(name, default=None):
+    """Return the shared DataFrame ``name``, or ``default`` if the current process is not attached or there is
+    no such DataFrame."""
+    if _panels is None or name not in _panels:
+        return default
+    return _panels[name]
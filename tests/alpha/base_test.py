@@ -2,17 +2,28 @@
 .. moduleauthor:: Li, Wang <wangziqi@foreseefund.com>
 """
 
+import os
+import shutil
+import tempfile
 import logging
 import unittest
 
 import numpy as np
 import pandas as pd
 
-from orca import SIDS
+from orca import (
+        DATES,
+        SIDS,
+        )
 from orca.alpha import (
         AlphaBase,
         BacktestingAlpha,
         ProductionAlpha)
+from orca.alpha.base import (
+        AlphaAccumulator,
+        IntradayFutAlpha,
+        )
+from orca.utils.testing import frames_equal
 
 
 class AlphaBaseDummy(AlphaBase):
@@ -56,6 +67,12 @@ class BacktestingAlphaDummy(BacktestingAlpha):
     def generate(self, date):
         self.alphas[date] = pd.Series(np.random.randn(len(chars)), index=chars)
 
+class BacktestingAlphaSeeded(BacktestingAlpha):
+
+    def generate(self, date):
+        np.random.seed(int(date))
+        self.alphas[date] = pd.Series(np.random.randn(len(chars)), index=chars)
+
 class BacktestingAlphaTestCase(unittest.TestCase):
 
     def setUp(self):
@@ -92,6 +109,134 @@ class BacktestingAlphaTestCase(unittest.TestCase):
         self.assertTrue((alphas.index == self.dates_dt).all()
                 and set(alphas.columns) == set(SIDS))
 
+    def test_run_parallel(self):
+        dates = [d.strftime('%Y%m%d') for d in pd.date_range('20140101', periods=30, freq='B')]
+        self.alpha = BacktestingAlphaSeeded()
+        self.alpha.run(dates=dates)
+        alpha = BacktestingAlphaSeeded()
+        alpha.run(dates=dates, parallel=True, workers=4)
+        self.assertTrue(frames_equal(self.alpha.get_alphas(), alpha.get_alphas()))
+
+    def test_extend(self):
+        fpath = os.path.join(tempfile.mkdtemp(), 'alpha.pickle')
+        try:
+            self.alpha = BacktestingAlphaSeeded()
+            self.alpha.run(dates=DATES[100:120])
+            self.alpha.dump(fpath, ftype='pickle')
+            alpha = BacktestingAlphaSeeded()
+            dates = alpha.extend(fpath, enddate=DATES[129], ftype='pickle')
+            self.assertListEqual(dates, DATES[120:130])
+            self.alpha.run(dates=DATES[120:130])
+            self.alpha._alphas = None
+            self.assertTrue(frames_equal(BacktestingAlpha.read(fpath, 'pickle'), self.alpha.get_alphas()))
+        finally:
+            shutil.rmtree(os.path.dirname(fpath))
+
+    def test_extend_csv_append(self):
+        fpath = os.path.join(tempfile.mkdtemp(), 'alpha.csv')
+        try:
+            self.alpha = BacktestingAlphaSeeded()
+            self.alpha.run(dates=DATES[100:130])
+            alpha = BacktestingAlphaSeeded()
+            alpha.run(dates=DATES[100:120])
+            alpha.dump(fpath)
+            alpha = BacktestingAlphaSeeded()
+            alpha.extend(fpath, enddate=DATES[129])
+            df = BacktestingAlpha.read(fpath)
+            self.assertTrue((df.index == self.alpha.get_alphas().index).all())
+            self.assertTrue(np.allclose(df.fillna(0), self.alpha.get_alphas()[df.columns].fillna(0)))
+        finally:
+            shutil.rmtree(os.path.dirname(fpath))
+
+class AlphaAccumulatorTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.acc = AlphaAccumulator(chars[:20], capacity=2)
+        np.random.seed(SEED)
+        self.df = pd.DataFrame(np.random.randn(5, 20), index=pd.date_range('20140101', periods=5), columns=chars[:20])
+        self.dates = [date.strftime('%Y%m%d') for date in self.df.index]
+
+    def tearDown(self):
+        self.acc = None
+
+    def test_to_frame(self):
+        for date, (_, row) in zip(self.dates, self.df.iterrows()):
+            self.acc[date] = row
+        self.assertTrue(frames_equal(self.acc.to_frame(), self.df))
+
+    def test_to_frame_no_copy(self):
+        for date, (_, row) in zip(self.dates, self.df.iterrows()):
+            self.acc[date] = row
+        self.assertTrue(np.may_share_memory(self.acc.to_frame().values, self.acc.values))
+
+    def test_to_frame_sorted(self):
+        for date, (_, row) in reversed(zip(self.dates, self.df.iterrows())):
+            self.acc[date] = row
+        self.assertTrue(frames_equal(self.acc.to_frame(), self.df))
+
+    def test_partial_and_new_sids(self):
+        self.acc[self.dates[0]] = pd.Series({'a': 1., 'z': 2., 'b': np.inf})
+        self.assertListEqual(list(self.acc.columns), chars[:20]+['z'])
+        self.assertEqual(self.acc[self.dates[0]].to_dict(), {'a': 1., 'z': 2.})
+
+    def test_overwrite_and_delete(self):
+        self.acc[self.dates[0]] = self.df.iloc[0]
+        self.acc[self.dates[1]] = self.df.iloc[1]
+        self.acc[self.dates[0]] = {'a': 1.}
+        self.assertEqual(self.acc[self.dates[0]].to_dict(), {'a': 1.})
+        del self.acc[self.dates[0]]
+        self.assertListEqual(self.acc.keys(), [self.dates[1]])
+        self.assertTrue((self.acc[self.dates[1]] == self.df.iloc[1]).all())
+
+    def test_update(self):
+        other = AlphaAccumulator(chars[:20][::-1])
+        for date, (_, row) in zip(self.dates, self.df.iterrows()):
+            other[date] = row
+        self.acc.update(other)
+        self.assertTrue(frames_equal(self.acc.to_frame(), self.df))
+
+
+class IntradayFutAlphaDummy(IntradayFutAlpha):
+
+    def associate(self, date):
+        np.random.seed(int(date))
+        index = pd.date_range(date+' 09:15', periods=500, freq='500L')
+        self.data = pd.DataFrame({'price': 2000 + np.random.randn(500).cumsum()}, index=index)
+        self._target = self.target(self.data)
+
+    def target(self, data):
+        return np.sign(data['price'].diff(5)).values
+
+    def generate(self, i, dt):
+        price = self.data['price'].iloc[i]
+        if i == len(self.data)-1:
+            self.clear(dt, price)
+        elif not np.isnan(self._target[i]):
+            self.order(dt, price, self._target[i] - self._position)
+
+class IntradayFutAlphaTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.dates = ['20140102', '20140103', '20140106']
+
+    def test_records(self):
+        alpha = IntradayFutAlphaDummy()
+        self.assertIsNone(alpha.records)
+        alpha.run(dates=self.dates)
+        records = alpha.records
+        self.assertListEqual(list(records.columns), ['order', 'pnl', 'position', 'price'])
+        self.assertTrue(np.allclose(records['position'], records['order'].cumsum()))
+
+    def test_vectorized(self):
+        alpha1 = IntradayFutAlphaDummy()
+        alpha1.run(dates=self.dates)
+        alpha2 = IntradayFutAlphaDummy()
+        alpha2.run(dates=self.dates, vectorized=True)
+        self.assertIsInstance(alpha2.records.index, pd.DatetimeIndex)
+        self.assertTrue(frames_equal(alpha1.records, alpha2.records))
+        self.assertTrue(np.allclose(alpha1.pnl, alpha2.pnl))
+        self.assertListEqual(list(alpha1.pnl.index), list(alpha2.pnl.index))
+
 
 return_str = "Inside the call 'generate'"
 
@@ -0,0 +1,81 @@
+"""
+.. moduleauthor:: Li, Wang <wangziqi@foreseefund.com>
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from orca.mongo.quote import QuoteFetcher
+from orca.alpha import ExpressionAlpha
+from orca.alpha.expression import Program
+from orca.operation import api
+from orca.utils.testing import frames_equal
+
+
+class ProgramTestCase(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        self.close = pd.DataFrame(np.random.rand(30, 10) + 1)
+        self.open = pd.DataFrame(np.random.rand(30, 10) + 1)
+
+    def test_common_subexpressions(self):
+        program = Program(['rank(ts_mean(close, 5) / close)', 'ts_mean(close, 5) * 2'])
+        # close, 5, ts_mean, div, rank, 2, mul
+        self.assertEqual(len(program), 7)
+        self.assertListEqual(program.inputs, ['close'])
+
+    def test_commutative(self):
+        program = Program(['close + open', 'open + close'])
+        self.assertEqual(program.outputs[0], program.outputs[1])
+
+    def test_constants_of_different_types(self):
+        program = Program(['close * 1', 'close * True'])
+        self.assertNotEqual(program.outputs[0], program.outputs[1])
+
+    def test_repeated_operand(self):
+        res = Program(['close * close']).evaluate({'close': self.close})
+        self.assertTrue(frames_equal(res[0], self.close ** 2))
+
+    def test_backdays(self):
+        self.assertEqual(Program(['close']).backdays, 0)
+        self.assertEqual(Program(['delta(ts_mean(close, 5), 3)']).backdays, 7)
+        self.assertEqual(Program(['ts_mean(close, 5) + delay(open, 10)']).backdays, 10)
+
+    def test_evaluate(self):
+        program = Program(['rank(ts_mean(close, 5) / close)', '-delta(log(open), 2) * 0.5'])
+        res = program.evaluate({'close': self.close, 'open': self.open})
+        self.assertTrue(frames_equal(res[0], api.rank(pd.rolling_mean(self.close, 5) / self.close)))
+        self.assertTrue(frames_equal(res[1], -(np.log(self.open) - np.log(self.open).shift(2)) * 0.5))
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, Program, ['close +'])
+        self.assertRaises(ValueError, Program, ['nosuchfunc(close)'])
+        self.assertRaises(ValueError, Program, ['close.shift(1)'])
+        self.assertRaises(ValueError, Program, ['ts_mean(close, open)'])
+
+
+class ExpressionAlphaTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.startdate, self.enddate = '20140102', '20140228'
+
+    def test_run(self):
+        alpha = ExpressionAlpha('close / delay(close, 5) - 1')
+        self.assertEqual(alpha.backdays, 5)
+        alpha.run(self.startdate, self.enddate)
+        dates = alpha.generate_dates(self.startdate, self.enddate)
+        close = QuoteFetcher().fetch_window('close', alpha.get_window(dates)).shift(1)
+        df = (close / close.shift(5) - 1).reindex(index=dates)
+        df.index = pd.to_datetime(df.index)
+        self.assertTrue(frames_equal(alpha.get_alphas().reindex(columns=df.columns), df))
+
+    def test_batch(self):
+        expressions = ['rank(close)', 'rank(ts_mean(close, 5))']
+        res = ExpressionAlpha.batch(expressions, self.startdate, self.enddate)
+        for expression, df in zip(expressions, res):
+            alpha = ExpressionAlpha(expression)
+            alpha.run(self.startdate, self.enddate)
+            self.assertTrue(frames_equal(alpha.get_alphas().reindex(columns=df.columns), df))
@@ -0,0 +1,60 @@
+"""
+.. moduleauthor:: Li, Wang <wangziqi@foreseefund.com>
+"""
+
+import unittest
+
+from orca.mongo.quote import QuoteFetcher
+from orca.alpha import (
+        BacktestingAlpha,
+        VectorizedAlpha)
+from orca.utils.testing import frames_equal
+
+quote = QuoteFetcher()
+
+
+class Reversal(VectorizedAlpha):
+
+    inputs = {'close': (QuoteFetcher, 'close')}
+    backdays = 5
+
+    def compute(self, close):
+        return -(close / close.shift(5) - 1)
+
+
+class LoopReversal(BacktestingAlpha):
+
+    def generate(self, date):
+        close = quote.fetch_history('close', date, 6, delay=1)
+        self[date] = -(close.iloc[-1] / close.iloc[0] - 1)
+
+
+class VectorizedAlphaTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.startdate, self.enddate = '20140102', '20140228'
+
+    def test_is_abstract_class(self):
+        self.assertRaises(TypeError, VectorizedAlpha)
+
+    def test_delay(self):
+        alpha = Reversal()
+        window = alpha.get_window(alpha.generate_dates(self.startdate, self.enddate))
+        close = quote.fetch_window('close', window)
+        data = alpha.load(window)
+        self.assertTrue(frames_equal(data['close'].iloc[1:], close.shift(1).iloc[1:]))
+
+    def test_run_same_as_loop(self):
+        alpha1 = Reversal()
+        alpha1.run(self.startdate, self.enddate)
+        alpha2 = LoopReversal()
+        alpha2.run(self.startdate, self.enddate)
+        self.assertTrue(frames_equal(alpha1.get_alphas(), alpha2.get_alphas()))
+
+    def test_generate_same_as_run(self):
+        alpha1 = Reversal()
+        alpha1.run(self.startdate, self.enddate)
+        alpha2 = Reversal()
+        for date in alpha2.generate_dates(self.startdate, self.enddate):
+            alpha2.generate(date)
+        self.assertTrue(frames_equal(alpha1.get_alphas(), alpha2.get_alphas()))
@@ -6,6 +6,7 @@ import unittest
 
 from pymongo.errors import OperationFailure
 
+from orca import database
 from orca.database import db, dates, sids
 
 
@@ -23,7 +24,51 @@ class MongoDBTestCase(unittest.TestCase):
         db.authenticate('stocks_dev', 'stocks_dev')
 
     def test_dates(self):
-        self.assertListEqual(db.dates.distinct('date'), dates)
+        self.assertListEqual(db.dates.distinct('date'), list(dates))
 
     def test_sids(self):
-        self.assertListEqual(db.sids.distinct('sid'), sids)
+        self.assertListEqual(db.sids.distinct('sid'), list(sids))
+
+    def test_snapshot(self):
+        snapshot = database.read_snapshot()
+        self.assertListEqual(snapshot['stocks_dev.dates.date'], list(dates))
+
+    def test_lazy_distinct(self):
+        dnames = database.lazy_distinct(db.quote, 'dname')
+        self.assertIsNone(dnames._values)
+        self.assertListEqual(db.quote.distinct('dname'), list(dnames))
+
+    def test_lazy_distinct_database(self):
+        other = database.LazyDatabase(dbname='other')
+        self.assertEqual(database.lazy_distinct(other.quote, 'dname')._key, 'other.quote.dname')
+        self.assertEqual(database.lazy_distinct(db.quote, 'dname')._key, 'stocks_dev.quote.dname')
+
+
+class ConnectionManagerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = database.ConnectionManager(pool_size=4, read_preference='secondaryPreferred')
+
+    def tearDown(self):
+        self.manager.close()
+        self.manager = None
+
+    def test_client_options(self):
+        options = self.manager.client_options()
+        self.assertEqual(options['maxPoolSize'], 4)
+        self.assertEqual(options['readPreference'], 'secondaryPreferred')
+
+    def test_configure(self):
+        self.assertRaises(ValueError, self.manager.configure, read_preference='secondary_only')
+
+    def test_connect_once(self):
+        client1, _ = self.manager.connect()
+        client2, _ = self.manager.connect()
+        self.assertIs(client1, client2)
+
+    def test_connect_after_fork(self):
+        client1, _ = self.manager.connect()
+        self.manager._pid = -1
+        client2, db = self.manager.connect()
+        self.assertIsNot(client1, client2)
+        self.assertIsInstance(db.collection_names(), list)
@@ -65,6 +65,12 @@ class BarraExposureFetcherTestCase(unittest.TestCase):
         barra = self.barra.fetch_daily('CNE5D_COUNTRY', self.dates[0])
         self.assertIsInstance(barra, pd.Series)
 
+    def test_fetch_window_many(self):
+        dfs = self.barra.fetch_window_many('style', self.dates[-5:])
+        self.assertSetEqual(set(dfs), set(self.barra.style_factors[self.barra.model]))
+        df = self.barra.fetch_window('CNE5D_SIZE', self.dates[-5:])
+        self.assertTrue(frames_equal(dfs['CNE5D_SIZE'], df))
+
 
 class BarraFactorFetcherTestCase(unittest.TestCase):
 
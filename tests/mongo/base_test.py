@@ -5,6 +5,7 @@
 import logging
 import unittest
 
+import numpy as np
 import pandas as pd
 
 from orca import (
@@ -15,9 +16,15 @@ from orca import (
 from orca.mongo.base import (
         FetcherBase,
         KDayFetcher,
-        KMinFetcher
+        KMinFetcher,
+        fetch_concurrently,
         )
 from orca.utils import dateutil
+from orca.utils.testing import (
+        series_equal,
+        frames_equal,
+        )
+from orca.utils.cube import Cube
 
 
 class FetcherBaseDummy(FetcherBase):
@@ -109,6 +116,34 @@ class KDayFetcherDummyTestCase(unittest.TestCase):
         ser = self.fetcher.fetch_daily('close', self.dates_str[-1], offset=49)
         self.assertEqual(ser.name, self.dates_str[0])
 
+    def test_fetch_concurrently(self):
+        dnames = ['open', 'high', 'low', 'close']
+        dfs = fetch_concurrently((self.fetcher.fetch_window, (dname, self.dates_str)) for dname in dnames)
+        for dname, df in zip(dnames, dfs):
+            self.assertTrue(frames_equal(df, self.fetcher.fetch_window(dname, self.dates_str)))
+
+    def test_fetch_dates1(self):
+        dates = self.dates_str[10:40:10]
+        df = self.fetcher.fetch_dates('close', dates, reindex=True)
+        for date in dates:
+            ser = self.fetcher.fetch_daily('close', date, reindex=True)
+            ser.name = date
+            self.assertTrue(series_equal(df.ix[date], ser))
+
+    def test_fetch_dates2(self):
+        dates = self.dates_str[10:40:10]
+        cube = self.fetcher.fetch_dates('close', dates, rshift=2, lshift=3, reindex=True)
+        for date in dates:
+            di = self.dates_str.index(date)
+            df = self.fetcher.fetch_window('close', self.dates_str[di-3: di+3], reindex=True)
+            self.assertTrue((cube[date].fillna(0).values == df.fillna(0).values).all())
+
+    def test_fetch_dates_datetime_index(self):
+        dates = self.dates_str[10:40:10]
+        res = self.fetcher.fetch_dates('close', dates, rshift=2, lshift=3, datetime_index=True)
+        for date in dates:
+            self.assertIsInstance(res[date].index, pd.DatetimeIndex)
+
 
 class KMinFetcherDummy(KMinFetcher):
 
@@ -144,7 +179,18 @@ class KMinFetcherDummyTestCase(unittest.TestCase):
 
     def test_fetch_window_times_list(self):
         pl = self.fetcher.fetch_window('close', [self.times[0]], self.dates_str)
-        self.assertIsInstance(pl, pd.Panel)
+        self.assertIsInstance(pl, Cube)
+
+    def test_fetch_window_dtype(self):
+        pl = self.fetcher.fetch_window('close', self.times, self.dates_str, dtype=np.float32)
+        self.assertEqual(pl.values.dtype, np.float32)
+
+    def test_fetch_window_as_frame(self):
+        pl = self.fetcher.fetch_window('close', self.times, self.dates_str)
+        df = self.fetcher.fetch_window('close', self.times, self.dates_str, as_frame=True)
+        self.assertEqual(len(df), len(self.times)*len(self.dates_str))
+        self.assertTrue(frames_equal(df.iloc[1::len(self.times)].reset_index(drop=True),
+                                     pl[self.times[1]].reset_index(drop=True)))
 
     def test_fetch_backdays(self):
         pl = self.fetcher.fetch('close', self.times, self.dates_str[5], self.dates_str[-1], backdays=5)
@@ -157,3 +203,36 @@ class KMinFetcherDummyTestCase(unittest.TestCase):
     def test_fetch_daily_offset(self):
         ser = self.fetcher.fetch_daily('close', self.times[0], self.dates_str[-1], offset=49)
         self.assertEqual(ser.name, self.dates_str[0])
+
+    def test_fetch_dates1(self):
+        dates = [self.dates_str[0], self.dates_str[-1]]
+        cube = self.fetcher.fetch_dates('close', self.times, dates, reindex=True)
+        self.assertListEqual(list(cube.items), self.times)
+        self.assertListEqual(list(cube.minor_axis), dates)
+        for date in dates:
+            df = self.fetcher.fetch_daily('close', self.times, date, reindex=True)
+            self.assertTrue((cube.minor_xs(date).T.fillna(0).values == df.fillna(0).values).all())
+
+    def test_fetch_dates2(self):
+        dates = [self.dates_str[5], self.dates_str[-5]]
+        res = self.fetcher.fetch_dates('close', self.times, dates, rshift=1, lshift=2, reindex=True)
+        for date in dates:
+            di = self.dates_str.index(date)
+            pl = self.fetcher.fetch_window('close', self.times, self.dates_str[di-2: di+2], reindex=True)
+            self.assertListEqual(list(res[date].major_axis), self.dates_str[di-2: di+2])
+            self.assertTrue((res[date].values == pl.values)[~np.isnan(pl.values)].all())
+
+    def test_locate_dates_compact(self):
+        dates = [self.dates_str[5], self.dates_str[-5]]
+        _, offsets, window = self.fetcher.locate_dates(dates, rshift=1, lshift=2, compact=True)
+        self.assertListEqual(window, self.dates_str[3:7] + self.dates_str[-7:-3])
+        self.assertListEqual(list(offsets), [0, 4])
+
+    def test_fetch_dates_datetime_index(self):
+        dates = [self.dates_str[5], self.dates_str[-5]]
+        res = KMinFetcherDummy(datetime_index=True).fetch_dates('close', self.times[0], dates, rshift=1, lshift=2)
+        for date in dates:
+            self.assertIsInstance(res[date].index, pd.DatetimeIndex)
+        res = KMinFetcherDummy(datetime_index=True).fetch_dates('close', self.times, dates, rshift=1, lshift=2)
+        for date in dates:
+            self.assertIsInstance(res[date].major_axis, pd.DatetimeIndex)
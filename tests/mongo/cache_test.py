@@ -0,0 +1,84 @@
+"""
+.. moduleauthor:: Li, Wang <wangziqi@foreseefund.com>
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from orca import (
+        DATES,
+        SIDS,
+        )
+from orca.mongo import cache
+from orca.mongo.cache import KDayCache
+from orca.mongo.quote import QuoteFetcher
+from orca.mongo.industry import IndustryFetcher
+from orca.utils import dateutil
+from orca.utils.testing import frames_equal
+
+
+class KDayCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.cache = KDayCache(self.root)
+        self.dates = dateutil.get_startfrom(DATES, '20140101', 20)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_fetch_window(self):
+        df1 = QuoteFetcher().fetch_window('close', self.dates)
+        df2 = QuoteFetcher(cache=self.cache).fetch_window('close', self.dates)
+        self.assertTrue(frames_equal(df1, df2))
+
+    def test_fetch_window_cached(self):
+        fetcher = QuoteFetcher(cache=self.cache, reindex=True)
+        df1 = fetcher.fetch_window('close', self.dates)
+        df2 = fetcher.fetch_window('close', self.dates)
+        self.assertTrue(frames_equal(df1, df2) and list(df2.columns) == SIDS)
+
+    def test_fetch_window_incremental(self):
+        fetcher = QuoteFetcher(cache=self.cache)
+        fetcher.fetch_window('close', self.dates[5:10])
+        df1 = fetcher.fetch_window('close', self.dates)
+        df2 = fetcher.fetch_window('close', self.dates, cache=False)
+        self.assertTrue(frames_equal(df1, df2))
+
+    def test_fetch_window_years(self):
+        dates = dateutil.get_startfrom(DATES, '20131201', 60)
+        fetcher = QuoteFetcher(cache=self.cache)
+        fetcher.fetch_window('close', self.dates)
+        df1 = fetcher.fetch_window('close', dates)
+        df2 = fetcher.fetch_window('close', dates, cache=False)
+        self.assertTrue(frames_equal(df1, df2))
+        path = os.path.join(self.root, 'quote', 'dname=close')
+        self.assertTrue(os.path.exists(os.path.join(path, '2013.npy')) and os.path.exists(os.path.join(path, '2014.npy')))
+
+    def test_fetch_window_new_sids(self):
+        cache.SIDS = SIDS[:-1]
+        try:
+            QuoteFetcher(cache=self.cache).fetch_window('close', self.dates[:10])
+        finally:
+            cache.SIDS = SIDS
+        fetcher = QuoteFetcher(cache=KDayCache(self.root), reindex=True)
+        df1 = fetcher.fetch_window('close', self.dates)
+        df2 = fetcher.fetch_window('close', self.dates, cache=False)
+        self.assertTrue(df1[SIDS[-1]].ix[self.dates[:10]].isnull().all())
+        self.assertTrue(frames_equal(df1.ix[self.dates[10:]], df2.ix[self.dates[10:]]))
+        self.assertTrue(frames_equal(df1.ix[self.dates[:10], SIDS[:-1]], df2.ix[self.dates[:10], SIDS[:-1]]))
+
+    def test_fetch_window_str(self):
+        df1 = IndustryFetcher().fetch_window('level1', self.dates)
+        df2 = IndustryFetcher(cache=self.cache).fetch_window('level1', self.dates)
+        self.assertTrue(frames_equal(df1, df2))
+
+    def test_invalidate(self):
+        QuoteFetcher(cache=self.cache).fetch_window('close', self.dates)
+        path = os.path.join(self.root, 'quote', 'dname=close')
+        self.cache.invalidate('quote', 'close', dates=self.dates[:5])
+        self.assertListEqual(self.cache.missing_dates(path, self.dates), self.dates[:5])
+        self.cache.invalidate('quote', 'close')
+        self.assertFalse(os.path.exists(path))
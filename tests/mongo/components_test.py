@@ -27,3 +27,7 @@ class ComponentsFetcherTestCase(unittest.TestCase):
     def test_fetch_window2(self):
         hs300 = self.fetcher.fetch_window('HS300', self.dates, as_bool=False)
         self.assertTrue((np.abs(hs300.sum(axis=1)-100) <= 1).all())
+
+    def test_fetch_members(self):
+        hs300 = self.fetcher.fetch_window('HS300', self.dates)
+        self.assertListEqual(self.fetcher.fetch_members('HS300', self.dates), list(hs300.columns[hs300.any()]))
@@ -27,3 +27,8 @@ class IndexQuoteFetcherTestCase(unittest.TestCase):
     def test_fetch_window2(self):
         close = self.fetcher.fetch_window(['close'], self.dates, index='HS300')
         self.assertIsInstance(close, pd.DataFrame)
+
+    def test_fetch_window_many(self):
+        dct = self.fetcher.fetch_window_many(['open', 'close'], self.dates, index='HS300')
+        close = self.fetcher.fetch_window('close', self.dates, index='HS300')
+        self.assertTrue((dct['close'] == close).all())
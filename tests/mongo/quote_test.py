@@ -9,7 +9,10 @@ from orca.utils.testing import (
         series_equal,
         frames_equal)
 from orca.utils.dateutil import get_startfrom
-from orca import DATES
+from orca import (
+        DATES,
+        SIDS,
+        )
 
 
 class QuoteFetcherTestCase(unittest.TestCase):
@@ -52,3 +55,26 @@ class QuoteFetcherTestCase(unittest.TestCase):
         s1.name = self.dates[1]
         s2 = self.fetcher.fetch_daily('returnsN', 2, self.dates[1])
         self.assertTrue(series_equal(s1, s2))
+
+    def test_fetch_window_many1(self):
+        dfs = self.fetcher.fetch_window_many(['open', 'close'], self.dates)
+        self.assertTrue(frames_equal(dfs['open'], self.fetcher.fetch_window('open', self.dates)))
+        self.assertTrue(frames_equal(dfs['close'], self.fetcher.fetch_window('close', self.dates)))
+
+    def test_fetch_window_many2(self):
+        arr = self.fetcher.fetch_window_many(['open', 'close'], self.dates, as_array=True)
+        self.assertEqual(arr.shape, (2, len(self.dates), len(SIDS)))
+
+    def test_fetch_history_many(self):
+        dfs = self.fetcher.fetch_history_many(['volume'], self.dates[-1], 20, delay=0)
+        self.assertTrue(frames_equal(dfs['volume'], self.fetcher.fetch_window('volume', self.dates[-20:])))
+
+    def test_fetch_window_sids1(self):
+        sids = list(SIDS[:10])
+        df1 = self.fetcher.fetch_window('close', self.dates, sids=sids, reindex=True)
+        df2 = self.fetcher.fetch_window('close', self.dates, reindex=True)
+        self.assertTrue(frames_equal(df1, df2[sids]))
+
+    def test_fetch_window_sids2(self):
+        df = self.fetcher.fetch_window('close', self.dates, sids='HS300')
+        self.assertLessEqual(len(df.columns), 350)
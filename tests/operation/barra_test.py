@@ -0,0 +1,96 @@
+"""
+.. moduleauthor:: Li, Wang <wangziqi@foreseefund.com>
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from orca.operation.barra import (
+        factor_neut,
+        factor_corr_neut,
+        )
+
+
+def neut_dates(alpha, exposures):
+    res = np.empty(alpha.shape)
+    res.fill(np.nan)
+    for i in range(len(alpha)):
+        exposure = pd.DataFrame(exposures[i]).dropna(how='all').fillna(0)
+        sids = exposure.index.intersection(pd.Series(alpha[i]).dropna().index)
+        x, y = exposure.ix[sids].values, alpha[i, sids]
+        res[i, sids] = y - x.dot(np.linalg.solve(x.T.dot(x), x.T.dot(y)))
+    return res
+
+
+class FactorNeutTestCase(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        self.alpha = np.random.randn(10, 100)
+        self.alpha[np.random.rand(10, 100) > 0.9] = np.nan
+        self.exposures = np.random.randn(10, 100, 5)
+        self.exposures[np.random.rand(10, 100) > 0.9] = np.nan
+        self.exposures[np.random.rand(10, 100, 5) > 0.95] = np.nan
+
+    def test_factor_neut(self):
+        res, success = factor_neut(self.alpha, self.exposures)
+        self.assertTrue(success.all())
+        self.assertTrue(np.allclose(res, neut_dates(self.alpha, self.exposures), equal_nan=True))
+
+    def test_orthogonal(self):
+        res, _ = factor_neut(self.alpha, self.exposures)
+        x = np.where(np.isfinite(self.exposures), self.exposures, 0)
+        self.assertTrue(np.allclose(np.einsum('tnk,tn->tk', x, np.nan_to_num(res)), 0))
+
+    def test_singular(self):
+        self.exposures[3] = 0
+        res, success = factor_neut(self.alpha, self.exposures)
+        self.assertFalse(success[3])
+        self.assertEqual(success.sum(), 9)
+        self.assertTrue(np.allclose(res[3], self.alpha[3], equal_nan=True))
+
+
+def corr_neut_dense(alpha, exposures, covariances, specifics, factors):
+    res = np.empty(alpha.shape)
+    res.fill(np.nan)
+    for i in range(len(alpha)):
+        exposure = pd.DataFrame(exposures[i]).dropna(how='all').fillna(0)
+        spec = pd.Series(specifics[i]).dropna()
+        sids = exposure.index.intersection(pd.Series(alpha[i]).dropna().index).intersection(spec.index)
+        x, y, d = exposure.ix[sids].values, alpha[i, sids], spec.ix[sids].values
+        covariance = x.dot(covariances[i]).dot(x.T) + np.diag(d ** 2)
+        e = x[:, factors]
+        a, b = e.T.dot(covariance).dot(e), e.T.dot(covariance).dot(y)
+        res[i, sids] = y - e.dot(np.linalg.solve(a, b))
+    return res
+
+
+class FactorCorrNeutTestCase(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        self.alpha = np.random.randn(10, 100)
+        self.alpha[np.random.rand(10, 100) > 0.9] = np.nan
+        self.exposures = np.random.randn(10, 100, 6)
+        self.exposures[np.random.rand(10, 100) > 0.9] = np.nan
+        self.exposures[np.random.rand(10, 100, 6) > 0.95] = np.nan
+        factors = np.random.randn(10, 50, 6)
+        self.covariances = np.einsum('tnk,tnl->tkl', factors, factors) / 50
+        self.specifics = np.random.rand(10, 100) + 0.1
+        self.specifics[np.random.rand(10, 100) > 0.9] = np.nan
+
+    def test_factor_corr_neut(self):
+        for factors in ([0], [1, 3, 4], range(6)):
+            res, success = factor_corr_neut(self.alpha, self.exposures, self.covariances, self.specifics, factors)
+            self.assertTrue(success.all())
+            dense = corr_neut_dense(self.alpha, self.exposures, self.covariances, self.specifics, factors)
+            self.assertTrue(np.allclose(res, dense, equal_nan=True))
+
+    def test_missing_covariance(self):
+        self.covariances[2] = np.nan
+        res, success = factor_corr_neut(self.alpha, self.exposures, self.covariances, self.specifics, [0, 1])
+        self.assertFalse(success[2])
+        self.assertEqual(success.sum(), 9)
+        self.assertTrue(np.allclose(res[2], self.alpha[2], equal_nan=True))
@@ -0,0 +1,75 @@
+"""
+.. moduleauthor:: Li, Wang <wangziqi@foreseefund.com>
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from orca.operation.decay import (
+        decay_weights,
+        DecayOperation,
+        )
+
+
+def decay_shift(alpha, days, weights, dense=False):
+    current = (alpha.fillna(0) if dense else alpha) * weights[0]
+    for i in range(1, days):
+        current += alpha.shift(i).fillna(0) * weights[i]
+    if days > 1:
+        current[alpha.fillna(method='ffill', limit=days-1).isnull()] = np.nan
+    else:
+        current[alpha.isnull()] = np.nan
+    return current / weights.sum()
+
+
+class DecayTestCase(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        self.alpha = pd.DataFrame(np.random.randn(100, 30))
+        self.alpha[np.random.rand(100, 30) > 0.7] = np.nan
+        self.alpha.iloc[20:40, :5] = np.nan
+
+    def check(self, days, dense=False, **kwargs):
+        res = DecayOperation(days, dense=dense).operate(self.alpha, **kwargs)
+        answer = decay_shift(self.alpha, days, decay_weights(days, **kwargs), dense=dense)
+        self.assertTrue(np.allclose(res.values, answer.values, equal_nan=True))
+
+    def test_linear(self):
+        for days in (1, 5, 20):
+            self.check(days)
+
+    def test_dense(self):
+        self.check(10, dense=True)
+
+    def test_power(self):
+        self.check(10, exp=2)
+        self.check(10, exp=0.5, dense=True)
+
+    def test_minimum(self):
+        self.check(10, minimum=0.5)
+        self.check(10, exp=2, minimum=0.5)
+
+    def test_halflife(self):
+        self.check(20, halflife=5)
+        self.check(20, halflife=5, dense=True)
+
+    def test_inf(self):
+        self.alpha.iloc[10, 7] = np.inf
+        self.alpha.iloc[50, 8] = -np.inf
+        for kwargs in ({}, {'exp': 2}, {'halflife': 3}):
+            res = DecayOperation(5).operate(self.alpha, **kwargs)
+            answer = decay_shift(self.alpha.replace([np.inf, -np.inf], np.nan), 5, decay_weights(5, **kwargs))
+            self.assertTrue(np.allclose(res.values, answer.values, equal_nan=True))
+            self.assertTrue(np.isfinite(res.values[-20:, 7:9]).any())
+
+    def test_weights(self):
+        self.assertTrue(np.allclose(decay_weights(4), [4, 3, 2, 1]))
+        self.assertTrue(np.allclose(decay_weights(3, minimum=1), [3, 3, 3]))
+        self.assertTrue(np.allclose(decay_weights(3, halflife=1), [1, 0.5, 0.25]))
+
+    def test_series(self):
+        res = DecayOperation(5).operate(self.alpha[0])
+        self.assertTrue(np.allclose(res.values, DecayOperation(5).operate(self.alpha)[0].values, equal_nan=True))
@@ -0,0 +1,125 @@
+"""
+.. moduleauthor:: Li, Wang <wangziqi@foreseefund.com>
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from orca.operation.group import (
+        encode_groups,
+        group_demean,
+        group_rank,
+        )
+from orca.operation.neutralize import (
+        GroupNeutOperation,
+        BoardNeutOperation,
+        )
+from orca.operation.rank import (
+        rank,
+        GroupRankOperation,
+        BoardRankOperation,
+        )
+
+
+def transform_groupby(alpha, group, func):
+    res = {}
+    for dt, row in alpha.iterrows():
+        grp = group.ix[dt].dropna() if isinstance(group, pd.DataFrame) else group.dropna()
+        res[dt] = row[grp.index].groupby(grp).transform(func)
+    return pd.DataFrame(res).T.reindex(index=alpha.index, columns=alpha.columns)
+
+def neut_groupby(alpha, group):
+    return transform_groupby(alpha, group, lambda x: x-x.mean())
+
+def rank_groupby(alpha, group, method='average'):
+    return transform_groupby(alpha, group, lambda x: rank(x, method=method))
+
+
+class GroupTestCase(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        index = pd.date_range('20140101', periods=20)
+        sids = ['%06d' % i for i in range(50)]
+        self.alpha = pd.DataFrame(np.random.randn(20, 50), index=index, columns=sids)
+        self.alpha[np.random.rand(20, 50) > 0.8] = np.nan
+        self.group = pd.DataFrame(np.random.randint(5, size=(20, 50)), index=index, columns=sids).astype(str)
+        self.group[np.random.rand(20, 50) > 0.9] = np.nan
+
+    def test_encode_static(self):
+        group = pd.Series(['a', 'b', 'a'], index=['x', 'y', 'z'])
+        codes, ngroups = encode_groups(group, range(2), ['z', 'y', 'w'])
+        self.assertEqual(ngroups, 2)
+        self.assertTrue((codes == [[0, 1, -1], [0, 1, -1]]).all())
+
+    def test_group_demean(self):
+        values = np.array([[1., 2., 3., np.nan], [4., 5., 6., 7.]])
+        codes = np.array([[0, 0, 1, 1], [1, 0, 1, -1]])
+        res = group_demean(values, codes, 2)
+        answer = np.array([[-0.5, 0.5, 0., np.nan], [-1., 0., 1., np.nan]])
+        self.assertTrue(np.allclose(res, answer, equal_nan=True))
+
+    def test_neut_dynamic(self):
+        res = GroupNeutOperation(self.group).operate(self.alpha)
+        self.assertTrue(np.allclose(res.values, neut_groupby(self.alpha, self.group).values, equal_nan=True))
+
+    def test_neut_static(self):
+        group = self.group.iloc[0]
+        res = GroupNeutOperation(group).operate(self.alpha)
+        self.assertTrue(np.allclose(res.values, neut_groupby(self.alpha, group).values, equal_nan=True))
+
+    def test_neut_series(self):
+        date = self.alpha.index[3]
+        res = GroupNeutOperation(self.group).operate(self.alpha.ix[date], date=date)
+        self.assertTrue(np.allclose(res, neut_groupby(self.alpha, self.group).ix[date].reindex(res.index), equal_nan=True))
+
+    def test_neut_board(self):
+        group = pd.Series([BoardNeutOperation.get_board(sid) for sid in self.alpha.columns], index=self.alpha.columns)
+        res = BoardNeutOperation().operate(self.alpha)
+        self.assertTrue(np.allclose(res.values, neut_groupby(self.alpha, group).values, equal_nan=True))
+
+    def test_group_rank(self):
+        values = np.array([[3., 1., 2., 2., np.nan], [1., 1., 5., 2., 4.]])
+        codes = np.array([[0, 0, 0, 0, 0], [0, 0, 1, 1, -1]])
+        res = group_rank(values, codes, 2)
+        answer = np.array([[1., 0., 0.5, 0.5, np.nan], [np.nan, np.nan, 1., 0., np.nan]])
+        self.assertTrue(np.allclose(res, answer, equal_nan=True))
+
+    def test_group_rank_dense(self):
+        values = np.array([[1., 2., 2., 2., 5.]])
+        codes = np.zeros((1, 5), dtype=int)
+        res = group_rank(values, codes, 1, method='dense')
+        self.assertTrue(np.allclose(res, [[0., 0.5, 0.5, 0.5, 1.]]))
+
+    def test_rank_ties(self):
+        alpha = self.alpha.round(0)
+        res = GroupRankOperation(self.group).operate(alpha)
+        self.assertTrue(np.allclose(res.values, rank_groupby(alpha, self.group).values, equal_nan=True))
+
+    def test_rank_dense(self):
+        alpha = self.alpha.round(0)
+        res = GroupRankOperation(self.group).operate(alpha, method='dense')
+        answer = rank_groupby(alpha, self.group, method='dense')
+        self.assertTrue(np.allclose(res.values, answer.values, equal_nan=True))
+        self.assertFalse(np.allclose(res.values, rank_groupby(alpha, self.group).values, equal_nan=True))
+
+    def test_rank_dynamic(self):
+        res = GroupRankOperation(self.group).operate(self.alpha)
+        self.assertTrue(np.allclose(res.values, rank_groupby(self.alpha, self.group).values, equal_nan=True))
+
+    def test_rank_static(self):
+        group = self.group.iloc[0]
+        res = GroupRankOperation(group).operate(self.alpha)
+        self.assertTrue(np.allclose(res.values, rank_groupby(self.alpha, group).values, equal_nan=True))
+
+    def test_rank_series(self):
+        date = self.alpha.index[3]
+        res = GroupRankOperation(self.group).operate(self.alpha.ix[date], date=date)
+        self.assertTrue(np.allclose(res, rank_groupby(self.alpha, self.group).ix[date].reindex(res.index), equal_nan=True))
+
+    def test_rank_board(self):
+        group = pd.Series([BoardRankOperation.get_board(sid) for sid in self.alpha.columns], index=self.alpha.columns)
+        res = BoardRankOperation().operate(self.alpha)
+        self.assertTrue(np.allclose(res.values, rank_groupby(self.alpha, group).values, equal_nan=True))
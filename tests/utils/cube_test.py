@@ -0,0 +1,53 @@
+"""
+.. moduleauthor:: Li, Wang <wangziqi@foreseefund.com>
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from orca.utils.cube import Cube
+from orca.utils.testing import frames_equal
+
+
+class CubeTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.values = np.random.randn(2, 3, 4)
+        self.cube = Cube(self.values, ['a', 'b'], ['x', 'y', 'z'], range(4))
+        self.panel = pd.Panel(self.values, items=['a', 'b'], major_axis=['x', 'y', 'z'], minor_axis=range(4))
+
+    def tearDown(self):
+        self.cube = None
+
+    def test_getitem(self):
+        self.assertTrue(frames_equal(self.cube['b'], self.panel['b']))
+
+    def test_getitem_is_view(self):
+        self.cube['a'].iloc[0, 0] = 100
+        self.assertEqual(self.values[0, 0, 0], 100)
+
+    def test_major_xs(self):
+        self.assertTrue(frames_equal(self.cube.major_xs('y'), self.panel.major_xs('y')))
+
+    def test_minor_xs(self):
+        self.assertTrue(frames_equal(self.cube.minor_xs(2), self.panel.minor_xs(2)))
+
+    def test_transpose(self):
+        cube = self.cube.transpose(2, 0, 1)
+        panel = self.panel.transpose(2, 0, 1)
+        self.assertTrue(frames_equal(cube[1], panel[1]))
+
+    def test_reindex(self):
+        cube = self.cube.reindex(major_axis=['z', 'w'])
+        self.assertTrue(np.isnan(cube.values[:, 1, :]).all())
+        self.assertTrue((cube.values[:, 0, :] == self.values[:, 2, :]).all())
+
+    def test_set_axis(self):
+        self.cube.major_axis = ['x1', 'y1', 'z1']
+        self.assertListEqual(list(self.cube.major_axis), ['x1', 'y1', 'z1'])
+        self.assertRaises(ValueError, setattr, self.cube, 'major_axis', ['x'])
+
+    def test_to_panel(self):
+        self.assertTrue(frames_equal(self.cube.to_panel()['a'], self.panel['a']))
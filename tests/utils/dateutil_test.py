@@ -151,3 +151,63 @@ class DateutilTestCase(unittest.TestCase):
         a = dateutil.generate_timestamps('093000', '113000', 30*60)
         a.next()
         self.assertEqual(list(a), ['100000', '103000', '110000'])
+
+    def test_combine_datetime(self):
+        dates, times = ['20140102', '20140102', '20140103'], ['093500', '150000', '100000']
+        res = dateutil.combine_datetime(dates, times)
+        self.assertTrue((res == pd.to_datetime([d+' '+t for d, t in zip(dates, times)])).all())
+
+    def test_combine_datetime_outer(self):
+        dates, times = ['20140102', '20140103'], ['093500', '150000']
+        res = dateutil.combine_datetime(dates, times, outer=True)
+        self.assertTrue((res == pd.to_datetime([d+' '+t for d in dates for t in times])).all())
+
+
+class TradingCalendarTestCase(unittest.TestCase):
+
+    dates = ['20140102', '20140103', '20140106', '20140107', '20140108']
+
+    def setUp(self):
+        self.calendar = dateutil.TradingCalendar(TradingCalendarTestCase.dates)
+
+    def tearDown(self):
+        self.calendar = None
+
+    def test_list_like(self):
+        self.assertListEqual(list(self.calendar), TradingCalendarTestCase.dates)
+        self.assertListEqual(self.calendar[1:3], TradingCalendarTestCase.dates[1:3])
+        self.assertEqual(len(self.calendar), 5)
+        self.assertIn('20140106', self.calendar)
+        self.assertNotIn('20140104', self.calendar)
+
+    def test_index(self):
+        self.assertEqual(self.calendar.index('20140106'), 2)
+        self.assertRaises(ValueError, self.calendar.index, '20140104')
+
+    def test_parse_date(self):
+        for date in ['20140101', '20140104', '20140106', '20140109']:
+            for direction in (1, -1):
+                try:
+                    expected = dateutil.parse_date(TradingCalendarTestCase.dates, date, direction)
+                except ValueError:
+                    self.assertRaises(ValueError, dateutil.parse_date, self.calendar, date, direction)
+                    continue
+                self.assertEqual(dateutil.parse_date(self.calendar, date, direction), expected)
+
+    def test_locate_many(self):
+        dis = self.calendar.locate_many(['20140101', '20140104', '20140106', '20140109'], -1)
+        self.assertListEqual(list(dis), [-1, 1, 2, 4])
+        dis = self.calendar.locate_many(pd.to_datetime(['20140101', '20140104', '20140106', '20140109']))
+        self.assertListEqual(list(dis), [0, 2, 2, 5])
+
+    def test_shift(self):
+        self.assertEqual(self.calendar.shift('20140104', 2), '20140107')
+        self.assertEqual(self.calendar.shift('20140104', -1, direction=1), '20140103')
+        self.assertRaises(ValueError, self.calendar.shift, '20140108', 1)
+
+    def test_offset(self):
+        self.assertEqual(self.calendar.offset('20140103', '20140108'), 3)
+
+    def test_cut_window(self):
+        window = dateutil.cut_window(self.calendar, '20140104', '20140107', backdays=1)
+        self.assertListEqual(window, TradingCalendarTestCase.dates[1:4])
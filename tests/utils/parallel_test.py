@@ -0,0 +1,159 @@
+"""
+.. moduleauthor:: Li, Wang <wangziqi@foreseefund.com>
+"""
+
+import os
+import time
+import shutil
+import tempfile
+import unittest
+import multiprocessing
+import multiprocessing.pool
+
+import numpy as np
+import pandas as pd
+
+from orca.alpha import BacktestingAlpha
+from orca.utils import parallel
+
+
+def square(x):
+    return x * x
+
+class ConstantAlpha(BacktestingAlpha):
+
+    def __init__(self, mu):
+        super(ConstantAlpha, self).__init__()
+        self.mu = float(mu)
+
+    def generate(self, date):
+        self[date] = pd.Series(self.mu, index=list('abcdef'))
+
+def accepted(x):
+    return x if parallel._predicate is None or parallel._predicate(x) else None
+
+
+class StreamTestCase(unittest.TestCase):
+
+    def test_results(self):
+        pool, panels = parallel.make_pool(2)
+        res = parallel.stream(pool, panels, square, range(20), 4)
+        self.assertListEqual(sorted(res), [x*x for x in range(20)])
+
+    def test_bounded(self):
+        drawn = []
+
+        def tasks():
+            for x in range(20):
+                drawn.append(x)
+                yield x
+
+        pool, panels = parallel.make_pool(2)
+        pending = []
+        for i, res in enumerate(parallel.stream(pool, panels, square, tasks(), 3)):
+            time.sleep(0.01)
+            pending.append(len(drawn) - i)
+        self.assertLessEqual(max(pending), 3)
+
+    def test_stop_early(self):
+        pool, panels = parallel.make_pool(2)
+        res = parallel.stream(pool, panels, square, iter(range(1000)), 4)
+        next(res)
+        res.close()
+        self.assertNotEqual(pool._state, multiprocessing.pool.RUN)
+
+    def test_predicate_in_worker(self):
+        pool, panels = parallel.make_pool(2, predicate=lambda x: x % 2 == 0)
+        res = parallel.stream(pool, panels, accepted, range(10), 4)
+        self.assertListEqual(sorted(x for x in res if x is not None), range(0, 10, 2))
+
+
+class ParamKeyTestCase(unittest.TestCase):
+
+    def test_key(self):
+        key = parallel.param_key(StreamTestCase, {'a': '1', 'b': '2'}, '20140101', '20141231')
+        self.assertEqual(key, parallel.param_key(StreamTestCase, {'b': '2', 'a': '1'}, 20140101, 20141231))
+        self.assertNotEqual(key, parallel.param_key(StreamTestCase, {'a': '1', 'b': '3'}, '20140101', '20141231'))
+        self.assertNotEqual(key, parallel.param_key(StreamTestCase, {'a': '1', 'b': '2'}, '20140101', '20141130'))
+
+
+class ManifestTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.fpath = os.path.join(self.tmpdir, 'manifest')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_resume(self):
+        manifest = parallel.Manifest(self.fpath)
+        manifest.update('k1', {'a': 1}, 'done')
+        manifest.update('k2', {'a': 2}, 'rejected')
+        manifest.update('k3', {'a': 3}, 'failed', 'error')
+        with open(self.fpath, 'a') as file:
+            file.write('{"key": "k4", "sta')
+        manifest = parallel.Manifest(self.fpath, resume=True)
+        self.assertTrue(manifest.finished('k1'))
+        self.assertTrue(manifest.finished('k2'))
+        self.assertFalse(manifest.finished('k3'))
+        self.assertFalse(manifest.finished('k4'))
+        self.assertEqual(manifest.params(), {'k1': {'a': 1}})
+
+    def test_last_status_wins(self):
+        manifest = parallel.Manifest(self.fpath)
+        manifest.update('k1', {'a': 1}, 'failed', 'error')
+        manifest.update('k1', {'a': 1}, 'done')
+        self.assertTrue(parallel.Manifest(self.fpath, resume=True).finished('k1'))
+
+    def test_no_resume(self):
+        parallel.Manifest(self.fpath).update('k1', {'a': 1}, 'done')
+        self.assertFalse(parallel.Manifest(self.fpath).finished('k1'))
+        self.assertFalse(os.path.exists(self.fpath))
+
+
+class SearchTestCase(unittest.TestCase):
+
+    def test_sample_full_grid(self):
+        params = parallel.sample_params({'a': [1, 2], 'b': [3, 4]}, 10)
+        self.assertEqual(len(params), 4)
+
+    def test_sample_distinct(self):
+        params = parallel.sample_params({'a': range(10), 'b': range(10)}, 30, seed=0)
+        self.assertEqual(len(params), 30)
+        self.assertEqual(len(set((p['a'], p['b']) for p in params)), 30)
+        self.assertEqual(params, parallel.sample_params({'a': range(10), 'b': range(10)}, 30, seed=0))
+
+    def test_sample_callable(self):
+        params = parallel.sample_params({'a': lambda rng: rng.uniform(0, 1)}, 5, seed=0)
+        self.assertEqual(len(params), 5)
+        self.assertTrue(all(0 <= p['a'] <= 1 for p in params))
+
+    def test_successive_halving(self):
+        params = [{'mu': mu} for mu in range(27)]
+        res = parallel.successive_halving(ConstantAlpha, params, '20140101', '20141231', eta=3, min_days=20,
+                score=lambda df: df.mean().mean(), threads=2)
+        self.assertEqual(res[0], (26., {'mu': 26}))
+        self.assertLess(len(res), len(params))
+
+
+class RunHDFTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.store = os.path.join(self.tmpdir, 'alphas.h5')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_params_table(self):
+        params = [{'mu': mu} for mu in range(3)]
+        parallel.run_hdf(self.store, ConstantAlpha, params, '20140101', '20140131', threads=2)
+        store = pd.HDFStore(self.store)
+        try:
+            table = store['params']
+            self.assertEqual(len(table), 3)
+            for key, param in table.iterrows():
+                self.assertEqual(store[key].iloc[0, 0], float(param['mu']))
+        finally:
+            store.close()
@@ -0,0 +1,77 @@
+"""
+.. moduleauthor:: Li, Wang <wangziqi@foreseefund.com>
+"""
+
+import os
+import unittest
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+
+from orca.utils import shared
+from orca.utils.shared import SharedPanels
+from orca.utils.testing import frames_equal
+
+
+def worker_sum(name):
+    return shared.get(name).sum().sum()
+
+def init_worker(root):
+    shared.attach(root)
+
+
+class SharedPanelsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.panels = SharedPanels()
+        self.df = pd.DataFrame(np.random.randn(20, 10), index=[str(i) for i in range(20)], columns=list('abcdefghij'))
+
+    def tearDown(self):
+        self.panels.close()
+        shared.detach()
+
+    def test_numeric_is_memory_mapped(self):
+        self.panels.add('close', self.df)
+        df = self.panels['close']
+        self.assertTrue(frames_equal(df, self.df))
+        values = df.values
+        while not isinstance(values, np.memmap) and values.base is not None:
+            values = values.base
+        self.assertIsInstance(values, np.memmap)
+
+    def test_read_only(self):
+        self.panels.add('close', self.df)
+        self.assertFalse(self.panels['close'].values.flags.writeable)
+
+    def test_object(self):
+        df = pd.DataFrame({'a': ['x', 'y'], 'b': ['z', None]})
+        self.panels.add('industry', df)
+        self.assertTrue(frames_equal(self.panels['industry'], df))
+
+    def test_names(self):
+        self.panels.add('close', self.df)
+        self.panels.add('open', self.df)
+        self.assertListEqual(self.panels.names(), ['close', 'open'])
+        self.assertNotIn('volume', self.panels)
+
+    def test_close(self):
+        self.panels.add('close', self.df)
+        self.panels.close()
+        self.assertFalse(os.path.exists(self.panels.root))
+
+    def test_get(self):
+        self.assertIsNone(shared.get('close'))
+        panels = shared.share({'close': self.df})
+        try:
+            self.assertTrue(frames_equal(shared.get('close'), self.df))
+        finally:
+            panels.close()
+
+    def test_workers(self):
+        self.panels.add('close', self.df)
+        pool = multiprocessing.Pool(2, initializer=init_worker, initargs=(self.panels.root,))
+        res = pool.map(worker_sum, ['close'] * 4)
+        pool.close()
+        pool.join()
+        self.assertTrue(np.allclose(res, self.df.sum().sum()))
@@ -29,15 +29,10 @@ class Event(object):
 
     @staticmethod
     def rebase_index(alpha):
-        res = {}
-        for date in np.unique(dateutil.to_datestr(alpha.index)):
-            sdf = alpha.ix[date]
-            date = dateutil.find_le(DATES, date)[1]
-            if isinstance(sdf, pd.DataFrame):
-                res[date] = sdf.astype(int).max().astype(bool)
-            else:
-                res[date] = sdf
-        res = pd.DataFrame(res).T.sort_index()
+        dis = DATES.locate_many(alpha.index, -1)
+        if (dis < 0).any():
+            raise ValueError('No item in the list <= {0!r}'.format(alpha.index[dis < 0][0]))
+        res = alpha.astype(int).groupby(DATES.array[dis]).max().astype(bool)
         res.index = pd.to_datetime(res.index)
         return res
 
@@ -23,6 +23,10 @@ if __name__ == '__main__':
     parser.add_argument('--outdir', type=str, help='Diretory to dump generated DataFrames')
     parser.add_argument('--ftype', help='File type to save DataFrames', choices=('csv', 'pickle', 'msgpack'), default='csv')
     parser.add_argument('--hdf', type=str, help='HDF5 file name to save generated DataFrames')
+    parser.add_argument('--search', type=int, help='Instead of the full grid, randomly sample this number of parameters and search with successive halving')
+    parser.add_argument('--eta', type=int, help='Only 1/eta of candidates are promoted to the next period in search', default=3)
+    parser.add_argument('--resume', action='store_true', help='Keep results of a previous sweep and only run parameters which are missing or failed')
+    parser.add_argument('--extend', action='store_true', help='Only compute dates after the last date in the previously dumped file and append them to it')
     args = parser.parse_args()
 
     alpha = args.alpha
@@ -31,7 +35,8 @@ if __name__ == '__main__':
 
     module = imp.load_source(alphaname, alpha) if ext == '.py' else imp.load_compiled(alphaname, alpha)
     for name, cls in inspect.getmembers(module):
-        if inspect.isclass(cls) and cls is not BacktestingAlpha and issubclass(cls, BacktestingAlpha):
+        if inspect.isclass(cls) and issubclass(cls, BacktestingAlpha) and not inspect.isabstract(cls) and \
+                cls.__module__ == module.__name__:
             alpha = cls
             break
 
@@ -63,19 +68,25 @@ if __name__ == '__main__':
                         k, v = vs.split('=')
                         params[k] = v.split(',')
 
-    if params:
+    if params and args.search:
+        for score, param in parallel.search(alpha, params, args.start, args.end, n=args.search, eta=args.eta)[:10]:
+            print '{:.4f}\t{!r}'.format(score, param)
+    elif params:
         gen = (dict(izip(params, x)) for x in product(*params.itervalues()))
         if args.hdf:
-            parallel.run_hdf(args.hdf, alpha, gen, args.start, args.end)
+            parallel.run_hdf(args.hdf, alpha, gen, args.start, args.end, resume=args.resume)
         else:
             assert args.outdir is not None
             if args.ftype == 'csv':
-                parallel.run_csv(args.outdir, alpha, gen, args.start, args.end)
+                parallel.run_csv(args.outdir, alpha, gen, args.start, args.end, resume=args.resume)
             elif args.ftype == 'pickle':
-                parallel.run_pickle(args.outdir, alpha, gen, args.start, args.end)
+                parallel.run_pickle(args.outdir, alpha, gen, args.start, args.end, resume=args.resume)
             elif args.ftype == 'msgpack':
-                parallel.run_msgpack(args.outdir, alpha, gen, args.start, args.end)
+                parallel.run_msgpack(args.outdir, alpha, gen, args.start, args.end, resume=args.resume)
     else:
         alpha = alpha()
-        alpha.run(args.start, args.end)
-        alpha.dump(alphaname+'.csv')
+        if args.extend and os.path.exists(alphaname+'.csv'):
+            alpha.extend(alphaname+'.csv', enddate=args.end)
+        else:
+            alpha.run(args.start, args.end)
+            alpha.dump(alphaname+'.csv')
@@ -42,10 +42,10 @@ class UpdaterBase(object):
 
     def connect_mongo(self, host='192.168.1.183', db='stocks_dev',
             user='stocks_dev', password='stocks_dev'):
-        from pymongo import MongoClient
-        client = MongoClient(host)
-        db = client[db]
-        db.authenticate(user, password)
+        """Clients are managed by :py:data:`orca.database.manager`, thus each process of :py:meth:`update` opens its own connection."""
+        from orca.database import LazyClient, LazyDatabase
+        client = LazyClient(host=host, dbname=db, user=user, password=password)
+        db = LazyDatabase(host=host, dbname=db, user=user, password=password)
         self.__dict__.update({'client': client, 'db': db})
         self.connected = True
 